@@ -0,0 +1,52 @@
+# Compare the serial and process pool generation of a batch of workflow variants.
+# Usage: python benchmarks/bench_batchGeneration.py [nbVariants] [nbNodes] [nbWorkers]
+
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol
+from godrick.batch import measureBatchSpeedup
+
+from functools import partial
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+def buildVariant(index:int, nbNodes:int) -> Workflow:
+    # Variants differ by their split of the 64 cores of the nodes
+    cluster = ComputeCollection(name="benchCluster")
+    cluster.initFromNodeList(f"nid[0-{nbNodes-1}]", 64, True)
+    firstCores = 1 + index % 63
+    partitions = cluster.splitNodesByCoreRange([firstCores, 64 - firstCores])
+
+    workflow = Workflow(f"bench{index}")
+    task1 = MPITask(name="simulation", cmdline="bin/simulation", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="analysis", cmdline="bin/analysis", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm = MPIPairedCommunicator(id="comm", protocol=MPICommunicatorProtocol.PARTIAL_BCAST_GATHER)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    return workflow
+
+def main():
+    nbVariants = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    nbNodes = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    nbWorkers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    builders = [partial(buildVariant, i, nbNodes) for i in range(nbVariants)]
+    with tempfile.TemporaryDirectory() as folder:
+        result = measureBatchSpeedup(builders, Path(folder), nbWorkers)
+
+    print(f"{nbVariants} variants x {nbNodes} nodes x 64 cores, {result['nbWorkers']} workers")
+    print(f"serial:   {result['serialSeconds']:.3f}s")
+    print(f"parallel: {result['parallelSeconds']:.3f}s")
+    print(f"speedup:  {result['speedup']:.1f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
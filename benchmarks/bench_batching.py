@@ -0,0 +1,88 @@
+# Compare sending small diagnostic records one by one with the batching policy of the communicators over a ZMQ
+# push/pull channel on localhost. Each transfer follows the layout written by packConduitMessage with the schema sent
+# with every message. A batch is a single conduit node listing the records under godrick/batch, so its schema lists
+# the schema of every record and the receiver parses it once per batch before copying the records out.
+# The encoding is driven from Python, so the numbers compare the message layouts rather than the C++ runtime.
+# Requires pyzmq. Usage: python benchmarks/bench_batching.py [nbRecords]
+
+from multiprocessing import Process
+import json
+import struct
+import sys
+import time
+import zmq
+
+ENDPOINT = "tcp://127.0.0.1:50101"
+BATCH_SIZES = [1, 8, 64, 512]
+RECORD_FIELDS = ["step", "time", "residual", "energy", "mass"]
+
+def generateRecordSchema(offset:int) -> dict:
+    # Compact schema of a diagnostic record, as written by conduit::Schema::to_json()
+    schema = {}
+    for i, name in enumerate(RECORD_FIELDS):
+        schema[name] = {"dtype": "float64", "number_of_elements": 1, "offset": offset + i * 8, "stride": 8, "element_bytes": 8, "endianness": "little"}
+    return schema
+
+def packMessage(records:list) -> bytes:
+    if len(records) == 1:
+        schema = generateRecordSchema(0)
+    else:
+        schema = {"godrick": {"batch": [generateRecordSchema(i * 8 * len(RECORD_FIELDS)) for i in range(len(records))]}}
+    schemaJson = json.dumps(schema).encode()
+    return struct.pack("<q", len(schemaJson)) + schemaJson + b"\0" + b"".join(records)
+
+def unpackMessage(buffer:memoryview) -> list:
+    (schemaLen,) = struct.unpack_from("<q", buffer, 0)
+    schema = json.loads(bytes(buffer[8:8 + schemaLen]))
+    data = buffer[8 + schemaLen + 1:]
+    records = schema["godrick"]["batch"] if "godrick" in schema else [schema]
+    return [{name: struct.unpack_from("<d", data, entry["offset"])[0] for name, entry in record.items()} for record in records]
+
+def push(batchSize:int, nbRecords:int) -> None:
+    context = zmq.Context()
+    socket = context.socket(zmq.PUSH)
+    socket.bind(ENDPOINT)
+
+    batch = []
+    for step in range(nbRecords):
+        batch.append(struct.pack(f"<{len(RECORD_FIELDS)}d", step, step * 0.1, 1.0 / (step + 1), 2.0, 3.0))
+        if len(batch) >= batchSize:
+            socket.send(packMessage(batch))
+            batch = []
+    # Flush of the pending batch
+    if len(batch) > 0:
+        socket.send(packMessage(batch))
+    socket.close(linger=-1)
+    context.term()
+
+def pull(batchSize:int, nbRecords:int) -> float:
+    context = zmq.Context()
+    socket = context.socket(zmq.PULL)
+    socket.connect(ENDPOINT)
+    sender = Process(target=push, args=(batchSize, nbRecords))
+    sender.start()
+
+    # The clock starts with the first transfer to leave out the start of the sender
+    nbReceived = len(unpackMessage(memoryview(socket.recv(copy=False).buffer)))
+    start = time.perf_counter()
+    while nbReceived < nbRecords:
+        nbReceived += len(unpackMessage(memoryview(socket.recv(copy=False).buffer)))
+    elapsed = time.perf_counter() - start
+
+    sender.join()
+    socket.close()
+    context.term()
+    return elapsed
+
+def main():
+    nbRecords = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    print(f"{nbRecords} records of {len(RECORD_FIELDS)} float64 on localhost")
+    results = {}
+    for batchSize in BATCH_SIZES:
+        results[batchSize] = pull(batchSize, nbRecords)
+        print(f"maxCount {batchSize:>4}: {results[batchSize]:.3f}s, {nbRecords / results[batchSize]:.0f} records/s, speedup {results[1] / results[batchSize]:.2f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
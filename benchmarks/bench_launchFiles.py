@@ -0,0 +1,65 @@
+# Compare the streaming, range-compressed rankfile/hostfile writer with the previous string concatenation.
+# Usage: python benchmarks/bench_launchFiles.py [nbNodes] [nbCores]
+
+from godrick.computeResources import ComputeCollection
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.launcher import OpenMPITaskSetup
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+def legacyFiles(coreTable, ranges:list) -> tuple:
+    # Previous emission, kept as it was: one hostfile line per core and every slot listed individually
+    hostfile = ""
+    rankfile = ""
+    for i, (start, end) in enumerate(ranges):
+        hostname = coreTable.getHostName(start)
+        for j in range(start, end):
+            hostfile += f"{hostname}\n"
+        slots = ""
+        for j in range(start, end):
+            slots += f"{coreTable.mainThreads[j]},"
+        rankfile += f"rank {i}={hostname} slots={slots[:-1]}\n"
+    return hostfile, rankfile
+
+def main():
+    nbNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nbCores = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+
+    cluster = ComputeCollection(name="benchCluster")
+    cluster.initFromNodeList(f"nid[0-{nbNodes-1}]", nbCores, False)
+    coreTable = cluster.getCoreTable()
+
+    workflow = Workflow(name="bench")
+    workflow.declareTask(MPITask(name="perNode", cmdline="app", resources=cluster, placementPolicy=MPIPlacementPolicy.ONETASKPERNODE))
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Like timeit, the garbage collector is disabled while timing
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        (hostfile, rankfile) = legacyFiles(coreTable, coreTable.getNodeRanges())
+        (Path(folder) / "legacy.hostfile").write_text(hostfile)
+        (Path(folder) / "legacy.rankfile").write_text(rankfile)
+        legacyTime = time.perf_counter() - start
+
+        setup = OpenMPITaskSetup()
+        start = time.perf_counter()
+        setup.assignProcesses(workflow, Path(folder))
+        newTime = time.perf_counter() - start
+        gc.enable()
+
+        legacySize = len(hostfile) + len(rankfile)
+        newSize = setup.hostfilePath.stat().st_size + setup.rankfilePath.stat().st_size
+
+    print(f"{nbNodes} nodes x {nbCores} cores, one rank per node")
+    print(f"concatenation: {legacyTime:.3f}s, {legacySize} bytes")
+    print(f"streaming:     {newTime:.3f}s, {newSize} bytes")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Compare the two schema modes of the conduit messages over a ZMQ push/pull channel on localhost.
+# The messages follow the layout written by packConduitMessage: with ALWAYS, every message carries the json
+# schema which the receiver parses before reading the data, with ON_CHANGE, only the first message carries it
+# and the next ones only hold the key of the sender and the identifier of the schema cached by the receiver.
+# The encoding is driven from Python with a schema shaped like the one of conduit, so the numbers compare the
+# two message layouts rather than the C++ runtime.
+# Requires pyzmq. Usage: python benchmarks/bench_schemaMode.py [nbMessages] [nbFields]
+
+from multiprocessing import Process
+import json
+import struct
+import sys
+import time
+import zmq
+
+ENDPOINT = "tcp://127.0.0.1:50100"
+MESSAGE_SIZES = [64, 1024, 16 * 1024, 256 * 1024]
+
+def generateSchema(nbFields:int, messageSize:int) -> dict:
+    # Compact schema of a node holding nbFields arrays of float64, as written by conduit::Schema::to_json()
+    nbElements = max(1, messageSize // (8 * nbFields))
+    schema = {}
+    for i in range(nbFields):
+        schema[f"field{i}"] = {"dtype": "float64", "number_of_elements": nbElements, "offset": i * nbElements * 8, "stride": 8, "element_bytes": 8, "endianness": "little"}
+    return schema
+
+def readData(schema:dict, data:memoryview) -> dict:
+    # Wrap each field of the data with the schema, then copy it out like Node::update
+    return {name: bytes(data[entry["offset"]:entry["offset"] + entry["number_of_elements"] * entry["element_bytes"]]) for name, entry in schema.items()}
+
+def push(onChange:bool, nbMessages:int, nbFields:int, messageSize:int) -> None:
+    context = zmq.Context()
+    socket = context.socket(zmq.PUSH)
+    socket.bind(ENDPOINT)
+    schema = generateSchema(nbFields, messageSize)
+    payload = b"x" * sum(entry["number_of_elements"] * entry["element_bytes"] for entry in schema.values())
+
+    lastSchema = None
+    senderKey = 1
+    schemaId = 0
+    for _ in range(nbMessages):
+        # The sender compares the schema with the last one sent before generating the json
+        if not onChange or schema != lastSchema:
+            schemaJson = json.dumps(schema).encode()
+            if onChange:
+                lastSchema = schema
+                schemaId = hash(schemaJson) & 0xFFFFFFFFFFFFFFFF
+                header = struct.pack("<qQQ", len(schemaJson), senderKey, schemaId) + schemaJson + b"\0"
+            else:
+                header = struct.pack("<q", len(schemaJson)) + schemaJson + b"\0"
+        else:
+            header = struct.pack("<qQQ", -1, senderKey, schemaId)
+        socket.send(header + payload)
+    socket.close(linger=-1)
+    context.term()
+
+def pull(onChange:bool, nbMessages:int, nbFields:int, messageSize:int) -> float:
+    context = zmq.Context()
+    socket = context.socket(zmq.PULL)
+    socket.connect(ENDPOINT)
+    sender = Process(target=push, args=(onChange, nbMessages, nbFields, messageSize))
+    sender.start()
+
+    schemas = {}
+    start = None
+    for _ in range(nbMessages):
+        buffer = memoryview(socket.recv(copy=False).buffer)
+        (schemaLen,) = struct.unpack_from("<q", buffer, 0)
+        offset = 8
+        if onChange:
+            (senderKey, schemaId) = struct.unpack_from("<QQ", buffer, 8)
+            offset = 24
+        if schemaLen >= 0:
+            schema = json.loads(bytes(buffer[offset:offset + schemaLen]))
+            offset += schemaLen + 1
+            if onChange:
+                schemas[senderKey] = (schemaId, schema)
+        else:
+            schema = schemas[senderKey][1]
+        readData(schema, buffer[offset:])
+        if start is None:
+            start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+
+    sender.join()
+    socket.close()
+    context.term()
+    return elapsed
+
+def main():
+    nbMessages = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    nbFields = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print(f"{nbMessages} messages of {nbFields} float64 arrays on localhost")
+    for messageSize in MESSAGE_SIZES:
+        schema = generateSchema(nbFields, messageSize)
+        schemaSize = len(json.dumps(schema))
+        dataSize = sum(entry["number_of_elements"] * entry["element_bytes"] for entry in schema.values())
+        results = {}
+        for mode in ["ALWAYS", "ON_CHANGE"]:
+            results[mode] = pull(mode == "ON_CHANGE", nbMessages, nbFields, messageSize)
+        rates = ", ".join(f"{mode}: {(nbMessages - 1) / elapsed:.0f} msg/s" for mode, elapsed in results.items())
+        print(f"{dataSize:>7} bytes (schema {schemaSize} bytes): {rates}, speedup {results['ALWAYS'] / results['ON_CHANGE']:.2f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Compare the shared memory ring of the SHM communicator with a ZMQ push/pull channel on localhost.
+# The ring follows the layout of the C++ CommunicatorSHM (head and tail counters, slots with a chunk header),
+# driven from Python, so the numbers compare the mechanisms rather than the C++ runtime.
+# Requires pyzmq. Usage: python benchmarks/bench_shmTransport.py [nbMessages] [messageSize]
+
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import SHMPairedCommunicator, ZMQPairedCommunicator, ZMQCommunicatorProtocol
+
+from multiprocessing import Process, shared_memory
+from pathlib import Path
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import zmq
+
+RING_HEADER_SIZE = 128      # head and tail on separate cache lines
+SLOT_HEADER_SIZE = 24       # totalSize, offset, chunkSize
+HEAD_OFFSET = 0
+TAIL_OFFSET = 64
+
+def generateSettings(comm) -> dict:
+    # protocolSettings written by the launcher for a sender and a receiver on the same host
+    cluster = ComputeCollection(name="benchCluster")
+    cluster.initFromSlots([("localhost", 2)], False)
+    partitions = cluster.splitNodesByCoreRange([1, 1])
+
+    workflow = Workflow(f"bench{comm.getCommunicatorTransportType().name}")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+    with open(Path(workflow.getConfigurationFile())) as f:
+        settings = json.load(f)["communicators"][0]["protocolSettings"]
+    launcher.removeFiles()
+    return settings
+
+def loadCounter(buffer, offset:int) -> int:
+    return struct.unpack_from("<Q", buffer, offset)[0]
+
+def storeCounter(buffer, offset:int, value:int) -> None:
+    struct.pack_into("<Q", buffer, offset, value)
+
+def waitFor(condition) -> None:
+    # Same backoff as the C++ ring: spin, yield, then sleep
+    i = 0
+    while not condition():
+        i += 1
+        if i > 1024:
+            time.sleep(0 if i < 2048 else 0.00005)
+
+def shmPush(settings:dict, nbMessages:int, messageSize:int) -> None:
+    segment = shared_memory.SharedMemory(name=settings["segment"].lstrip("/"))
+    buffer = segment.buf
+    capacity = settings["capacity"]
+    slotSize = settings["slotsize"]
+    payload = b"x" * messageSize
+
+    position = 0
+    for _ in range(nbMessages):
+        offset = 0
+        while True:
+            waitFor(lambda: position - loadCounter(buffer, TAIL_OFFSET) < capacity)
+            slot = RING_HEADER_SIZE + (position % capacity) * (SLOT_HEADER_SIZE + slotSize)
+            chunkSize = min(messageSize - offset, slotSize)
+            struct.pack_into("<QQQ", buffer, slot, messageSize, offset, chunkSize)
+            buffer[slot + SLOT_HEADER_SIZE:slot + SLOT_HEADER_SIZE + chunkSize] = payload[offset:offset + chunkSize]
+            position += 1
+            storeCounter(buffer, HEAD_OFFSET, position)
+            offset += chunkSize
+            if offset >= messageSize:
+                break
+    del buffer
+    segment.close()
+
+def shmPull(settings:dict, nbMessages:int, messageSize:int) -> float:
+    capacity = settings["capacity"]
+    slotSize = settings["slotsize"]
+    segment = shared_memory.SharedMemory(name=settings["segment"].lstrip("/"), create=True, size=RING_HEADER_SIZE + capacity * (SLOT_HEADER_SIZE + slotSize))
+    buffer = segment.buf
+    sender = Process(target=shmPush, args=(settings, nbMessages, messageSize))
+    sender.start()
+
+    position = 0
+    start = None
+    for _ in range(nbMessages):
+        message = None
+        complete = False
+        while not complete:
+            waitFor(lambda: loadCounter(buffer, HEAD_OFFSET) != position)
+            slot = RING_HEADER_SIZE + (position % capacity) * (SLOT_HEADER_SIZE + slotSize)
+            (totalSize, offset, chunkSize) = struct.unpack_from("<QQQ", buffer, slot)
+            if offset == 0:
+                message = bytearray(totalSize)
+            message[offset:offset + chunkSize] = buffer[slot + SLOT_HEADER_SIZE:slot + SLOT_HEADER_SIZE + chunkSize]
+            complete = offset + chunkSize >= totalSize
+            position += 1
+            storeCounter(buffer, TAIL_OFFSET, position)
+        if start is None:
+            start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+
+    sender.join()
+    del buffer
+    segment.close()
+    segment.unlink()
+    return elapsed
+
+def zmqPush(endpoint:str, nbMessages:int, messageSize:int) -> None:
+    context = zmq.Context()
+    socket = context.socket(zmq.PUSH)
+    socket.bind(endpoint)
+    payload = b"x" * messageSize
+    for _ in range(nbMessages):
+        socket.send(payload)
+    socket.close(linger=-1)
+    context.term()
+
+def zmqPull(endpoint:str, nbMessages:int, messageSize:int) -> float:
+    context = zmq.Context()
+    socket = context.socket(zmq.PULL)
+    socket.connect(endpoint)
+    sender = Process(target=zmqPush, args=(endpoint, nbMessages, messageSize))
+    sender.start()
+
+    socket.recv()
+    start = time.perf_counter()
+    for _ in range(nbMessages - 1):
+        socket.recv()
+    elapsed = time.perf_counter() - start
+
+    sender.join()
+    socket.close()
+    context.term()
+    return elapsed
+
+def main():
+    nbMessages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    messageSize = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+
+    # The configuration files are written in the current directory
+    with tempfile.TemporaryDirectory() as folder:
+        previousFolder = os.getcwd()
+        os.chdir(folder)
+        try:
+            shmSettings = generateSettings(SHMPairedCommunicator(id="channel", capacity=64, slotSize=max(64, (messageSize + 7) // 8 * 8)))
+            zmqSettings = generateSettings(ZMQPairedCommunicator(id="channel", protocol=ZMQCommunicatorProtocol.PUSH_PULL))
+        finally:
+            os.chdir(previousFolder)
+
+    print(f"{nbMessages} messages of {messageSize} bytes on localhost")
+    results = {}
+    results["shm"] = shmPull(shmSettings, nbMessages, messageSize)
+    results["zmq"] = zmqPull(zmqSettings["endpoint"], nbMessages, messageSize)
+    for name, elapsed in results.items():
+        print(f"{name}: {elapsed:.3f}s, {(nbMessages - 1) / elapsed:.0f} msg/s, {(nbMessages - 1) * messageSize / elapsed / 1e6:.1f} MB/s")
+    print(f"speedup shm/zmq: {results['zmq'] / results['shm']:.2f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Measure the number of simulated messages per second of wall-clock time processed by the WorkflowSimulator.
+# Usage: python benchmarks/bench_simulator.py [nbStages] [duration]
+
+from godrick.workflow import Workflow
+from godrick.task import MPITask
+from godrick.communicator import ZMQPairedCommunicator, ZMQCommunicatorProtocol
+from godrick.simulator import WorkflowSimulator
+
+import sys
+import time
+
+def createPipeline(nbStages:int) -> Workflow:
+    workflow = Workflow("benchSimulator")
+    tasks = []
+    for i in range(nbStages):
+        task = MPITask(name=f"stage{i}", cmdline=f"bin/stage{i}")
+        task.addInputPort("in")
+        task.addOutputPort("out")
+        workflow.declareTask(task)
+        tasks.append(task)
+    for i in range(nbStages-1):
+        comm = ZMQPairedCommunicator(id=f"comm{i}", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+        comm.connectToOutputPort(tasks[i].getOutputPort("out"))
+        comm.connectToInputPort(tasks[i+1].getInputPort("in"))
+        workflow.declareCommunicator(comm)
+    return workflow
+
+def main():
+    nbStages = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    simulator = WorkflowSimulator(createPipeline(nbStages), serviceTimes={f"stage{i}": 0.0001 for i in range(nbStages)})
+    start = time.perf_counter()
+    report = simulator.run(duration=duration)
+    elapsed = time.perf_counter() - start
+
+    nbMessages = sum(report.getNbMessages(f"comm{i}") for i in range(nbStages - 1))
+    print(f"{nbStages} stages, {duration}s simulated: {nbMessages} messages in {elapsed:.3f}s, {nbMessages / elapsed:.0f} msg/s")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
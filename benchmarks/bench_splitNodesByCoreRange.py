@@ -0,0 +1,78 @@
+# Compare the interval based splitNodesByCoreRange with the previous per-core scan.
+# Usage: python benchmarks/bench_splitNodesByCoreRange.py [nbNodes] [nbCores] [nbPartitions]
+
+from godrick.computeResources import ComputeCollection
+
+import gc
+import sys
+import time
+
+class LegacySocket():
+    def __init__(self, hostname:str, mainThreads:list, hyperThreads:list) -> None:
+        self.hostname = hostname
+        self.mainThreads = mainThreads
+        self.hyperThreads = hyperThreads
+        self.hasHT = len(hyperThreads) > 0
+
+def legacySplit(legacyNodes:list, ranges:list) -> list:
+    # Previous algorithm, kept as it was: every interval scans every core of every socket of every node,
+    # copying the selected cores (and every hyperthread) into new per-socket lists
+    startIndex = 0
+    intervals = []
+    for size in ranges:
+        intervals.append([startIndex, startIndex+size-1])
+        startIndex += size
+
+    result = []
+    for interval in intervals:
+        nodes = []
+        for hostname, sockets in legacyNodes:
+            subSockets = []
+            for socket in sockets:
+                subSocket = LegacySocket(socket.hostname, [], [])
+                subSocket.hasHT = socket.hasHT
+                for i, core in enumerate(socket.mainThreads):
+                    if core >= interval[0] and core <= interval[1]:
+                        subSocket.mainThreads.append(socket.mainThreads[i])
+                    if socket.hasHT:
+                        subSocket.hyperThreads.append(socket.hyperThreads[i])
+                if len(subSocket.mainThreads) > 0:
+                    subSockets.append(subSocket)
+            nodes.append((hostname, subSockets))
+        result.append(nodes)
+    return result
+
+def main():
+    nbNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nbCores = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    nbPartitions = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+
+    cluster = ComputeCollection(name="benchCluster")
+    cluster.initFromNodeList(f"nid[0-{nbNodes-1}]", nbCores, True)
+    ranges = [nbCores // nbPartitions] * nbPartitions
+
+    legacyNodes = []
+    for node in cluster.nodes:
+        legacyNodes.append((node.hostname, [LegacySocket(socket.hostname, socket.mainThreads, socket.hyperThreads) for socket in node.sockets]))
+
+    # Like timeit, the garbage collector is disabled while timing
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    legacySplit(legacyNodes, ranges)
+    legacyTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    partitions = cluster.splitNodesByCoreRange(ranges)
+    newTime = time.perf_counter() - start
+    gc.enable()
+
+    assert len(partitions) == nbPartitions
+    print(f"{nbNodes} nodes x {nbCores} cores x {nbPartitions} partitions")
+    print(f"per-core scan:  {legacyTime:.3f}s")
+    print(f"interval split: {newTime:.3f}s")
+    print(f"speedup:        {legacyTime / newTime:.1f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Compare the ipc:// and tcp:// endpoints generated for a co-located ZMQ push/pull channel on localhost.
+# Requires pyzmq. Usage: python benchmarks/bench_zmqTransport.py [nbMessages] [messageSize]
+
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import ZMQPairedCommunicator, ZMQCommunicatorProtocol
+
+from multiprocessing import Process
+from pathlib import Path
+import json
+import os
+import sys
+import tempfile
+import time
+import zmq
+
+def generateEndpoint(useIPC:bool) -> str:
+    # Endpoint written by the launcher for a sender and a receiver on the same host
+    cluster = ComputeCollection(name="benchCluster")
+    cluster.initFromSlots([("localhost", 2)], False)
+    partitions = cluster.splitNodesByCoreRange([1, 1])
+
+    workflow = Workflow("benchIPC" if useIPC else "benchTCP")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm = ZMQPairedCommunicator(id="channel", protocol=ZMQCommunicatorProtocol.PUSH_PULL, useIPC=useIPC)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+    with open(Path(workflow.getConfigurationFile())) as f:
+        endpoint = json.load(f)["communicators"][0]["protocolSettings"]["endpoint"]
+    launcher.removeFiles()
+    return endpoint
+
+def push(endpoint:str, nbMessages:int, messageSize:int) -> None:
+    # Sender side, binding like the default ZMQ_BIND_SENDER
+    context = zmq.Context()
+    socket = context.socket(zmq.PUSH)
+    socket.bind(endpoint)
+    payload = b"x" * messageSize
+    for _ in range(nbMessages):
+        socket.send(payload)
+    socket.close(linger=-1)
+    context.term()
+
+def pull(endpoint:str, nbMessages:int, messageSize:int) -> float:
+    # Return the time between the first and the last message received
+    context = zmq.Context()
+    socket = context.socket(zmq.PULL)
+    socket.connect(endpoint)
+    sender = Process(target=push, args=(endpoint, nbMessages, messageSize))
+    sender.start()
+
+    socket.recv()
+    start = time.perf_counter()
+    for _ in range(nbMessages - 1):
+        socket.recv()
+    elapsed = time.perf_counter() - start
+
+    sender.join()
+    socket.close()
+    context.term()
+    return elapsed
+
+def main():
+    nbMessages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    messageSize = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+
+    # The configuration files are written in the current directory
+    with tempfile.TemporaryDirectory() as folder:
+        previousFolder = os.getcwd()
+        os.chdir(folder)
+        try:
+            endpoints = [generateEndpoint(True), generateEndpoint(False)]
+        finally:
+            os.chdir(previousFolder)
+
+    print(f"{nbMessages} messages of {messageSize} bytes, push/pull on localhost")
+    results = {}
+    for endpoint in endpoints:
+        elapsed = pull(endpoint, nbMessages, messageSize)
+        results[endpoint] = elapsed
+        print(f"{endpoint}: {elapsed:.3f}s, {(nbMessages - 1) / elapsed:.0f} msg/s, {(nbMessages - 1) * messageSize / elapsed / 1e6:.1f} MB/s")
+    print(f"speedup ipc/tcp: {results[endpoints[1]] / results[endpoints[0]]:.2f}x")
+
+# Boilerplate name guard
+if __name__ == "__main__":
+    main()
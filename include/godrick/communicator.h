@@ -1,5 +1,6 @@
 #pragma once
 
+#include <chrono>
 #include <string>
 #include <vector>
 #include <unordered_map>
@@ -34,6 +35,18 @@ static std::unordered_map<std::string, MessageFormat> strToMessageFormat = {
     {"MSG_FORMAT_BSON", MessageFormat::BSON}
 };
 
+enum class SchemaMode : uint8_t
+{
+    ALWAYS = 0,     // The schema is sent with every message
+    ON_CHANGE = 1   // The schema is only sent when the layout of the messages changes
+};
+
+// Conversion table, must match the names from CommunicatorSchemaMode in communicator.py
+static std::unordered_map<std::string, SchemaMode> strToSchemaMode = {
+    {"ALWAYS", SchemaMode::ALWAYS},
+    {"ON_CHANGE", SchemaMode::ON_CHANGE}
+};
+
 class Communicator
 {
 public:
@@ -46,16 +59,41 @@ public:
     int32_t getNbTokenLeft() const { return m_nbTokenLeft; }
     void setNbTokenLeft(int32_t nbToken) { m_nbTokenLeft = nbToken; }
 
+    // Rank of the process in its task, used by the communicators with an endpoint per rank
+    int getTaskRank() const { return m_taskRank; }
+    void setTaskRank(int rank) { m_taskRank = rank; }
+
     virtual bool initFromJSON(json& data, const std::string& taskName);
 
     virtual bool send(conduit::Node& data) = 0;
     virtual MessageResponse receive(std::vector<conduit::Node>& data) = 0;
     virtual void flush(){}
 
+    // Entry points of the ports, packing the messages in batches following the batching policy of the communicator.
+    // Without batching, they forward the messages to send() and receive().
+    bool sendBatched(conduit::Node& data);
+    MessageResponse receiveBatched(std::vector<conduit::Node>& data);
+    void flushBatched();
+
 protected:
+    bool sendBatch();
+
     std::string m_name;
     int32_t m_nbTokenLeft = 0;
+    int m_taskRank = 0;
     MessageFormat m_msgFormat = MessageFormat::CONDUIT;
+    SchemaMode m_schemaMode = SchemaMode::ALWAYS;
+
+    // Batching policy, a maximum of 1 message disables the batching and 0 disables the byte or time limit
+    uint32_t m_batchMaxCount = 1;
+    uint64_t m_batchMaxBytes = 0;
+    double m_batchMaxLinger = 0.0;      // In seconds
+
+    // Batch being filled
+    conduit::Node m_batch;
+    uint32_t m_batchCount = 0;
+    uint64_t m_batchBytes = 0;
+    std::chrono::steady_clock::time_point m_batchStart;
 }; // Communicator
 
 } // godrick
\ No newline at end of file
@@ -1,10 +1,51 @@
 #pragma once
 
+#include <godrick/communicator.h>
+
 #include <conduit/conduit.hpp>
 
+#include <unordered_map>
+#include <vector>
+
 namespace godrick {
 
 void setTerminateMessage(conduit::Node& data);
 bool isTerminateMessage(const conduit::Node& data);
 
+// Batches hold a copy of each message in the list godrick/batch
+void appendBatchMessage(conduit::Node& batch, const conduit::Node& data);
+bool isBatchMessage(const conduit::Node& data);
+
+// Replace the batches of a list of received messages by the messages they hold, keeping the order
+void unpackBatchMessages(std::vector<conduit::Node>& data);
+
+// Last schema received from a sender
+struct ReceivedSchema
+{
+    uint64_t id = 0;
+    conduit::Schema schema;
+};
+
+// Schemas of the conduit messages of a communicator, kept to skip sending and parsing them while the layout does not change
+struct SchemaCache
+{
+    // Sender side: last compact schema sent, its identifier and the random key of the sender
+    conduit::Schema schema;
+    uint64_t id = 0;
+    uint64_t sender = 0;
+    bool valid = false;
+
+    // Receiver side: last schema of each sender by key, several senders may share a receiver.
+    // A sender only refers to the last schema it sent, so the cache holds one schema per sender.
+    std::unordered_map<uint64_t, ReceivedSchema> received;
+};
+
+// Serialize data as [int64 schema length][schema json][compact data]. In ON_CHANGE mode, the layout is
+// [int64 schema length][uint64 sender key][uint64 schema id][schema json][compact data] and the schema is only
+// written when it differs from the previous one sent, the length is then -1 and the data follows the identifier.
+void packConduitMessage(conduit::Node& data, conduit::Node& message, SchemaMode mode, SchemaCache& cache);
+
+// Read a message written by packConduitMessage with the same mode and copy its data out
+bool unpackConduitMessage(uint8_t* buffer, size_t size, conduit::Node& data, SchemaMode mode, SchemaCache& cache);
+
 } // godrick
\ No newline at end of file
@@ -0,0 +1,69 @@
+#pragma once
+
+#include <godrick/mpi/protocolImplMPI.h>
+
+#include <mpi.h>
+#include <nlohmann/json.hpp>
+using json = nlohmann::json;
+
+namespace godrick {
+
+namespace mpi {
+
+// Box of a global array, in global indices
+struct RedistributionBox
+{
+    int rank = -1;                  // Index of the peer in its task
+    std::vector<int64_t> start;
+    std::vector<int64_t> count;
+};
+
+// Type written in the header of the control messages (terminate, ...) instead of the type of the elements
+constexpr int64_t REDISTRIBUTION_CONTROL_TYPE = -1;
+
+struct RedistributionSentEntry
+{
+    std::vector<uint8_t> buffer;
+    MPI_Request request;
+};
+
+class BlockRedistributeProtocolImplMPI : public ProtocolImplMPI
+{
+public:
+    BlockRedistributeProtocolImplMPI() : ProtocolImplMPI(){}
+    BlockRedistributeProtocolImplMPI(MPI_Comm comm,
+                    int localInStartRank,
+                    int localInSize,
+                    int localOutStartRank,
+                    int localOutSize,
+                    int localRank,
+                    bool isSource,
+                    const json& settings);
+
+    virtual ~BlockRedistributeProtocolImplMPI(){}
+
+    virtual bool isValid() const override;
+    virtual bool send(conduit::Node& data) override;
+    virtual bool receive(std::vector<conduit::Node>& data) override;
+    virtual void flush() override;
+
+protected:
+    bool sendControl(conduit::Node& data);
+    bool receiveControl(int source, std::vector<uint8_t>& buffer, conduit::Node& data);
+    void receiveMessage(int source, std::vector<uint8_t>& buffer);
+
+    std::string                         m_field;
+    bool                                m_validPlan = false;
+
+    // Block of the local rank and the boxes exchanged with the peers, from the plan written by the launcher
+    RedistributionBox                   m_block;
+    std::vector<RedistributionBox>      m_boxes;
+
+    std::vector<RedistributionSentEntry> m_transitMessages;
+    int                                 m_sentMsgID = 0;
+    int                                 m_expectedMsgID = 0;
+};
+
+} // mpi
+
+} // godrick
@@ -14,12 +14,14 @@ namespace mpi {
 enum class MPICommProtocol : uint8_t
 {
     BROADCAST = 0,
-    PARTIAL_BCAST_GATHER = 1
+    PARTIAL_BCAST_GATHER = 1,
+    BLOCK_REDISTRIBUTE = 2
 };
 
 static std::unordered_map<std::string, MPICommProtocol> strToMPICommProtocol = {
     {"BROADCAST", MPICommProtocol::BROADCAST},
-    {"PARTIAL_BCAST_GATHER", MPICommProtocol::PARTIAL_BCAST_GATHER}
+    {"PARTIAL_BCAST_GATHER", MPICommProtocol::PARTIAL_BCAST_GATHER},
+    {"BLOCK_REDISTRIBUTE", MPICommProtocol::BLOCK_REDISTRIBUTE}
 };
 
 
@@ -10,6 +10,7 @@ namespace mpi {
 
 struct MsgSentEntry 
 {
+    MsgSentEntry(){}
     MsgSentEntry(conduit::Schema& schema) : data(schema){}
     conduit::Node data;
     std::vector<MPI_Request> requests;
@@ -1,5 +1,7 @@
 #pragma once
 
+#include <godrick/messageUtils.h>
+
 #include <mpi.h>
 #include <conduit/conduit.hpp>
 
@@ -33,6 +35,8 @@ public:
     virtual bool receive(std::vector<conduit::Node>& data) = 0;
     virtual void flush(){}
     virtual void print(){}
+
+    void setSchemaMode(SchemaMode mode){ m_schemaMode = mode; }
 protected:
     MPI_Comm m_localComm = MPI_COMM_NULL;
     int m_localInStartRank = -1;
@@ -43,6 +47,10 @@ protected:
     // Local information
     int m_localRank = -1;
     bool m_isSource = false;
+
+    // Schemas of the conduit messages, only used by the protocols serializing the messages themselves
+    SchemaMode m_schemaMode = SchemaMode::ALWAYS;
+    SchemaCache m_schemaCache;
 };
 
 } // mpi
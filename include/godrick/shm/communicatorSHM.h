@@ -0,0 +1,75 @@
+#pragma once
+
+#include <godrick/communicator.h>
+#include <godrick/messageUtils.h>
+
+#include <cstdint>
+#include <vector>
+
+namespace godrick {
+
+namespace shm {
+
+// Position of the producer and of the consumer in the ring, on separate cache lines.
+// A new segment is filled with zeros, which is an empty ring. A segment left behind by a
+// run which crashed keeps its positions and slots, each producer starts a new generation
+// of the ring and the consumer only reads once it attached to the current generation.
+struct RingHeader
+{
+    alignas(64) uint64_t head = 0;                  // Number of slots written by the producer
+    uint64_t generation = 0;                        // Generation started by the producer, 0 if none
+    alignas(64) uint64_t tail = 0;                  // Number of slots read by the consumer
+    uint64_t consumerGeneration = 0;                // Generation the consumer attached to
+};
+
+// Header of each slot, followed by slotSize bytes of payload. A message larger than
+// a slot is written in consecutive slots, each one holding a chunk of the message.
+struct SlotHeader
+{
+    uint64_t totalSize = 0;     // Size of the whole message
+    uint64_t offset = 0;        // Position of the chunk in the message
+    uint64_t chunkSize = 0;     // Number of bytes of the message in this slot
+};
+
+class CommunicatorSHM : public Communicator 
+{
+public:
+    CommunicatorSHM() : Communicator() {}
+    ~CommunicatorSHM();
+
+    virtual bool initFromJSON(json& data, const std::string& taskName) override;
+
+    virtual bool send(conduit::Node& data) override;
+    virtual MessageResponse receive(std::vector<conduit::Node>& data) override;
+    virtual void flush() override;
+
+protected:
+    bool writeMessage(const uint8_t* data, size_t size);
+    bool readMessage(std::vector<uint8_t>& buffer);
+    SlotHeader* getSlot(uint64_t index) const;
+    void startGeneration();
+    bool isConsumerAttached() const;
+    bool attachToProducer();
+
+    bool sendConduitFormat(conduit::Node& data);
+    bool sendJSONFormat(conduit::Node& data);
+    MessageResponse receiveConduitFormat(std::vector<conduit::Node>& data, std::vector<uint8_t>& buffer);
+    MessageResponse receiveJSONFormat(std::vector<conduit::Node>& data, std::vector<uint8_t>& buffer);
+
+    std::string m_segmentName;
+    uint64_t m_capacity = 0;
+    uint64_t m_slotSize = 0;
+    size_t m_segmentSize = 0;
+    void* m_segment = nullptr;
+    RingHeader* m_header = nullptr;
+    uint8_t* m_slots = nullptr;
+
+    bool m_isSender = false;
+    bool m_nowait = false;
+    uint64_t m_generation = 0;  // Generation of the ring started or attached to by this side
+    SchemaCache m_schemaCache;
+};
+
+} // shm
+
+} // godrick
@@ -1,6 +1,7 @@
 #pragma once
 
 #include <godrick/communicator.h>
+#include <godrick/messageUtils.h>
 
 #include <zmq.hpp>
 
@@ -33,6 +34,9 @@ public:
     virtual void flush() override {}
 
 protected:
+    bool bindSocket(const json& settings, const std::string& taskName);
+    bool connectSocket(const json& settings, const std::string& taskName);
+
     bool sendConduitFormat(conduit::Node& data);
     bool sendJSONFormat(conduit::Node& data);
     bool sendBSONFormat(conduit::Node& data);
@@ -44,6 +48,7 @@ protected:
     ZMQCommProtocol m_protocol = ZMQCommProtocol::PUB_SUB;
     zmq::socket_t m_socket;
     bool m_nowait = false;
+    SchemaCache m_schemaCache;
 };
 
 } // zmq
@@ -0,0 +1,79 @@
+from godrick.workflow import Workflow
+from godrick.launcher import MainLauncher, TaskSetupType
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import json
+import os
+import time
+import traceback
+
+def generateVariant(index:int, builder:Callable[[], Workflow], outputFolder:Path, taskSetupType:TaskSetupType) -> dict:
+    # Build and generate one workflow. The workflow is built in the worker, so the tasks and communicators
+    # flagged by the launcher are never shared between variants. All the files are written in the folder of
+    # the variant, the current directory of the worker is left untouched.
+    result = {}
+    result["index"] = index
+    start = time.perf_counter()
+    try:
+        workflow = builder()
+        folder = (outputFolder / f"{index:05d}.{workflow.getName()}").resolve()
+
+        launcher = MainLauncher(taskSetupType=taskSetupType)
+        launcher.generateOutputFiles(workflow=workflow, folder=folder)
+
+        result["name"] = workflow.getName()
+        result["folder"] = str(folder)
+        result["files"] = sorted(path.name for path in launcher.getOutputFiles())
+        result["commandFile"] = launcher.getCommandFile().name
+        result["tasks"] = {task.getName(): len(task.getProcessList()) for task in workflow.getTasks()}
+    except Exception:
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def generateVariantFromArgs(args:Tuple) -> dict:
+    return generateVariant(*args)
+
+def generateBatch(builders:List[Callable[[], Workflow]], outputFolder:Path, nbWorkers:int = None, taskSetupType:TaskSetupType = TaskSetupType.OPENMPI, chunkSize:int = 1) -> dict:
+    # Generate the artifacts of each workflow returned by the builders in its own folder, in a process pool.
+    # The builders must be picklable (module level functions, functools.partial, ...).
+    # nbWorkers = 1 generates the variants serially in the current process.
+    # Return the manifest of the batch, also written to outputFolder/manifest.json.
+    outputFolder = Path(outputFolder).resolve()
+    outputFolder.mkdir(parents=True, exist_ok=True)
+    args = [(i, builder, outputFolder, taskSetupType) for i, builder in enumerate(builders)]
+
+    start = time.perf_counter()
+    if nbWorkers == 1:
+        variants = [generateVariantFromArgs(arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=nbWorkers) as pool:
+            variants = list(pool.map(generateVariantFromArgs, args, chunksize=chunkSize))
+    elapsed = time.perf_counter() - start
+
+    manifest = {}
+    manifest["nbVariants"] = len(variants)
+    manifest["nbFailed"] = len([variant for variant in variants if "error" in variant])
+    manifest["nbWorkers"] = nbWorkers if nbWorkers is not None else os.cpu_count()
+    manifest["taskSetupType"] = taskSetupType.name
+    manifest["seconds"] = elapsed
+    manifest["variants"] = variants
+
+    with open(outputFolder / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    return manifest
+
+def measureBatchSpeedup(builders:List[Callable[[], Workflow]], outputFolder:Path, nbWorkers:int = None, taskSetupType:TaskSetupType = TaskSetupType.OPENMPI) -> dict:
+    # Generate the same batch serially and in parallel, in two sub folders
+    serial = generateBatch(builders, Path(outputFolder) / "serial", 1, taskSetupType)
+    parallel = generateBatch(builders, Path(outputFolder) / "parallel", nbWorkers, taskSetupType)
+
+    result = {}
+    result["serialSeconds"] = serial["seconds"]
+    result["parallelSeconds"] = parallel["seconds"]
+    result["nbWorkers"] = parallel["nbWorkers"]
+    result["speedup"] = serial["seconds"] / parallel["seconds"] if parallel["seconds"] > 0 else 0.0
+    return result
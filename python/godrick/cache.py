@@ -0,0 +1,188 @@
+from godrick.workflow import Workflow
+from godrick.task import TaskType, MPIPlacementPolicy, Process
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List
+
+import copy
+import hashlib
+import json
+import os
+
+def canonicalValue(value):
+    # JSON friendly view of the state of an object. Nested objects (ports, processes, ...) are only
+    # represented by their class, what matters for the generated files is hashed separately.
+    if isinstance(value, Enum):
+        return value.name
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): canonicalValue(value[key]) for key in sorted(value.keys(), key=str)}
+    if isinstance(value, (list, tuple)):
+        return [canonicalValue(item) for item in value]
+    return value.__class__.__name__
+
+def canonicalState(obj, skip:List[str] = []) -> dict:
+    return {key: canonicalValue(value) for key, value in sorted(vars(obj).items()) if key not in skip and not callable(value)}
+
+# Attributes of the communicators pointing to the processes or to other communicators, rebuilt when restoring
+LINKED_COMMUNICATOR_ATTRIBUTES = ["processes", "senderProcesses", "receiverProcesses", "connectedGate"]
+
+def captureProcessedState(workflow:Workflow) -> dict:
+    # What the launcher sets on the tasks and communicators of a workflow while generating its files:
+    # the hosts of the processes and global ranks of the tasks, and the settings of the communicators
+    state = {"tasks": {}, "communicators": {}}
+    for task in workflow.getTasks():
+        taskState = {"hostnames": [process.hostname for process in task.getProcessList()]}
+        if task.getTaskType() == TaskType.MPI:
+            taskState["ranks"] = (task.getGlobalStartRank(), task.getGlobalNbRank())
+        state["tasks"][task.getName()] = taskState
+    for comm in workflow.getCommunicators():
+        state["communicators"][comm.getName()] = copy.deepcopy({key: value for key, value in vars(comm).items() if key not in LINKED_COMMUNICATOR_ATTRIBUTES})
+    return state
+
+def restoreProcessedState(workflow:Workflow, state:dict) -> None:
+    # Inverse of captureProcessedState() on an identical workflow which was not processed yet.
+    # The processes still need to be forwarded to the communicators.
+    for task in workflow.getTasks():
+        taskState = state["tasks"][task.getName()]
+        task.clearProcesses()
+        for hostname in taskState["hostnames"]:
+            task.addProcess(Process(hostname, task))
+        if "ranks" in taskState:
+            task.setGlobalRanks(*taskState["ranks"])
+        task.markAsProcessed()
+    for comm in workflow.getCommunicators():
+        vars(comm).update(copy.deepcopy(state["communicators"][comm.getName()]))
+
+class CachedArtifacts():
+    def __init__(self, files:Dict[Path, bytes], commandFile:Path, processedState:dict = None) -> None:
+        self.files = files
+        self.commandFile = commandFile
+        self.processedState = processedState    # Result of captureProcessedState() and the ports allocated for the workflow
+        self.modes = {}
+        self.stats = {}
+        for path in files.keys():
+            self.recordStat(path)
+        self.size = sum(len(content) for content in files.values())
+
+    def recordStat(self, path:Path) -> None:
+        stat = path.stat()
+        self.modes[path] = stat.st_mode & 0o777
+        self.stats[path] = (stat.st_size, stat.st_mtime_ns)
+
+    def restoreFiles(self) -> int:
+        # Only write the files which are missing or were modified since they were generated
+        # Return the number of files written
+        nbWritten = 0
+        for path, content in self.files.items():
+            if path.is_file():
+                stat = path.stat()
+                if (stat.st_size, stat.st_mtime_ns) == self.stats[path]:
+                    continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+            os.chmod(path, self.modes[path])
+            self.recordStat(path)
+            nbWritten += 1
+        return nbWritten
+
+    def getFiles(self) -> List[Path]:
+        return list(self.files.keys())
+
+    def getCommandFile(self) -> Path:
+        return self.commandFile
+
+    def getProcessedState(self) -> dict:
+        return self.processedState
+
+class ArtifactCache():
+    # LRU cache of the files generated for a workflow, keyed by a hash of everything used to generate them
+    def __init__(self, maxBytes:int = 64 * 1024 * 1024) -> None:
+        if maxBytes <= 0:
+            raise ValueError(f"The size of the artifact cache must be positive, got {maxBytes}.")
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.nbHits = 0
+        self.nbMisses = 0
+        self.nbEvictions = 0
+
+    def computeKey(self, workflow:Workflow, folder:Path = None, options:dict = {}) -> str:
+        hasher = hashlib.sha256()
+        description = {}
+        description["workflow"] = workflow.getName()
+        description["cwd"] = str(Path.cwd())
+        description["folder"] = str(folder.resolve()) if folder is not None else None
+        description["options"] = canonicalValue(options)
+
+        tasks = []
+        for task in workflow.getTasks():
+            state = canonicalState(task, skip=["resources", "rankMap", "processes"])
+            if task.getTaskType() == TaskType.MPI and task.getPlacementPolicy() == MPIPlacementPolicy.USERDEFINED:
+                state["rankMap"] = canonicalValue(task.getRankMap())
+            tasks.append(state)
+
+            # The resources are hashed from the columns of their core table
+            resources = task.getResources()
+            if resources is not None:
+                coreTable = resources.getCoreTable()
+                hasher.update("\n".join(coreTable.hostnames).encode())
+                for column in [coreTable.nodeIds, coreTable.socketIds, coreTable.mainThreads, coreTable.hyperThreads, coreTable.numaIds]:
+                    hasher.update(column.tobytes())
+            hasher.update(b"|")
+        description["tasks"] = tasks
+        description["communicators"] = [canonicalState(comm, skip=["processes", "senderProcesses", "receiverProcesses"]) for comm in workflow.getCommunicators()]
+
+        hasher.update(json.dumps(description, sort_keys=True).encode())
+        return hasher.hexdigest()
+
+    def get(self, key:str) -> CachedArtifacts:
+        if key not in self.entries:
+            self.nbMisses += 1
+            return None
+        self.nbHits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key:str, files:List[Path], commandFile:Path, processedState:dict = None) -> None:
+        contents = {}
+        for path in files:
+            with open(path, "rb") as f:
+                contents[path.resolve()] = f.read()
+        entry = CachedArtifacts(contents, commandFile.resolve(), processedState)
+
+        # Artifacts larger than the whole cache are not kept
+        if entry.size > self.maxBytes:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key).size
+        self.entries[key] = entry
+        self.size += entry.size
+
+        while self.size > self.maxBytes:
+            (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted.size
+            self.nbEvictions += 1
+
+    def getSize(self) -> int:
+        return self.size
+
+    def getNbEntries(self) -> int:
+        return len(self.entries)
+
+    def getHitRate(self) -> float:
+        nbRequests = self.nbHits + self.nbMisses
+        return self.nbHits / nbRequests if nbRequests > 0 else 0.0
+
+    def getStatistics(self) -> dict:
+        result = {}
+        result["hits"] = self.nbHits
+        result["misses"] = self.nbMisses
+        result["evictions"] = self.nbEvictions
+        result["hitRate"] = self.getHitRate()
+        result["entries"] = len(self.entries)
+        result["bytes"] = self.size
+        return result
@@ -2,13 +2,17 @@ from __future__ import annotations
 
 from enum import Enum
 from godrick.port import InputPort, OutputPort
-from typing import List
+from typing import List, Dict
 from godrick.task import Process
+from godrick.redistribution import checkDecomposition, computeOverlapPlan, getGridSize
+from pathlib import Path
 import copy
+import json
 
 class CommunicatorTransportType(Enum):
     MPI = 0,
-    ZMQ = 1
+    ZMQ = 1,
+    SHM = 2
 
 class CommunicatorGateSideFlag(Enum):
     OPEN_SENDER = 0,
@@ -16,17 +20,31 @@ class CommunicatorGateSideFlag(Enum):
 
 class MPICommunicatorProtocol(Enum):
     BROADCAST = 0,
-    PARTIAL_BCAST_GATHER = 1
+    PARTIAL_BCAST_GATHER = 1,
+    BLOCK_REDISTRIBUTE = 2
 
 class ZMQCommunicatorProtocol(Enum):
     PUSH_PULL = 0,
     PUB_SUB = 1
 
+class CommunicatorSchemaMode(Enum):
+    ALWAYS = 0,         # The conduit schema is sent with every message
+    ON_CHANGE = 1       # The conduit schema is only sent when it changes, the receiver keeps the last one received
+
 class Communicator():
     def __init__(self, name:str, transport:CommunicatorTransportType) -> None:
         self.name = name
         self.transport = transport
         self.nbTokens = 0
+        self.schemaMode = CommunicatorSchemaMode.ALWAYS
+
+        # Batching policy of the runtime: messages pushed on the communicator are packed together and sent as one
+        # transfer when the batch holds batchMaxCount messages, batchMaxBytes bytes or when its first message waited
+        # batchMaxLinger seconds. A maximum of 1 message disables the batching, 0 disables the byte or time limit.
+        self.batchMaxCount = 1
+        self.batchMaxBytes = 0
+        self.batchMaxLinger = 0.0
+        self.traffic = 1.0      # Relative volume of data expected on the communicator, only used for placement
 
         self.configured = False
         self.processedByLauncher = False    # Flag used when creating the command line
@@ -37,6 +55,36 @@ class Communicator():
             raise ValueError("The number of token must be a positive integer.")
         self.nbTokens = nbTokens
 
+    def setSchemaMode(self, mode:CommunicatorSchemaMode) -> None:
+        self.schemaMode = mode
+
+    def getSchemaMode(self) -> CommunicatorSchemaMode:
+        return self.schemaMode
+
+    def setBatchingPolicy(self, maxCount:int = 1, maxBytes:int = 0, maxLinger:float = 0.0) -> None:
+        # The runtime has no timer: maxLinger is only checked when a message is pushed. A batch still pending after
+        # the last push is only sent when the port is flushed or closed, it waits forever if neither happens.
+        if maxCount < 1:
+            raise ValueError(f"The batches of the communicator {self.name} must hold at least 1 message, got {maxCount}.")
+        if maxBytes < 0:
+            raise ValueError(f"The maximum size of the batches of the communicator {self.name} must be a positive value, got {maxBytes}.")
+        if maxLinger < 0:
+            raise ValueError(f"The maximum linger time of the batches of the communicator {self.name} must be a positive value, got {maxLinger}.")
+        self.batchMaxCount = maxCount
+        self.batchMaxBytes = maxBytes
+        self.batchMaxLinger = maxLinger
+
+    def isBatching(self) -> bool:
+        return self.batchMaxCount > 1
+
+    def setTraffic(self, traffic:float) -> None:
+        if traffic < 0:
+            raise ValueError("The traffic of a communicator must be a positive value.")
+        self.traffic = traffic
+
+    def getTraffic(self) -> float:
+        return self.traffic
+
     def getName(self) -> str:
         return self.name
     
@@ -47,6 +95,8 @@ class Communicator():
         result = {}
         result["name"] = self.name
         result["nbTokens"] = self.nbTokens
+        result["schemaMode"] = self.schemaMode.name
+        result["batching"] = {"maxCount": self.batchMaxCount, "maxBytes": self.batchMaxBytes, "maxLinger": self.batchMaxLinger}
         result["transport"] = self.transport.name
         result["configured"] = self.configured
 
@@ -56,6 +106,11 @@ class Communicator():
 
         self.name = data["name"]
         self.nbTokens = data["nbTokens"]
+        self.schemaMode = CommunicatorSchemaMode[data.get("schemaMode", CommunicatorSchemaMode.ALWAYS.name)]
+        batching = data.get("batching", {})
+        self.batchMaxCount = batching.get("maxCount", 1)
+        self.batchMaxBytes = batching.get("maxBytes", 0)
+        self.batchMaxLinger = batching.get("maxLinger", 0.0)
         self.transport = CommunicatorTransportType[data["transport"]]
         self.configured = data["configured"]
 
@@ -197,14 +252,19 @@ class PairedCommunicator(Communicator):
         return True 
 
 class MPIPairedCommunicator(PairedCommunicator):
-    def __init__(self, id: str = "defaultMPIPairedCommunicator", protocol: MPICommunicatorProtocol = MPICommunicatorProtocol.BROADCAST) -> None:
+    def __init__(self, id: str = "defaultMPIPairedCommunicator", protocol: MPICommunicatorProtocol = MPICommunicatorProtocol.BROADCAST, schemaMode:CommunicatorSchemaMode = CommunicatorSchemaMode.ALWAYS) -> None:
         super().__init__(id, CommunicatorTransportType.MPI)
+        self.schemaMode = schemaMode
         self.inStartRank = -1
         self.inSize = -1
         self.outStartRank = -1
         self.outSize = -1
         self.protocol = protocol
 
+        # Block decomposition used by the BLOCK_REDISTRIBUTE protocol and the overlap plan computed by the launcher
+        self.redistribution = None
+        self.redistributionPlan = None
+
     def toDict(self) -> dict:
         result =  super().toDict()
         result["class"] = MPIPairedCommunicator.__name__
@@ -213,6 +273,9 @@ class MPIPairedCommunicator(PairedCommunicator):
         result["outStartRank"] = self.outStartRank
         result["outSize"] = self.outSize
         result["mpiprotocol"] = self.protocol.name
+        if self.redistribution is not None:
+            result["redistribution"] = dict(self.redistribution)
+            result["redistribution"]["plan"] = self.redistributionPlan
         return result
     
     def fromDict(self, data:dict, version:int) -> None:
@@ -225,6 +288,9 @@ class MPIPairedCommunicator(PairedCommunicator):
         self.outStartRank = data["outStartRank"]
         self.outSize = data["outSize"]
         self.protocol = MPICommunicatorProtocol[data["mpiprotocol"]]
+        if "redistribution" in data:
+            self.redistribution = {key: value for key, value in data["redistribution"].items() if key != "plan"}
+            self.redistributionPlan = data["redistribution"]["plan"]
     
     def setInputMPIRanks(self, start:int, size:int) -> None:
         self.inStartRank = start
@@ -237,6 +303,28 @@ class MPIPairedCommunicator(PairedCommunicator):
     def setMPIProtocol(self, protocol:MPICommunicatorProtocol) -> None:
         self.protocol = protocol
 
+    def setBlockRedistribution(self, extent:List[int], senderGrid:List[int], receiverGrid:List[int], field:str = "data") -> None:
+        # Redistribute the array field, of global size extent, from a block decomposition of the sender ranks over
+        # senderGrid to a block decomposition of the receiver ranks over receiverGrid. Each sender pushes the
+        # row-major array of its block, each receiver gets the array of its block. Switches to BLOCK_REDISTRIBUTE.
+        checkDecomposition(extent, senderGrid)
+        checkDecomposition(extent, receiverGrid)
+        self.redistribution = {"field": field, "extent": list(extent), "senderGrid": list(senderGrid), "receiverGrid": list(receiverGrid)}
+        self.redistributionPlan = None
+        self.protocol = MPICommunicatorProtocol.BLOCK_REDISTRIBUTE
+
+    def computeRedistributionPlan(self) -> None:
+        # Called by the launcher once the number of ranks of both tasks is known
+        if self.redistribution is None:
+            raise RuntimeError(f"The communicator {self.name} uses the protocol {MPICommunicatorProtocol.BLOCK_REDISTRIBUTE.name} but no block decomposition was declared.")
+        if self.isBatching():
+            raise RuntimeError(f"The communicator {self.name} uses the protocol {MPICommunicatorProtocol.BLOCK_REDISTRIBUTE.name} which sends the blocks of a single array and cannot batch messages.")
+        nbSenders = getGridSize(self.redistribution["senderGrid"])
+        nbReceivers = getGridSize(self.redistribution["receiverGrid"])
+        if nbSenders != self.outSize or nbReceivers != self.inSize:
+            raise RuntimeError(f"The decomposition of the communicator {self.name} expects {nbSenders} senders and {nbReceivers} receivers but the tasks have {self.outSize} and {self.inSize} ranks.")
+        self.redistributionPlan = computeOverlapPlan(self.redistribution["extent"], self.redistribution["senderGrid"], self.redistribution["receiverGrid"])
+
 class CommunicatorMessageFormat(Enum):
     MSG_FORMAT_CONDUIT = 0,
     MSG_FORMAT_JSON = 1,
@@ -344,13 +432,123 @@ class ZMQBindingSide(Enum):
     ZMQ_BIND_RECEIVER = 0,
     ZMQ_BIND_SENDER = 1
 
+class ZMQRankMapping(Enum):
+    BLOCK = 0,          # Contiguous ranks of the larger side share a rank of the smaller side
+    ROUND_ROBIN = 1     # Ranks of the larger side are dealt to the ranks of the smaller side in turn
+
+def getZMQRankPeers(nbBindingRanks:int, nbConnectingRanks:int, mapping:ZMQRankMapping) -> List[List[int]]:
+    # Binding ranks each connecting rank connects to. Every rank of the larger side is linked to a single
+    # rank of the smaller side, which then fans in (or out) over several sockets.
+    if nbBindingRanks < 1 or nbConnectingRanks < 1:
+        raise ValueError(f"A ZMQ communicator needs at least one rank on each side, got {nbBindingRanks} binding and {nbConnectingRanks} connecting ranks.")
+    nbLarge = max(nbBindingRanks, nbConnectingRanks)
+    nbSmall = min(nbBindingRanks, nbConnectingRanks)
+    peers = [[] for _ in range(nbConnectingRanks)]
+    for rank in range(nbLarge):
+        if mapping == ZMQRankMapping.BLOCK:
+            peer = rank * nbSmall // nbLarge
+        else:
+            peer = rank % nbSmall
+        if nbConnectingRanks >= nbBindingRanks:
+            peers[rank].append(peer)
+        else:
+            peers[peer].append(rank)
+    return peers
+
+# Port used by the ZMQ communicators configured without a port allocator, and first port of the default allocator range
+ZMQ_DEFAULT_PORT = 50000
+
+# Folder of the ipc:// sockets of the co-located ZMQ endpoints, on the nodes running the tasks
+ZMQ_IPC_FOLDER = "/tmp"
+
+# Maximum length of the path of a Unix domain socket (sun_path, without the terminating null byte)
+ZMQ_IPC_MAX_PATH = 107
+
+def checkZMQSchemaMode(name:str, schemaMode:CommunicatorSchemaMode, protocol:ZMQCommunicatorProtocol, nbSenders:int, nbReceivers:int) -> None:
+    # A receiver can only rebuild a message without schema if it received every message of its sender
+    if schemaMode != CommunicatorSchemaMode.ON_CHANGE:
+        return
+    if protocol == ZMQCommunicatorProtocol.PUB_SUB:
+        raise RuntimeError(f"The ZMQ communicator {name} cannot use the schema mode {schemaMode.name} with the protocol {protocol.name} because subscribers may miss the message holding the schema.")
+    if protocol == ZMQCommunicatorProtocol.PUSH_PULL and nbReceivers > nbSenders:
+        raise RuntimeError(f"The ZMQ communicator {name} cannot use the schema mode {schemaMode.name} with {nbSenders} senders and {nbReceivers} receivers because a sender distributes its messages between several receivers.")
+
+class ZMQPortAllocator():
+    # Hand out the ports bound by the ZMQ communicators, per host, from the range [firstPort, lastPort].
+    # Sharing an allocator between launchers, or saving it to a file and loading it for the next workflow,
+    # keeps workflows running on the same nodes from binding the same ports.
+    def __init__(self, firstPort:int = ZMQ_DEFAULT_PORT, lastPort:int = ZMQ_DEFAULT_PORT + 999) -> None:
+        if firstPort < 1 or lastPort > 65535 or firstPort > lastPort:
+            raise ValueError(f"Invalid ZMQ port range [{firstPort}, {lastPort}].")
+        self.firstPort = firstPort
+        self.lastPort = lastPort
+        self.assignments = {}   # Owner of each port in use, per hostname
+        self.nextPorts = {}     # Next port to try on each hostname
+
+    def allocatePort(self, hostname:str, owner:str) -> int:
+        ports = self.assignments.setdefault(hostname, {})
+        nbPorts = self.lastPort - self.firstPort + 1
+        start = self.nextPorts.get(hostname, self.firstPort)
+        for i in range(nbPorts):
+            port = self.firstPort + (start - self.firstPort + i) % nbPorts
+            if port not in ports:
+                ports[port] = owner
+                self.nextPorts[hostname] = port + 1 if port < self.lastPort else self.firstPort
+                return port
+        raise RuntimeError(f"No free port left between {self.firstPort} and {self.lastPort} on the host {hostname} for {owner}.")
+
+    def reservePort(self, hostname:str, port:int, owner:str) -> None:
+        # Record a port pinned by the user. The port may be outside of the range of the allocator.
+        ports = self.assignments.setdefault(hostname, {})
+        if port in ports and ports[port] != owner:
+            raise ValueError(f"The port {port} of the host {hostname} is already used by {ports[port]}, it cannot be used by {owner}.")
+        ports[port] = owner
+
+    def releasePort(self, hostname:str, port:int) -> None:
+        if hostname in self.assignments:
+            self.assignments[hostname].pop(port, None)
+
+    def isAvailable(self, hostname:str, port:int) -> bool:
+        return port not in self.assignments.get(hostname, {})
+
+    def getAssignments(self) -> Dict[str, Dict[int, str]]:
+        return self.assignments
+
+    def toDict(self) -> dict:
+        result = {}
+        result["firstPort"] = self.firstPort
+        result["lastPort"] = self.lastPort
+        result["assignments"] = {hostname: {str(port): owner for port, owner in ports.items()} for hostname, ports in self.assignments.items()}
+        return result
+
+    def fromDict(self, data:dict) -> None:
+        self.firstPort = data["firstPort"]
+        self.lastPort = data["lastPort"]
+        self.assignments = {hostname: {int(port): owner for port, owner in ports.items()} for hostname, ports in data["assignments"].items()}
+        self.nextPorts = {}
+
+    def saveToFile(self, path:Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.toDict(), f, indent=4)
+
+    def loadFromFile(self, path:Path) -> None:
+        with open(path, "r") as f:
+            self.fromDict(json.load(f))
+
 class ZMQPairedCommunicator(PairedCommunicator):
-    def __init__(self, id: str = "defaultZMQPairedCommunicator", protocol: ZMQCommunicatorProtocol = ZMQCommunicatorProtocol.PUB_SUB, bindingSide: ZMQBindingSide = ZMQBindingSide.ZMQ_BIND_SENDER, nonblocking: bool = False) -> None:
+    def __init__(self, id: str = "defaultZMQPairedCommunicator", protocol: ZMQCommunicatorProtocol = ZMQCommunicatorProtocol.PUB_SUB, bindingSide: ZMQBindingSide = ZMQBindingSide.ZMQ_BIND_SENDER, nonblocking: bool = False, port:int = None, useIPC:bool = True, mapping:ZMQRankMapping = ZMQRankMapping.BLOCK, schemaMode:CommunicatorSchemaMode = CommunicatorSchemaMode.ALWAYS) -> None:
         super().__init__(name=id, transport=CommunicatorTransportType.ZMQ)
+        self.schemaMode = schemaMode
         self.protocol = protocol
         self.protocolSettings = {}
         self.bindingSide = bindingSide
         self.nonblocking = nonblocking
+        self.mapping = mapping          # How the ranks are linked when a side has several processes
+        self.port = port                # Port pinned by the user for the first binding rank, None to let the launcher allocate them
+        self.allocatedPorts = []        # Ports given by the port allocator of the launcher, one per binding rank
+        self.boundPorts = []            # (hostname, port) recorded in the port allocator for this communicator
+        self.useIPC = useIPC            # Use an ipc:// socket instead of TCP when both processes share a host
+        self.ipcPath = None             # Path of the ipc:// socket, set by the launcher
 
     def toDict(self) -> dict:
         result =  super().toDict()
@@ -388,31 +586,62 @@ class ZMQPairedCommunicator(PairedCommunicator):
         
         if (self.protocol == ZMQCommunicatorProtocol.PUB_SUB or self.protocol == ZMQCommunicatorProtocol.PUSH_PULL):
 
-            if len(self.senderProcesses) == 1 and len(self.receiverProcesses) == 1:
+            if len(self.senderProcesses) > 0 and len(self.receiverProcesses) > 0:
                 return True
             
         return False
 
-    def configure(self):
-        ##if (self.openFlag == CommunicatorOpenFlag.OPEN_OUTPUT or  self.openFlag == CommunicatorOpenFlag.CLOSED ) and len(outputProcesses) != 1:
-        ##    raise RuntimeError("The ZMQ communicator {} has an output but only 1 process output is supported ({} detected.)", self.name, len(outputProcesses))
+    def getBindingProcesses(self) -> List[Process]:
+        if self.bindingSide == ZMQBindingSide.ZMQ_BIND_SENDER:
+            return self.senderProcesses
+        return self.receiverProcesses
+
+    def getConnectingProcesses(self) -> List[Process]:
+        if self.bindingSide == ZMQBindingSide.ZMQ_BIND_SENDER:
+            return self.receiverProcesses
+        return self.senderProcesses
+
+    def getBindingHostNames(self) -> List[str]:
+        # Host of each rank binding a socket, empty if the communicator is not configurable yet
+        if len(self.senderProcesses) == 0 or len(self.receiverProcesses) == 0:
+            return []
+        return [process.hostname for process in self.getBindingProcesses()]
+
+    def getBindingPort(self, rank:int = 0) -> int:
+        # Pinned ports are used as the first port of consecutive ports, one per binding rank
+        if self.port is not None:
+            return self.port + rank
+        if rank < len(self.allocatedPorts):
+            return self.allocatedPorts[rank]
+        return ZMQ_DEFAULT_PORT + rank
+
+    def isMultiProcess(self) -> bool:
+        return len(self.senderProcesses) > 1 or len(self.receiverProcesses) > 1
+
+    def setIPCPath(self, path:str) -> None:
+        if len(path) > ZMQ_IPC_MAX_PATH:
+            raise ValueError(f"The ipc path {path} of the communicator {self.name} is longer than the {ZMQ_IPC_MAX_PATH} characters allowed for a Unix socket.")
+        self.ipcPath = path
+
+    def isColocated(self) -> bool:
+        return len(self.senderProcesses) == 1 and len(self.receiverProcesses) == 1 and self.senderProcesses[0].hostname == self.receiverProcesses[0].hostname
 
-        ##if (self.openFlag == CommunicatorOpenFlag.OPEN_INPUT or  self.openFlag == CommunicatorOpenFlag.CLOSED ) and len(inputProcesses) != 1:
-        ##    raise RuntimeError("The ZMQ communicator {} has an input but only 1 process input is supported ({} detected.)", self.name, len(outputProcesses))
-        if len(self.receiverProcesses) != 1:
-            raise RuntimeError("The ZMQ communicator {} has an input but only 1 process input is supported ({} detected.)", self.name, len(self.receiverProcesses))
+    def configure(self):
+        if len(self.receiverProcesses) == 0:
+            raise RuntimeError(f"The ZMQ communicator {self.name} has no receiver process.")
             
-        if len(self.senderProcesses) != 1:
-            raise RuntimeError("The ZMQ communicator {} has an output but only 1 process output is supported ({} detected.)", self.name, len(self.senderProcesses))
+        if len(self.senderProcesses) == 0:
+            raise RuntimeError(f"The ZMQ communicator {self.name} has no sender process.")
+        checkZMQSchemaMode(self.name, self.schemaMode, self.protocol, len(self.senderProcesses), len(self.receiverProcesses))
         if self.protocol == ZMQCommunicatorProtocol.PUB_SUB:
-            self.protocolSettings["port"] = 50000
+            self.protocolSettings["port"] = self.getBindingPort()
             self.protocolSettings["bindingside"] = self.bindingSide.name
             if self.bindingSide == ZMQBindingSide.ZMQ_BIND_SENDER:
                 self.protocolSettings["addr"] = self.senderProcesses[0].hostname
             else:
                 self.protocolSettings["addr"] = self.receiverProcesses[0].hostname
         elif self.protocol == ZMQCommunicatorProtocol.PUSH_PULL:
-            self.protocolSettings["port"] = 50000
+            self.protocolSettings["port"] = self.getBindingPort()
             self.protocolSettings["bindingside"] = self.bindingSide.name
             if self.bindingSide == ZMQBindingSide.ZMQ_BIND_SENDER:
                 self.protocolSettings["addr"] = self.senderProcesses[0].hostname
@@ -420,15 +649,34 @@ class ZMQPairedCommunicator(PairedCommunicator):
                 self.protocolSettings["addr"] = self.receiverProcesses[0].hostname
         else:
             raise NotImplementedError("The requested ZMQ protocol is currently not supported.")
+
+        # Co-located processes skip the TCP stack through a Unix domain socket
+        if self.useIPC and self.ipcPath is not None and self.isColocated():
+            self.protocolSettings["endpoint"] = f"ipc://{self.ipcPath}"
+        else:
+            self.protocolSettings["endpoint"] = f"tcp://{self.protocolSettings['addr']}:{self.protocolSettings['port']}"
+
+        # With several processes on a side, each binding rank binds its own TCP endpoint and each
+        # connecting rank connects to the endpoints of its peers
+        for key in ["mapping", "endpoints", "peers"]:
+            self.protocolSettings.pop(key, None)
+        if self.isMultiProcess():
+            self.protocolSettings["mapping"] = self.mapping.name
+            self.protocolSettings["endpoints"] = [f"tcp://{process.hostname}:{self.getBindingPort(rank)}" for rank, process in enumerate(self.getBindingProcesses())]
+            self.protocolSettings["peers"] = getZMQRankPeers(len(self.getBindingProcesses()), len(self.getConnectingProcesses()), self.mapping)
     
 class ZMQGateCommunicator(GateCommunicator):
-    def __init__(self, name: str = "defaultZMQGateCommunicator", side: CommunicatorGateSideFlag = CommunicatorGateSideFlag.OPEN_SENDER, protocol: ZMQCommunicatorProtocol = ZMQCommunicatorProtocol.PUB_SUB, bindingSide: ZMQBindingSide = ZMQBindingSide.ZMQ_BIND_SENDER, format:CommunicatorMessageFormat = CommunicatorMessageFormat.MSG_FORMAT_CONDUIT, port:int = 50000, nonblocking: bool = False) -> None:
+    def __init__(self, name: str = "defaultZMQGateCommunicator", side: CommunicatorGateSideFlag = CommunicatorGateSideFlag.OPEN_SENDER, protocol: ZMQCommunicatorProtocol = ZMQCommunicatorProtocol.PUB_SUB, bindingSide: ZMQBindingSide = ZMQBindingSide.ZMQ_BIND_SENDER, format:CommunicatorMessageFormat = CommunicatorMessageFormat.MSG_FORMAT_CONDUIT, port:int = None, nonblocking: bool = False, mapping:ZMQRankMapping = ZMQRankMapping.BLOCK, schemaMode:CommunicatorSchemaMode = CommunicatorSchemaMode.ALWAYS) -> None:
         super().__init__(name, transport = CommunicatorTransportType.ZMQ, side = side, format=format)
+        self.schemaMode = schemaMode
         self.protocol = protocol
         self.protocolSettings = {}
         self.bindingSide = bindingSide
-        self.port = port
-        self.protocolSettings["port"] = self.port
+        self.mapping = mapping          # How the ranks of the two gates are linked when a side has several processes
+        self.port = port                # Port pinned by the user for the first binding rank, None to let the launcher allocate them
+        self.allocatedPorts = []        # Ports given by the port allocator of the launcher, one per binding rank
+        self.boundPorts = []            # (hostname, port) recorded in the port allocator for this gate
+        self.protocolSettings["port"] = self.getBindingPort()
         self.nonblocking = nonblocking
 
     def toDict(self) -> dict:
@@ -447,6 +695,8 @@ class ZMQGateCommunicator(GateCommunicator):
         self.protocolSettings = data["protocolSettings"]
         if "port" in self.protocolSettings:
             self.port = self.protocolSettings["port"]
+        if "mapping" in self.protocolSettings:
+            self.mapping = ZMQRankMapping[self.protocolSettings["mapping"]]
         self.bindingSide = ZMQBindingSide[data["protocolSettings"]["bindingside"]]
 
     
@@ -466,6 +716,12 @@ class ZMQGateCommunicator(GateCommunicator):
         
         if self.bindingSide != gate.bindingSide:
             raise ValueError(f"Trying to connect the ZMQ gate {self.getName()} and {gate.getName()} but they do not agree on which side should bind the socket.")
+
+        if self.mapping != gate.mapping:
+            raise ValueError(f"Trying to connect the ZMQ gate {self.getName()} and {gate.getName()} but they do not use the same rank mapping.")
+
+        if self.schemaMode != gate.schemaMode:
+            raise ValueError(f"Trying to connect the ZMQ gate {self.getName()} and {gate.getName()} but they do not use the same schema mode.")
         
     def isConfigurable(self) -> bool:
 
@@ -478,8 +734,8 @@ class ZMQGateCommunicator(GateCommunicator):
             # Check if this gate is the binding side and the list of processes is available. If yes, then it can always be configured. 
             # The list of processes is necessary to determine the address of the socket to bind.
             # If no, it is configurable only if the other gate is configurable.
-            if len(self.processes) != 1:
-                print(f"The ZMQ comm {self.name} has processes attached to it. Not configurable.")
+            if len(self.processes) == 0:
+                print(f"The ZMQ comm {self.name} has no processes attached to it. Not configurable.")
                 return False
             if self.isBindingSide():
                 print(f"The ZMQ comm {self.name} is the sending side. Configurable.")
@@ -501,20 +757,41 @@ class ZMQGateCommunicator(GateCommunicator):
     def isConfigured(self) -> bool:
         return self.configured
 
+    def getBindingHostNames(self) -> List[str]:
+        # Host of each rank of this gate binding a socket, empty if the sockets are bound by the other gate
+        # or if the gate is already configured
+        if self.configured or not self.isBindingSide():
+            return []
+        return [process.hostname for process in self.processes]
+
+    def getBindingPort(self, rank:int = 0) -> int:
+        # Pinned ports are used as the first port of consecutive ports, one per binding rank
+        if self.port is not None:
+            return self.port + rank
+        if rank < len(self.allocatedPorts):
+            return self.allocatedPorts[rank]
+        return ZMQ_DEFAULT_PORT + rank
+
     def configure(self):
         if self.configured:
             return
         if (self.protocol == ZMQCommunicatorProtocol.PUB_SUB or self.protocol == ZMQCommunicatorProtocol.PUSH_PULL):
-            if len(self.processes) != 1:
-                raise RuntimeError(f"Unable to configure the {self.name} ZMQGateCommunicator because the number of processes assigned to the task {self.taskName} is different than 1.")
+            if len(self.processes) == 0:
+                raise RuntimeError(f"Unable to configure the {self.name} ZMQGateCommunicator because no process is assigned to the task {self.taskName}.")
 
             # Check if this gate is the binding side and the list of processes is available. If yes, then it can always be configured by itself. 
             # The list of processes is necessary to determine the address of the socket to bind.
             # If no, it is configurable only if the other gate is configurable. This is because the binding side controls the address used by the communicator.
             if self.isBindingSide():
+                if self.protocol == ZMQCommunicatorProtocol.PUB_SUB:
+                    checkZMQSchemaMode(self.name, self.schemaMode, self.protocol, len(self.processes), len(self.processes))
                 self.protocolSettings["addr"] = self.processes[0].hostname
-                self.protocolSettings["port"] = self.port
+                self.protocolSettings["port"] = self.getBindingPort()
                 self.protocolSettings["bindingside"] = self.bindingSide.name
+
+                # Each rank binds its own endpoint, the other gate connects its ranks to them
+                self.protocolSettings["mapping"] = self.mapping.name
+                self.protocolSettings["endpoints"] = [f"tcp://{process.hostname}:{self.getBindingPort(rank)}" for rank, process in enumerate(self.processes)]
             else:
                 # Can't configure from this side, the other side needs to be configured first
                 if self.connectedGate is None:
@@ -526,7 +803,18 @@ class ZMQGateCommunicator(GateCommunicator):
                     self.connectedGate.configure()
 
                 # At this point, the other side is configured, we can get the address for the communicator.
-                self.protocolSettings = self.connectedGate.protocolSettings
+                # The ranks of this gate are linked to the binding ranks of the other gate.
+                self.protocolSettings = copy.deepcopy(self.connectedGate.protocolSettings)
+                if "endpoints" not in self.protocolSettings:
+                    # Gate loaded from the configuration of a workflow with a single binding rank
+                    self.protocolSettings["endpoints"] = [f"tcp://{self.protocolSettings['addr']}:{self.protocolSettings['port']}"]
+                self.protocolSettings["peers"] = getZMQRankPeers(len(self.protocolSettings["endpoints"]), len(self.processes), self.mapping)
+
+                # The number of ranks of both gates is only known here
+                if self.gateSide == CommunicatorGateSideFlag.OPEN_SENDER:
+                    checkZMQSchemaMode(self.name, self.schemaMode, self.protocol, len(self.processes), len(self.protocolSettings["endpoints"]))
+                else:
+                    checkZMQSchemaMode(self.name, self.schemaMode, self.protocol, len(self.protocolSettings["endpoints"]), len(self.processes))
 
         else:
             raise NotImplementedError(f"The configuration for the protocol {self.protocol.name} is not currently supported.")
@@ -542,6 +830,66 @@ class ZMQGateCommunicator(GateCommunicator):
     
         
 
+# Maximum length of a POSIX shared memory segment name, including the leading /
+SHM_MAX_SEGMENT_NAME = 255
+
+class SHMPairedCommunicator(PairedCommunicator):
+    # Single producer, single consumer ring of fixed size slots in a POSIX shared memory segment.
+    # Both tasks must run on the same host, with a single process each. Messages larger than a slot
+    # are split over consecutive slots.
+    def __init__(self, id: str = "defaultSHMPairedCommunicator", capacity:int = 16, slotSize:int = 1024 * 1024, nonblocking: bool = False) -> None:
+        super().__init__(name=id, transport=CommunicatorTransportType.SHM)
+        if capacity < 2:
+            raise ValueError(f"The ring of the SHM communicator {id} needs at least 2 slots, got {capacity}.")
+        if slotSize < 64 or slotSize % 8 != 0:
+            raise ValueError(f"The slots of the SHM communicator {id} must be a multiple of 8 bytes of at least 64 bytes, got {slotSize}.")
+        self.capacity = capacity
+        self.slotSize = slotSize
+        self.nonblocking = nonblocking
+        self.segmentName = None     # Name of the shared memory segment, set by the launcher
+        self.protocolSettings = {}
+
+    def toDict(self) -> dict:
+        result = super().toDict()
+        result["class"] = SHMPairedCommunicator.__name__
+        result["nonblocking"] = self.nonblocking
+        result["protocolSettings"] = self.protocolSettings
+        return result
+
+    def fromDict(self, data:dict, version:int) -> None:
+        if data["class"] != SHMPairedCommunicator.__name__:
+            raise RuntimeError(f"Trying to parse a json class {data['class']} from the class {SHMPairedCommunicator.__name__}.")
+        super().fromDict(data, version)
+
+        self.nonblocking = data["nonblocking"]
+        self.protocolSettings = data["protocolSettings"]
+        self.segmentName = self.protocolSettings["segment"]
+        self.capacity = self.protocolSettings["capacity"]
+        self.slotSize = self.protocolSettings["slotsize"]
+
+    def setSegmentName(self, name:str) -> None:
+        if not name.startswith("/") or "/" in name[1:] or len(name) > SHM_MAX_SEGMENT_NAME:
+            raise ValueError(f"Invalid shared memory segment name {name} for the communicator {self.name}: it must start with a single / and be at most {SHM_MAX_SEGMENT_NAME} characters.")
+        self.segmentName = name
+
+    def isColocated(self) -> bool:
+        return len(self.senderProcesses) == 1 and len(self.receiverProcesses) == 1 and self.senderProcesses[0].hostname == self.receiverProcesses[0].hostname
+
+    def isConfigurable(self) -> bool:
+        return self.isColocated()
+
+    def configure(self):
+        if len(self.senderProcesses) != 1 or len(self.receiverProcesses) != 1:
+            raise RuntimeError(f"The SHM communicator {self.name} needs a single process on each side ({len(self.senderProcesses)} senders and {len(self.receiverProcesses)} receivers detected).")
+        if not self.isColocated():
+            raise RuntimeError(f"The SHM communicator {self.name} connects the hosts {self.senderProcesses[0].hostname} and {self.receiverProcesses[0].hostname}, shared memory requires both tasks on the same host.")
+
+        self.protocolSettings["segment"] = self.segmentName if self.segmentName is not None else f"/godrick.{self.name}"
+        self.protocolSettings["capacity"] = self.capacity
+        self.protocolSettings["slotsize"] = self.slotSize
+        self.protocolSettings["host"] = self.senderProcesses[0].hostname
+        self.configured = True
+
 class CommunicatorFactory():
     def __init__(self) -> None:
             pass
@@ -551,6 +899,7 @@ class CommunicatorFactory():
         commConversion[MPIPairedCommunicator.__name__] = MPIPairedCommunicator()
         commConversion[ZMQPairedCommunicator.__name__] = ZMQPairedCommunicator()
         commConversion[ZMQGateCommunicator.__name__] = ZMQGateCommunicator()
+        commConversion[SHMPairedCommunicator.__name__] = SHMPairedCommunicator()
         
 
         if "class" not in data.keys():
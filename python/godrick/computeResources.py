@@ -1,22 +1,302 @@
 from __future__ import annotations
 from pathlib import Path
 from collections import Counter
-from typing import List
+from typing import List, Tuple, Iterator, Iterable
+from array import array
+from itertools import islice
+from enum import Enum
+import sys
+import re
+import os
+
+
+def parseCPUList(text:str) -> List[int]:
+    # Parse the kernel cpulist format used in sysfs, e.g. "0-3,8,10-11"
+    result = []
+    for item in text.strip().split(","):
+        if item == "":
+            continue
+        if "-" in item:
+            first, last = item.split("-")
+            result.extend(range(int(first), int(last) + 1))
+        else:
+            result.append(int(item))
+    return result
+
+
+def splitNodeList(nodelist:str) -> List[str]:
+    # Split a nodelist on the commas which are not inside brackets
+    result = []
+    depth = 0
+    start = 0
+    for i, c in enumerate(nodelist):
+        if c == "[":
+            depth += 1
+        elif c == "]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            result.append(nodelist[start:i])
+            start = i + 1
+    result.append(nodelist[start:])
+    return [item.strip() for item in result if item.strip() != ""]
+
+
+def expandHostPattern(pattern:str) -> Iterator[str]:
+    # Expand a single host pattern such as "nid[0001-0004,0010]" or "rack[1-2]-node[01-02]"
+    openIndex = pattern.find("[")
+    if openIndex < 0:
+        yield pattern
+        return
+    close = pattern.find("]", openIndex)
+    if close < 0:
+        raise ValueError(f"Unbalanced brackets in the host pattern {pattern}.")
+    prefix = pattern[:openIndex]
+    suffix = pattern[close+1:]
+    for item in pattern[openIndex+1:close].split(","):
+        if "-" in item:
+            first, last = item.split("-")
+            width = len(first)
+            values = (str(i).zfill(width) for i in range(int(first), int(last) + 1))
+        else:
+            values = [item]
+        for value in values:
+            for rest in expandHostPattern(suffix):
+                yield f"{prefix}{value}{rest}"
+
+
+def expandNodeList(nodelist:str) -> Iterator[str]:
+    # Lazily expand a compressed Slurm/PBS nodelist, e.g. "nid[0001-4096],login1"
+    for pattern in splitNodeList(nodelist):
+        yield from expandHostPattern(pattern)
+
+
+def expandRepeatCounts(counts:str) -> Iterator[int]:
+    # Lazily expand a SLURM_JOB_CPUS_PER_NODE style list, e.g. "36(x128),72"
+    for item in counts.split(","):
+        item = item.strip()
+        if item == "":
+            continue
+        match = re.fullmatch(r"([0-9]+)(?:\(x([0-9]+)\))?", item)
+        if match is None:
+            raise ValueError(f"Unable to parse the repeat count {item}.")
+        value = int(match.group(1))
+        repeat = int(match.group(2)) if match.group(2) is not None else 1
+        for _ in range(repeat):
+            yield value
+
+
+class ComputeDomain(Enum):
+    SOCKET = 0,
+    NUMA = 1
+
+
+class CoreRangeSet():
+    # Ordered list of core indexes stored as [start, end) intervals of consecutive indexes.
+    # The order of the cores is preserved, which keeps main threads and hyperthreads paired by position.
+    __slots__ = ("starts", "ends", "size")
+
+    def __init__(self, starts:array = None, ends:array = None, size:int = 0) -> None:
+        # When given, starts and ends must be consistent with size. Arrays are used over lists 
+        # to keep the sets out of the garbage collector when splitting large collections.
+        self.starts = array("i") if starts is None else starts
+        self.ends = array("i") if ends is None else ends
+        self.size = size
+
+    @classmethod
+    def fromRange(cls, start:int, count:int) -> CoreRangeSet:
+        result = cls()
+        if count > 0:
+            result.appendInterval(start, start + count)
+        return result
+
+    @classmethod
+    def fromList(cls, cores:Iterable[int]) -> CoreRangeSet:
+        result = cls()
+        for core in cores:
+            if result.size > 0 and result.ends[-1] == core:
+                result.ends[-1] += 1
+                result.size += 1
+            else:
+                result.appendInterval(core, core + 1)
+        return result
+
+    def appendInterval(self, start:int, end:int) -> None:
+        if end <= start:
+            return
+        if len(self.ends) > 0 and self.ends[-1] == start:
+            self.ends[-1] = end
+        else:
+            self.starts.append(start)
+            self.ends.append(end)
+        self.size += end - start
+
+    def getNbIntervals(self) -> int:
+        return len(self.starts)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self.starts, self.ends):
+            yield from range(start, end)
+
+    def toList(self) -> List[int]:
+        return list(self)
+
+    def findPositionsInRange(self, low:int, high:int) -> List[Tuple[int, int]]:
+        # Returns the [start, end) positions of the cores whose index is between low and high (included)
+        if len(self.starts) == 1:
+            first = max(self.starts[0], low)
+            last = min(self.ends[0], high + 1)
+            return [(first - self.starts[0], last - self.starts[0])] if first < last else []
+        result = []
+        position = 0
+        for start, end in zip(self.starts, self.ends):
+            first = max(start, low)
+            last = min(end, high + 1)
+            if first < last:
+                result.append((position + first - start, position + last - start))
+            position += end - start
+        return result
+
+    def selectPositions(self, positions:List[Tuple[int, int]]) -> CoreRangeSet:
+        # Returns the cores located at the given [start, end) positions
+        if len(self.starts) == 1 and len(positions) == 1 and positions[0][1] <= self.size:
+            first, last = positions[0]
+            return CoreRangeSet(array("i", (self.starts[0] + first,)), array("i", (self.starts[0] + last,)), last - first)
+        result = CoreRangeSet()
+        interval = 0
+        offset = 0  # Position of the first core of the current interval
+        for first, last in positions:
+            while interval < len(self.starts) and offset + self.ends[interval] - self.starts[interval] <= first:
+                offset += self.ends[interval] - self.starts[interval]
+                interval += 1
+            while first < last and interval < len(self.starts):
+                length = self.ends[interval] - self.starts[interval]
+                stop = min(last, offset + length)
+                result.appendInterval(self.starts[interval] + first - offset, self.starts[interval] + stop - offset)
+                first = stop
+                if first == offset + length:
+                    offset += length
+                    interval += 1
+            if first < last:
+                raise IndexError(f"Position {last - 1} out of range for a set of {self.size} cores.")
+        return result
+
+
+class CoreTable():
+    # Columnar inventory of the cores of a set of resources. Each row is a core, ordered by node then socket.
+    # Hostnames are stored once per node and referenced by the node id column.
+    def __init__(self) -> None:
+        self.hostnames = []
+        self.nodeIds = array("i")
+        self.socketIds = array("i")
+        self.mainThreads = array("i")
+        self.hyperThreads = array("i")  # -1 when the core doesn't have a hyperthread
+        self.numaIds = array("i")       # -1 when the NUMA domain is unknown
+        self.nodeOffsets = array("i")   # First row of each node
+        self.socketOffsets = array("i") # First row of each socket
+        self.socketNodeIds = array("i") # Node id of each socket
+
+    def addNode(self, hostname:str) -> int:
+        self.hostnames.append(sys.intern(hostname))
+        self.nodeOffsets.append(len(self.mainThreads))
+        return len(self.hostnames) - 1
+
+    def addSocket(self, mainThreads:list, hyperThreads:list = [], numaDomains:list = []) -> int:
+        if len(self.hostnames) == 0:
+            raise RuntimeError("Trying to add a socket to a CoreTable without any node declared.")
+        nbCores = len(mainThreads)
+        if len(hyperThreads) > 0 and len(hyperThreads) < nbCores:
+            raise ValueError(f"A socket declares {nbCores} cores but only {len(hyperThreads)} hyperthreads.")
+
+        nodeId = len(self.hostnames) - 1
+        socketId = len(self.socketOffsets)
+        self.socketOffsets.append(len(self.mainThreads))
+        self.socketNodeIds.append(nodeId)
+        self.nodeIds.extend(array("i", [nodeId]) * nbCores)
+        self.socketIds.extend(array("i", [socketId]) * nbCores)
+        self.mainThreads.extend(mainThreads)
+        if len(hyperThreads) > 0:
+            self.hyperThreads.extend(islice(hyperThreads, nbCores))
+        else:
+            self.hyperThreads.extend(array("i", [-1]) * nbCores)
+        if len(numaDomains) > 0:
+            self.numaIds.extend(islice(numaDomains, nbCores))
+        else:
+            self.numaIds.extend(array("i", [-1]) * nbCores)
+        return socketId
+
+    def getNbCores(self) -> int:
+        return len(self.mainThreads)
+
+    def getNbNodes(self) -> int:
+        return len(self.hostnames)
+
+    def getNbSockets(self) -> int:
+        return len(self.socketOffsets)
+
+    def getHostName(self, index:int) -> str:
+        return self.hostnames[self.nodeIds[index]]
+
+    def hasHyperthread(self, index:int) -> bool:
+        return self.hyperThreads[index] >= 0
+
+    def _toRanges(self, offsets:array) -> List[Tuple[int, int]]:
+        ends = list(offsets[1:])
+        ends.append(len(self.mainThreads))
+        return list(zip(offsets, ends))
+
+    def getNodeRanges(self) -> List[Tuple[int, int]]:
+        # Returns the [start, end) rows of each node
+        return self._toRanges(self.nodeOffsets)
+
+    def getSocketRanges(self) -> List[Tuple[int, int]]:
+        # Returns the [start, end) rows of each socket
+        return self._toRanges(self.socketOffsets)
+
+    def getListOfCores(self, start:int = 0, end:int = None) -> List[dict]:
+        if end is None:
+            end = len(self.mainThreads)
+        result = []
+        for i in range(start, end):
+            core = {}
+            core["hostname"] = self.hostnames[self.nodeIds[i]]
+            core["mainthread"] = self.mainThreads[i]
+            if self.hyperThreads[i] >= 0:
+                core["hyperthread"] = self.hyperThreads[i]
+            result.append(core)
+        return result
+
+    def getListOfCoresPerSocket(self) -> List[List[dict]]:
+        return [self.getListOfCores(start, end) for start, end in self.getSocketRanges()]
+
+    def getListOfCoresPerNode(self) -> List[List[dict]]:
+        return [self.getListOfCores(start, end) for start, end in self.getNodeRanges()]
 
 
 class ComputeResources():
     def __init__(self) -> None:
         pass
 
-    def getListOfCores(self) -> List[dict]:
+    def fillCoreTable(self, table:CoreTable) -> None:
         raise NotImplementedError(f"Function not implemented by class {__class__}.")
 
+    def getCoreTable(self) -> CoreTable:
+        table = CoreTable()
+        self.fillCoreTable(table)
+        return table
+
+    def getListOfCores(self) -> List[dict]:
+        return self.getCoreTable().getListOfCores()
+
 class ComputeSocket(ComputeResources):
-    def __init__(self) -> None:
-        self.mainThreads = []
-        self.hyperThreads = []
-        self.hostname = ""
-        self.hasHT = False
+    def __init__(self, hostname:str = "", cores:CoreRangeSet = None, hts:CoreRangeSet = None) -> None:
+        self.cores = CoreRangeSet() if cores is None else cores
+        self.hts = CoreRangeSet() if hts is None else hts
+        self.hostname = hostname
+        self.hasHT = len(self.hts) > 0
+        self.numaDomains = []   # NUMA domain of each main thread, empty if unknown
     
     def initAutomatic(self, hostname:str, nbCores:int = 1, offsetCore:int=0, useHT:bool=True, offsetHT:int=0):
         if nbCores < 1:
@@ -24,26 +304,49 @@ class ComputeSocket(ComputeResources):
         if offsetCore < 0:
             raise ValueError("Number of cores in a socket must be equal or greater than 0.")
         self.hostname = hostname
-        self.mainThreads = list(range(offsetCore, offsetCore + nbCores))
+        self.cores = CoreRangeSet.fromRange(offsetCore, nbCores)
         if useHT:
-            if offsetHT <= self.mainThreads[-1]:
+            if offsetHT <= offsetCore + nbCores - 1:
                 raise ValueError("HT enable but the offset is inferior to the last regular core.")
-            self.hyperThreads = list(range(offsetHT, offsetHT + nbCores))
+            self.hts = CoreRangeSet.fromRange(offsetHT, nbCores)
             self.hasHT = True
 
-    def initManual(self, hostname:str, mainThreads:list, ht:list = []):
+    # The cores are stored as ranges, mainThreads and hyperThreads are read-only snapshots:
+    # assign a new list to change them, in-place changes are rejected by the tuple
+    @property
+    def mainThreads(self) -> Tuple[int, ...]:
+        return tuple(self.cores)
+
+    @mainThreads.setter
+    def mainThreads(self, cores:list) -> None:
+        self.cores = CoreRangeSet.fromList(cores)
+
+    @property
+    def hyperThreads(self) -> Tuple[int, ...]:
+        return tuple(self.hts)
+
+    @hyperThreads.setter
+    def hyperThreads(self, cores:list) -> None:
+        self.hts = CoreRangeSet.fromList(cores)
+
+    def initManual(self, hostname:str, mainThreads:list, ht:list = [], numaDomains:list = []):
+        if len(numaDomains) > 0 and len(numaDomains) != len(mainThreads):
+            raise ValueError(f"Received {len(numaDomains)} NUMA domains for {len(mainThreads)} cores.")
         self.mainThreads = mainThreads
         self.hyperThreads = ht
         self.hostname = hostname
-        if len(self.hyperThreads) > 0:
+        self.numaDomains = numaDomains
+        if len(self.hts) > 0:
             self.hasHT = True
 
     def toDict(self) -> dict:
         result = {}
-        result["mainthreads"] = self.mainThreads
-        result["hyperthreads"] = self.hyperThreads
+        result["mainthreads"] = self.cores.toList()
+        result["hyperthreads"] = self.hts.toList()
         result["hostname"] = self.hostname
         result["hasht"] = self.hasHT
+        if len(self.numaDomains) > 0:
+            result["numa"] = self.numaDomains
 
         return result
     
@@ -51,39 +354,77 @@ class ComputeSocket(ComputeResources):
         return self.hasHT
     
     def getCoresIndexes(self) -> list:
-        return self.mainThreads
+        return self.cores.toList()
     
     def getHTIndexes(self) -> list:
-        return self.hyperThreads
+        return self.hts.toList()
+
+    def getNUMAIndexes(self) -> list:
+        return self.numaDomains
     
     def getHostName(self) -> str:
         return self.hostname
     
-    def getListOfCores(self) -> List[dict]:
+    def fillCoreTable(self, table:CoreTable) -> None:
+        # A socket alone still needs a node entry to hold its hostname
+        table.addNode(self.hostname)
+        table.addSocket(self.cores, self.hts if self.hasHT else [], self.numaDomains)
+    
+    def selectCoresByIndexRange(self, startIndex:int, endIndex:int) -> ComputeSocket:
+        # Select the cores with an index between startIndex and endIndex (included) along with their hyperthreads
+        positions = self.cores.findPositionsInRange(startIndex, endIndex)
+        socket = ComputeSocket(self.hostname, self.cores.selectPositions(positions), self.hts.selectPositions(positions) if self.hasHT else None)
+        socket.hasHT = self.hasHT
+        if len(self.numaDomains) > 0:
+            for first, last in positions:
+                socket.numaDomains.extend(self.numaDomains[first:last])
+        return socket
+
+    def splitCoresByIndexRanges(self, intervals:List[List[int]]) -> List[ComputeSocket]:
+        # Returns one sub socket per [startIndex, endIndex] interval
+        if len(self.cores.starts) != 1 or len(self.numaDomains) > 0 or (self.hasHT and len(self.hts.starts) != 1):
+            return [self.selectCoresByIndexRange(interval[0], interval[1]) for interval in intervals]
+
+        # Common case of a socket made of a single range of cores (and hyperthreads): direct arithmetic
+        coreStart = self.cores.starts[0]
+        coreEnd = self.cores.ends[0]
+        htOffset = self.hts.starts[0] - coreStart if self.hasHT else 0
         result = []
-        for i in range(0, len(self.mainThreads)):
-            core = {}
-            core["hostname"] = self.hostname
-            core["mainthread"] = self.mainThreads[i]
-            if self.hasHT:
-                core["hyperthread"] = self.hyperThreads[i]
-            result.append(core)
+        for startIndex, endIndex in intervals:
+            first = startIndex if startIndex > coreStart else coreStart
+            last = endIndex + 1 if endIndex + 1 < coreEnd else coreEnd
+            if first >= last:
+                result.append(ComputeSocket(self.hostname))
+                continue
+            hts = CoreRangeSet(array("i", (first + htOffset,)), array("i", (last + htOffset,)), last - first) if self.hasHT else None
+            result.append(ComputeSocket(self.hostname, CoreRangeSet(array("i", (first,)), array("i", (last,)), last - first), hts))
         return result
-    
-    def selectCoresByIndexRange(self, startIndex:int, endIndex:int) -> List[ComputeSocket]:
 
-        socket = ComputeSocket()
+    def selectCoresByPositions(self, positions:List[int]) -> ComputeSocket:
+        # Select the cores located at the given sorted positions in the socket along with their hyperthreads
+        runs = []
+        for position in positions:
+            if len(runs) > 0 and runs[-1][1] == position:
+                runs[-1][1] += 1
+            else:
+                runs.append([position, position + 1])
+        socket = ComputeSocket(self.hostname, self.cores.selectPositions(runs), self.hts.selectPositions(runs) if self.hasHT else None)
         socket.hasHT = self.hasHT
-        socket.hostname = self.getHostName()
-        for i, core in enumerate(self.mainThreads):
-            if core >= startIndex and core <= endIndex:
-                socket.mainThreads.append(self.mainThreads[i]) # == core
-            if self.hasHT:
-                socket.hyperThreads.append(self.hyperThreads[i])
+        if len(self.numaDomains) > 0:
+            socket.numaDomains = [self.numaDomains[position] for position in positions]
         return socket
 
+    def getDomainPositions(self, domain:ComputeDomain) -> List[List[int]]:
+        # Returns the positions of the cores grouped by domain. Without NUMA information, the socket is the domain.
+        if domain == ComputeDomain.NUMA and len(self.numaDomains) > 0:
+            groups = {}
+            for position, numa in enumerate(self.numaDomains):
+                groups.setdefault(numa, []).append(position)
+            return list(groups.values())
+        return [list(range(len(self.cores)))]
+
     def getNbCores(self) -> int:
-        return len(self.mainThreads)
+        return len(self.cores)
 
 class ComputeNode(ComputeResources):
     def __init__(self, hostname:str="") -> None:
@@ -103,6 +444,62 @@ class ComputeNode(ComputeResources):
                                  useHT=useHT, 
                                  offsetHT=i*coresPerSocket*htMultiplier + coresPerSocket)
             self.sockets.append(socket)
+
+    def initFromSysfs(self, hostname:str, useHT:bool=True, sysfsRoot:Path=Path("/sys/devices/system")):
+        # Build the sockets from the topology exposed by the kernel. sysfsRoot can point to a captured copy
+        # of /sys/devices/system containing the cpu/ and node/ folders.
+        sysfsRoot = Path(sysfsRoot)
+        cpuRoot = sysfsRoot / "cpu"
+        if not cpuRoot.is_dir():
+            raise FileNotFoundError(f"Unable to find the cpu topology folder {cpuRoot}.")
+
+        onlineFile = cpuRoot / "online"
+        if onlineFile.is_file():
+            cpus = parseCPUList(onlineFile.read_text())
+        else:
+            cpus = sorted(int(entry.name[3:]) for entry in cpuRoot.iterdir() if re.fullmatch(r"cpu[0-9]+", entry.name))
+
+        onlineCpus = set(cpus)
+
+        # NUMA domain of each cpu, if the node folder is available
+        cpuToNuma = {}
+        nodeRoot = sysfsRoot / "node"
+        if nodeRoot.is_dir():
+            for entry in nodeRoot.iterdir():
+                if re.fullmatch(r"node[0-9]+", entry.name) and (entry / "cpulist").is_file():
+                    for cpu in parseCPUList((entry / "cpulist").read_text()):
+                        cpuToNuma[cpu] = int(entry.name[4:])
+
+        # Group the hardware threads by package, keeping the first sibling as the main thread
+        packages = {}
+        for cpu in cpus:
+            topology = cpuRoot / f"cpu{cpu}" / "topology"
+            if not topology.is_dir():
+                continue
+            packageId = int((topology / "physical_package_id").read_text())
+            siblings = parseCPUList((topology / "thread_siblings_list").read_text())
+            siblings = [sibling for sibling in siblings if sibling in onlineCpus] if len(siblings) > 0 else [cpu]
+            if siblings[0] != cpu:
+                continue
+            packages.setdefault(packageId, []).append(siblings)
+
+        if len(packages) == 0:
+            raise RuntimeError(f"No cpu topology found in {cpuRoot}.")
+
+        self.hostname = hostname
+        self.sockets = []
+        for packageId in sorted(packages.keys()):
+            cores = sorted(packages[packageId])
+            mainThreads = [core[0] for core in cores]
+            ht = []
+            if useHT and all(len(core) > 1 for core in cores):
+                ht = [core[1] for core in cores]
+            numaDomains = []
+            if all(core in cpuToNuma for core in mainThreads):
+                numaDomains = [cpuToNuma[core] for core in mainThreads]
+            socket = ComputeSocket()
+            socket.initManual(hostname=self.hostname, mainThreads=mainThreads, ht=ht, numaDomains=numaDomains)
+            self.sockets.append(socket)
             
     def getNbSockets(self):
         return len(self.sockets)
@@ -124,17 +521,13 @@ class ComputeNode(ComputeResources):
             result["sockets"].append(socket.toDict())
         return result
     
-    def getListOfCores(self) -> List[dict]:
-        result = []
+    def fillCoreTable(self, table:CoreTable) -> None:
+        table.addNode(self.hostname)
         for socket in self.sockets:
-            result.extend(socket.getListOfCores())
-        return result
+            table.addSocket(socket.cores, socket.hts if socket.hasHT else [], socket.numaDomains)
     
-    def getListOfCoresPerSocket(self) -> List[dict]:
-        result = []
-        for socket in self.sockets:
-            result.append(socket.getListOfCores())
-        return result
+    def getListOfCoresPerSocket(self) -> List[List[dict]]:
+        return self.getCoreTable().getListOfCoresPerSocket()
 
     
     def getNbCores(self) -> int:
@@ -144,12 +537,16 @@ class ComputeNode(ComputeResources):
         return result
     
     def selectCoresByIndexRange(self, startIndex:int, endIndex:int) -> ComputeNode:
-        subNode = ComputeNode(self.hostname)
+        return self.splitCoresByIndexRanges([[startIndex, endIndex]])[0]
+
+    def splitCoresByIndexRanges(self, intervals:List[List[int]]) -> List[ComputeNode]:
+        # Returns one sub node per [startIndex, endIndex] interval
+        subNodes = [ComputeNode(self.hostname) for _ in intervals]
         for socket in self.sockets:
-            subSocket = socket.selectCoresByIndexRange(startIndex=startIndex, endIndex=endIndex)
-            if subSocket.getNbCores() > 0:
-                subNode.sockets.append(subSocket)
-        return subNode
+            for subSocket, subNode in zip(socket.splitCoresByIndexRanges(intervals), subNodes):
+                if len(subSocket.cores) > 0:
+                    subNode.sockets.append(subSocket)
+        return subNodes
             
 class ComputeCollection(ComputeResources):
     def __init__(self, name:str="defaultCluster") -> None:
@@ -160,18 +557,82 @@ class ComputeCollection(ComputeResources):
         if len(self.nodes) > 0:
             raise RuntimeError(f"Cannot initialize the ComputeCollection {self.name} from a hostfile, the collection already has nodes attached to it.")
         with open(file, "r") as f:
-            lines = list(filter(None, f.read().splitlines())) # splitlines to remove the \n, filter to remove the empty lines
-            machines = Counter(lines)
-            for hostname, nbCores in machines.items():
-                node = ComputeNode()
-                node.initAutomatic(hostname=hostname, nbSockets=1, coresPerSocket=nbCores, useHT=addHT)
-                self.nodes.append(node)
+            machines = Counter(filter(None, (line.strip() for line in f))) # strip to remove the \n, filter to remove the empty lines
+            self.initFromSlots(machines.items(), addHT)
+
+    def initFromSlots(self, slots:Iterable[Tuple[str, int]], addHT:bool=True) -> None:
+        # Create one single socket node per hostname from (hostname, nbCores) pairs. 
+        # Repeated hostnames are merged by summing their cores.
+        if len(self.nodes) > 0:
+            raise RuntimeError(f"Cannot initialize the ComputeCollection {self.name} from a list of slots, the collection already has nodes attached to it.")
+        machines = {}
+        for hostname, nbCores in slots:
+            if nbCores < 1:
+                raise ValueError(f"The host {hostname} must have at least 1 core (received {nbCores}).")
+            machines[hostname] = machines.get(hostname, 0) + nbCores
+        for hostname, nbCores in machines.items():
+            node = ComputeNode()
+            node.initAutomatic(hostname=hostname, nbSockets=1, coresPerSocket=nbCores, useHT=addHT)
+            self.nodes.append(node)
+
+    def initFromNodeList(self, nodelist:str, coresPerNode, addHT:bool=True) -> None:
+        # coresPerNode is either a single core count for all the nodes or a 
+        # SLURM_JOB_CPUS_PER_NODE style string such as "36(x128),72(x2)".
+        hostnames = expandNodeList(nodelist)
+        if isinstance(coresPerNode, int):
+            self.initFromSlots(((hostname, coresPerNode) for hostname in hostnames), addHT)
+            return
+
+        counts = expandRepeatCounts(coresPerNode)
+        def pairs():
+            for hostname in hostnames:
+                nbCores = next(counts, None)
+                if nbCores is None:
+                    raise ValueError(f"The nodelist {nodelist} has more nodes than core counts in {coresPerNode}.")
+                yield hostname, nbCores
+            if next(counts, None) is not None:
+                raise ValueError(f"The nodelist {nodelist} has fewer nodes than core counts in {coresPerNode}.")
+        self.initFromSlots(pairs(), addHT)
+
+    def initFromSlurmEnvironment(self, addHT:bool=True, environment:dict=None) -> None:
+        if environment is None:
+            environment = os.environ
+        nodelist = environment.get("SLURM_JOB_NODELIST", environment.get("SLURM_NODELIST"))
+        if nodelist is None:
+            raise RuntimeError("Unable to find SLURM_JOB_NODELIST in the environment.")
+        counts = environment.get("SLURM_JOB_CPUS_PER_NODE")
+        if counts is None:
+            raise RuntimeError("Unable to find SLURM_JOB_CPUS_PER_NODE in the environment.")
+        self.initFromNodeList(nodelist, counts, addHT)
+
+    def initFromOpenMPIHostFile(self, file:Path, addHT:bool=True) -> None:
+        # Open MPI hostfile format: "<hostname> slots=<N>" per line, comments starting with #.
+        # A host without slots counts as 1 slot.
+        def pairs():
+            with open(file, "r") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line == "":
+                        continue
+                    fields = line.split()
+                    nbCores = 1
+                    for field in fields[1:]:
+                        if field.startswith("slots="):
+                            nbCores = int(field[len("slots="):])
+                    yield fields[0], nbCores
+        self.initFromSlots(pairs(), addHT)
     
-    def initFromLocalhost(self, useHT:bool=True) -> None:
+    def initFromLocalhost(self, useHT:bool=True, sysfsRoot:Path=Path("/sys/devices/system")) -> None:
         if len(self.nodes) > 0:
             raise RuntimeError(f"Cannot initialize the ComputeCollection {self.name} from a hostfile, the collection already has nodes attached to it.")
         node = ComputeNode()
 
+        # Use the real topology when the kernel exposes it, otherwise assume a single socket
+        if (Path(sysfsRoot) / "cpu").is_dir():
+            node.initFromSysfs(hostname="localhost", useHT=useHT, sysfsRoot=sysfsRoot)
+            self.nodes.append(node)
+            return
+
         import psutil
         nbPhysicalCores = psutil.cpu_count(logical=False)
         nbLogicalCores = psutil.cpu_count(logical=True)
@@ -220,17 +681,121 @@ class ComputeCollection(ComputeResources):
 
         result = []
         for interval in intervals:
-            cluster = ComputeCollection(name=f"{self.name}-c{interval[0]}-c{interval[1]}")
-            nodes = []
-            for node in self.nodes:
-                subNode = node.selectCoresByIndexRange(interval[0], interval[1])
+            result.append(ComputeCollection(name=f"{self.name}-c{interval[0]}-c{interval[1]}"))
+
+        # Single pass over the nodes, each node being cut in all the intervals at once
+        for node in self.nodes:
+            subNodes = node.splitCoresByIndexRanges(intervals)
+            for interval, subNode, cluster in zip(intervals, subNodes, result):
                 if subNode.getNbCores() == 0:
-                    raise RuntimeError(f"Request cores from {interval[0]} to {interval[1]} on node {subNode.getName()}, but no cores found for these indexes.")
-                nodes.append(subNode)
-            cluster.nodes = nodes
-            result.append(cluster)
+                    raise RuntimeError(f"Request cores from {interval[0]} to {interval[1]} on node {subNode.getHostName()}, but no cores found for these indexes.")
+                cluster.nodes.append(subNode)
         return result
 
+    def listDomains(self, domain:ComputeDomain = ComputeDomain.SOCKET) -> List[list]:
+        # Returns the domains of the collection as [node index, socket index, positions of the cores in the socket, number of cores already taken]
+        domains = []
+        for nodeIndex, node in enumerate(self.nodes):
+            for socketIndex, socket in enumerate(node.sockets):
+                for positions in socket.getDomainPositions(domain):
+                    domains.append([nodeIndex, socketIndex, positions, 0])
+        return domains
+
+    def createPartition(self, name:str, allocation:List[Tuple[list, int, int]]) -> ComputeCollection:
+        # Create a collection from a list of (domain, first, last) where [first, last) are indexes in the positions of the domain
+        # Gather the selected positions per socket while keeping the order of the nodes and sockets
+        selection = {}
+        for entry, first, last in allocation:
+            selection.setdefault((entry[0], entry[1]), []).extend(entry[2][first:last])
+
+        cluster = ComputeCollection(name=name)
+        subNodes = {}
+        for nodeIndex, socketIndex in sorted(selection.keys()):
+            if nodeIndex not in subNodes:
+                subNodes[nodeIndex] = ComputeNode(self.nodes[nodeIndex].hostname)
+                cluster.nodes.append(subNodes[nodeIndex])
+            socket = self.nodes[nodeIndex].sockets[socketIndex]
+            subNodes[nodeIndex].sockets.append(socket.selectCoresByPositions(sorted(selection[(nodeIndex, socketIndex)])))
+        return cluster
+
+    def splitByCoreDemands(self, demands:List[int], domain:ComputeDomain = ComputeDomain.SOCKET) -> Tuple[List[ComputeCollection], int]:
+        # Create one partition per core demand, keeping each partition within a single socket or NUMA domain
+        # whenever possible. Demands are placed from the largest to the smallest in the domain with the least
+        # free cores able to host them. A demand larger than any free domain takes the largest free domains first.
+        # Returns the partitions in the order of the demands and the number of partitions spanning several domains.
+        if len(demands) == 0:
+            raise ValueError("List of core demands is empty.")
+        for demand in demands:
+            if demand < 1:
+                raise ValueError("Core demand has to be equal or greater than 1.")
+        if sum(demands) > self.getCoreTable().getNbCores():
+            raise ValueError(f"Requested {sum(demands)} cores from the cluster {self.name}, but only {self.getCoreTable().getNbCores()} are available.")
+
+        domains = self.listDomains(domain)
+
+        def freeCores(entry:list) -> int:
+            return len(entry[2]) - entry[3]
+
+        allocations = [None] * len(demands)
+        order = sorted(range(len(demands)), key=lambda i: demands[i], reverse=True)
+        for taskIndex in order:
+            remaining = demands[taskIndex]
+            allocation = []     # List of (domain, first taken, last taken)
+            while remaining > 0:
+                candidates = [entry for entry in domains if freeCores(entry) >= remaining]
+                if len(candidates) > 0:
+                    entry = min(candidates, key=freeCores)
+                    count = remaining
+                else:
+                    entry = max(domains, key=freeCores)
+                    count = freeCores(entry)
+                allocation.append((entry, entry[3], entry[3] + count))
+                entry[3] += count
+                remaining -= count
+            allocations[taskIndex] = allocation
+
+        partitions = []
+        nbSpanning = 0
+        for taskIndex, allocation in enumerate(allocations):
+            if len(allocation) > 1:
+                nbSpanning += 1
+            partitions.append(self.createPartition(f"{self.name}-p{taskIndex}", allocation))
+
+        return partitions, nbSpanning
+
+    def excludeHosts(self, hostnames:Iterable[str], name:str = None) -> ComputeCollection:
+        # Create a collection with the nodes of this collection which are not in hostnames
+        hostnames = set(hostnames)
+        cluster = ComputeCollection(name=name if name is not None else self.name)
+        cluster.nodes = [node for node in self.nodes if node.hostname not in hostnames]
+        return cluster
+
+    def excludeCores(self, cores:Iterable[Tuple[str, int]], name:str = None) -> ComputeCollection:
+        # Create a collection without the given (hostname, main thread) cores, along with their hyperthreads
+        cores = set(cores)
+        cluster = ComputeCollection(name=name if name is not None else self.name)
+        for node in self.nodes:
+            subNode = ComputeNode(node.hostname)
+            for socket in node.sockets:
+                positions = [position for position, core in enumerate(socket.cores) if (node.hostname, core) not in cores]
+                if len(positions) > 0:
+                    subNode.sockets.append(socket.selectCoresByPositions(positions))
+            if len(subNode.sockets) > 0:
+                cluster.nodes.append(subNode)
+        return cluster
+
+    def mergeWith(self, other:ComputeCollection, name:str = None) -> ComputeCollection:
+        # Create a collection with the nodes of both collections. The sockets of the nodes with the same
+        # hostname are gathered in a single node, so a host always appears once in the core table.
+        cluster = ComputeCollection(name=name if name is not None else self.name)
+        nodes = {}
+        for node in self.nodes + other.nodes:
+            if node.hostname not in nodes:
+                nodes[node.hostname] = ComputeNode(node.hostname)
+                cluster.nodes.append(nodes[node.hostname])
+            nodes[node.hostname].sockets.extend(node.sockets)
+        return cluster
+
     def toDict(self) -> dict:
         result = {}
         result["name"] = self.name
@@ -240,23 +805,15 @@ class ComputeCollection(ComputeResources):
 
         return result
     
-    def getListOfCores(self) -> List[dict]:
-        result = []
+    def fillCoreTable(self, table:CoreTable) -> None:
         for node in self.nodes:
-            result.extend(node.getListOfCores())
-        return result
+            node.fillCoreTable(table)
     
     def getListOfCoresPerSocket(self) -> List[List[dict]]:
-        result = []
-        for node in self.nodes:
-            result.extend(node.getListOfCoresPerSocket())
-        return result
+        return self.getCoreTable().getListOfCoresPerSocket()
     
     def getListOfCoresPerNode(self) -> List[List[dict]]:
-        result = []
-        for node in self.nodes:
-            result.append(node.getListOfCores())
-        return result
+        return self.getCoreTable().getListOfCoresPerNode()
 
 
     
\ No newline at end of file
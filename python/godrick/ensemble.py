@@ -0,0 +1,102 @@
+from godrick.workflow import Workflow
+from godrick.task import Task, TaskType, MPIPlacementPolicy
+from godrick.communicator import Communicator, MPIPairedCommunicator, ZMQPairedCommunicator, ZMQGateCommunicator, CommunicatorTransportType
+from godrick.computeResources import ComputeCollection, ComputeDomain
+from typing import Dict
+
+import copy
+
+def instanceName(name:str, instance:int, separator:str = ".") -> str:
+    return f"{name}{separator}{instance}"
+
+def cloneTask(task:Task, name:str, cmdline:str, resources:ComputeCollection) -> Task:
+    # Fresh copy of a template task: same settings, new name, ports and resources, not processed
+    if task.getTaskType() == TaskType.MPI and task.getPlacementPolicy() == MPIPlacementPolicy.USERDEFINED:
+        raise ValueError(f"The task {task.getName()} uses a user defined rank map which cannot be replicated on other resources.")
+    clone = copy.copy(task)
+    clone.name = name
+    clone.cmdline = cmdline
+    clone.resources = resources
+    clone.processedByLauncher = False
+    clone.processes = []
+    clone.inputPort = {}
+    clone.outputPort = {}
+    for portName in task.inputPort.keys():
+        clone.addInputPort(portName)
+    for portName in task.outputPort.keys():
+        clone.addOutputPort(portName)
+    if task.getTaskType() == TaskType.MPI:
+        clone.setGlobalRanks(-1, -1)
+    return clone
+
+def cloneCommunicator(comm:Communicator, name:str, taskNames:Dict[str, str]) -> Communicator:
+    # Fresh copy of a template communicator connected to the renamed tasks. Only the settings are shared with
+    # the template, the state filled by the launcher (processes, ranks, ports, protocol settings) is reset.
+    clone = copy.copy(comm)
+    clone.name = name
+    clone.configured = False
+    clone.processedByLauncher = False
+    if comm.isPairedCommunicator():
+        clone.inputTaskName = taskNames[comm.getInputTaskName()]
+        clone.outputTaskName = taskNames[comm.getOutputTaskName()]
+        clone.senderProcesses = []
+        clone.receiverProcesses = []
+    else:
+        # Gates of the instances are left unconnected, the template gate is connected to a single workflow
+        clone.taskName = taskNames[comm.taskName]
+        clone.connectedGate = None
+        clone.processes = []
+    if isinstance(comm, MPIPairedCommunicator):
+        clone.setInputMPIRanks(-1, -1)
+        clone.setOutputMPIRanks(-1, -1)
+        if comm.redistribution is not None:
+            clone.redistribution = copy.deepcopy(comm.redistribution)
+        clone.redistributionPlan = None
+    if isinstance(comm, (ZMQPairedCommunicator, ZMQGateCommunicator)):
+        clone.allocatedPorts = []
+        clone.boundPorts = []
+        clone.protocolSettings = {}
+    if isinstance(comm, ZMQPairedCommunicator):
+        clone.ipcPath = None
+    if isinstance(comm, ZMQGateCommunicator):
+        clone.protocolSettings["port"] = clone.getBindingPort()
+    return clone
+
+def createEnsemble(template:Workflow, nbInstances:int, resources:ComputeCollection, coreDemands:Dict[str, int], name:str = None, domain:ComputeDomain = ComputeDomain.SOCKET, separator:str = ".") -> Workflow:
+    # Replicate a template workflow nbInstances times in a single workflow, launched by a single MPMD command.
+    # Each instance gets a disjoint partition of the resources, carved to keep each instance as compact as possible,
+    # then split between the tasks of the instance according to coreDemands (cores per task of the template).
+    # Tasks and communicators are renamed <name><separator><instance>. In the command lines, {name} is replaced
+    # by the name of the task in the instance, {instance} by the index of the instance and {config} by the
+    # configuration file of the ensemble.
+    if nbInstances < 1:
+        raise ValueError(f"An ensemble needs at least one instance, got {nbInstances}.")
+    templateTasks = template.getTasks()
+    for task in templateTasks:
+        if task.getName() not in coreDemands:
+            raise ValueError(f"No core demand provided for the task {task.getName()} of the template {template.getName()}.")
+    if nbInstances > 1:
+        # A pinned port would be bound by every instance, which can share a host
+        for comm in template.getCommunicators():
+            if comm.getCommunicatorTransportType() == CommunicatorTransportType.ZMQ and comm.port is not None:
+                raise ValueError(f"The ZMQ communicator {comm.getName()} of the template {template.getName()} pins the port {comm.port} which cannot be shared by the {nbInstances} instances, let the launcher allocate its ports.")
+
+    ensemble = Workflow(name if name is not None else f"{template.getName()}Ensemble")
+    demands = [coreDemands[task.getName()] for task in templateTasks]
+    (instancePartitions, _) = resources.splitByCoreDemands([sum(demands)] * nbInstances, domain)
+
+    for instance, instanceResources in enumerate(instancePartitions):
+        (taskPartitions, _) = instanceResources.splitByCoreDemands(demands, domain)
+
+        taskNames = {}
+        for task, partition in zip(templateTasks, taskPartitions):
+            taskName = instanceName(task.getName(), instance, separator)
+            taskNames[task.getName()] = taskName
+            cmdline = task.getCommandLine().replace("{name}", taskName).replace("{instance}", str(instance)).replace("{config}", ensemble.getConfigurationFile())
+            partition.name = f"{ensemble.getName()}-{taskName}"
+            ensemble.declareTask(cloneTask(task, taskName, cmdline, partition))
+
+        for comm in template.getCommunicators():
+            ensemble.declareCommunicator(cloneCommunicator(comm, instanceName(comm.getName(), instance, separator), taskNames))
+
+    return ensemble
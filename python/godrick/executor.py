@@ -0,0 +1,184 @@
+from godrick.launcher import MainLauncher
+from godrick.task import TaskType
+from typing import Callable, Dict, List, Tuple
+
+import asyncio
+import os
+import re
+import signal
+import time
+
+# Prefix added by mpirun --tag-output to the lines of each rank: [jobid,rank]<stdout>:
+TAGGED_OUTPUT = re.compile(r"^\[\d+,(\d+)\]<std(?:out|err)>:")
+
+# Size of the buffer of the output streams, longer lines are reported in pieces of this size
+STREAM_LIMIT = 1024 * 1024
+
+def printOutput(name:str, streamName:str, line:str) -> None:
+    print(f"[{name}:{streamName}] {line}")
+
+class CommandExecution():
+    def __init__(self, name:str, cmdline:str, cwd:str = None) -> None:
+        self.name = name
+        self.cmdline = cmdline
+        self.cwd = cwd
+
+        self.startTime = None
+        self.firstMessageTime = None
+        self.exitTime = None
+        self.returnCode = None
+
+    def getName(self) -> str:
+        return self.name
+
+    def getReturnCode(self) -> int:
+        return self.returnCode
+
+    def getTimeToFirstMessage(self) -> float:
+        if self.startTime is None or self.firstMessageTime is None:
+            return None
+        return self.firstMessageTime - self.startTime
+
+    def getTimeToExit(self) -> float:
+        if self.startTime is None or self.exitTime is None:
+            return None
+        return self.exitTime - self.startTime
+
+class WorkflowExecutor():
+    def __init__(self, outputCallback:Callable[[str, str, str], None] = printOutput, terminationGracePeriod:float = 2.0) -> None:
+        self.outputCallback = outputCallback
+        self.terminationGracePeriod = terminationGracePeriod
+        self.executions = []
+        self.rankRanges = []        # (startRank, endRank, taskName) of the MPI tasks, to attribute tagged output
+        self.taskFirstMessageTimes = {}
+
+    def addCommand(self, name:str, cmdline:str, cwd:str = None) -> CommandExecution:
+        if name in [execution.getName() for execution in self.executions]:
+            raise ValueError(f"A command named {name} is already declared in the executor.")
+        execution = CommandExecution(name, cmdline, cwd)
+        self.executions.append(execution)
+        return execution
+
+    def addLauncher(self, launcher:MainLauncher) -> CommandExecution:
+        # Run the launch script generated for a workflow. If the MPI output is tagged (MainLauncher(tagOutput=True)),
+        # the first message of each MPI task is also recorded. The exit time is only known for the whole script,
+        # mpirun does not report when the ranks of a task exit.
+        commandFile = launcher.getCommandFile().resolve()
+        workflow = launcher.getWorkflow()
+        for task in workflow.getTasks():
+            if task.getTaskType() == TaskType.MPI:
+                start = task.getGlobalStartRank()
+                self.rankRanges.append((start, start + task.getGlobalNbRank(), task.getName()))
+        return self.addCommand(workflow.getName(), f"bash {commandFile.name}", str(commandFile.parent))
+
+    def getExecutions(self) -> List[CommandExecution]:
+        return self.executions
+
+    def getTimings(self) -> Dict[str, Tuple[float, float]]:
+        # Time to first message and time to exit of each command, None when not reached
+        return {execution.getName(): (execution.getTimeToFirstMessage(), execution.getTimeToExit()) for execution in self.executions}
+
+    def getTaskTimeToFirstMessage(self, taskName:str) -> float:
+        if taskName not in self.taskFirstMessageTimes:
+            return None
+        return self.taskFirstMessageTimes[taskName]
+
+    def run(self, timeout:float = None) -> bool:
+        # Return True if all the commands exited successfully
+        return asyncio.run(self.runAsync(timeout))
+
+    async def runAsync(self, timeout:float = None) -> bool:
+        if len(self.executions) == 0:
+            raise RuntimeError("No commands to execute.")
+
+        processes = {}
+        supervisors = {}
+        for execution in self.executions:
+            # Each command gets its own session so that the whole process tree can be signaled on teardown.
+            # The spawn time is part of the startup latency.
+            execution.startTime = time.perf_counter()
+            process = await asyncio.create_subprocess_shell(execution.cmdline, cwd=execution.cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True, limit=STREAM_LIMIT)
+            processes[execution.getName()] = process
+            supervisors[asyncio.ensure_future(self.superviseCommand(execution, process))] = execution
+
+        success = True
+        pending = set(supervisors.keys())
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        try:
+            while len(pending) > 0:
+                remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if len(done) == 0:
+                    # Timeout reached
+                    success = False
+                    break
+                if any(supervisors[supervisor].getReturnCode() != 0 for supervisor in done):
+                    success = False
+                    break
+        finally:
+            # A supervisor which raised no longer follows its command, the command is torn down with the pending ones
+            failed = [supervisor for supervisor in supervisors if supervisor.done() and not supervisor.cancelled() and supervisor.exception() is not None]
+            stopped = list(pending) + failed
+            if len(stopped) > 0:
+                await self.terminate(pending, [processes[supervisors[supervisor].getName()] for supervisor in stopped])
+            for supervisor in failed:
+                execution = supervisors[supervisor]
+                execution.returnCode = processes[execution.getName()].returncode
+                execution.exitTime = time.perf_counter()
+
+        return success
+
+    async def superviseCommand(self, execution:CommandExecution, process:asyncio.subprocess.Process) -> None:
+        await asyncio.gather(self.readStream(execution, process.stdout, "stdout"), self.readStream(execution, process.stderr, "stderr"))
+        execution.returnCode = await process.wait()
+        execution.exitTime = time.perf_counter()
+
+    async def readLine(self, stream:asyncio.StreamReader) -> bytes:
+        # Like StreamReader.readline(), but a line longer than the buffer is returned in pieces instead of raising
+        try:
+            return await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            return error.partial
+        except asyncio.LimitOverrunError as error:
+            return await stream.read(error.consumed)
+
+    async def readStream(self, execution:CommandExecution, stream:asyncio.StreamReader, streamName:str) -> None:
+        while True:
+            line = await self.readLine(stream)
+            if not line:
+                break
+            now = time.perf_counter()
+            if execution.firstMessageTime is None:
+                execution.firstMessageTime = now
+            text = line.decode(errors="replace").rstrip("\n")
+            if len(self.rankRanges) > 0:
+                self.recordTaggedMessage(execution, text, now)
+            if self.outputCallback is not None:
+                self.outputCallback(execution.getName(), streamName, text)
+
+    def recordTaggedMessage(self, execution:CommandExecution, line:str, now:float) -> None:
+        match = TAGGED_OUTPUT.match(line)
+        if match is None:
+            return
+        rank = int(match.group(1))
+        for (start, end, taskName) in self.rankRanges:
+            if start <= rank < end and taskName not in self.taskFirstMessageTimes:
+                self.taskFirstMessageTimes[taskName] = now - execution.startTime
+
+    async def terminate(self, supervisors:set, processes:List[asyncio.subprocess.Process]) -> None:
+        # SIGTERM the process groups still running, SIGKILL them after the grace period.
+        # The processes are awaited as well, the commands of the supervisors which raised have none left.
+        self.signalProcesses(processes, signal.SIGTERM)
+        waiters = set(supervisors) | {asyncio.ensure_future(process.wait()) for process in processes}
+        done, pending = await asyncio.wait(waiters, timeout=self.terminationGracePeriod)
+        if len(pending) > 0:
+            self.signalProcesses(processes, signal.SIGKILL)
+            await asyncio.wait(pending)
+
+    def signalProcesses(self, processes:List[asyncio.subprocess.Process], sig:int) -> None:
+        for process in processes:
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, sig)
+                except ProcessLookupError:
+                    pass
@@ -1,9 +1,13 @@
 from godrick.workflow import Workflow
 from godrick.task import TaskType, Task, MPIPlacementPolicy, Process
-from godrick.communicator import CommunicatorTransportType
-from typing import Tuple
+from godrick.communicator import CommunicatorTransportType, MPICommunicatorProtocol, ZMQPortAllocator, ZMQ_IPC_FOLDER, ZMQ_IPC_MAX_PATH
+from godrick.computeResources import CoreTable, ComputeCollection, ComputeDomain
+from godrick.cache import ArtifactCache, captureProcessedState, restoreProcessedState
+from typing import Tuple, List, Dict, Iterable, Iterator, Set
 from pathlib import Path
+from enum import Enum
 
+import copy
 import os
 import stat
 
@@ -18,13 +22,75 @@ class TaskSetup:
         raise NotImplementedError("Function removeFiles() not implemented by a ProcessAssigner class.")
 
 
-class OpenMPITaskSetup(TaskSetup):
+def compressSlots(slots:Iterable[int]) -> str:
+    # Collapse the runs of at least 3 consecutive cores into ranges: [0,1,2,3,8,9] -> "0-3,8,9"
+    runs = []
+    for core in slots:
+        if len(runs) > 0 and core == runs[-1][1] + 1:
+            runs[-1][1] = core
+        else:
+            runs.append([core, core])
+    return ",".join(f"{first}-{last}" if last - first >= 2 else ",".join(map(str, range(first, last+1))) for first, last in runs)
+
+def slotsToCPUMask(slots:Iterable[int]) -> str:
+    mask = 0
+    for core in slots:
+        mask |= 1 << core
+    return hex(mask)
+
+# Shell function of the launch scripts starting the singleton tasks in the background,
+# directly on the local host or through ssh on a remote one
+SINGLETON_LAUNCH_FUNCTION = """godrickRun() {
+    host=$1
+    shift
+    if [ "$host" = "localhost" ] || [ "$host" = "$(hostname)" ]; then
+        "$@" &
+    else
+        # ssh joins its arguments into a single command line, quote them to keep the spaces and quotes
+        ssh -n "$host" "cd $(printf '%q' "$PWD") && $(printf '%q ' "$@")" &
+    fi
+}
+
+"""
+
+def mergeLocalBindings(nodeBindings:Dict[str, List[str]], launcherName:str) -> List[str]:
+    # srun and mpiexec apply the same binding list on every node, the entry i going to the local task i of the node.
+    # The placement can only be expressed if the nodes agree on the bindings of the local ids they share.
+    bindings = []
+    for hostname, localBindings in nodeBindings.items():
+        for localId, binding in enumerate(localBindings):
+            if localId == len(bindings):
+                bindings.append(binding)
+            elif bindings[localId] != binding:
+                raise ValueError(f"The local task {localId} of the host {hostname} is bound to {binding} but to {bindings[localId]} on other hosts, which {launcherName} cannot express.")
+    return bindings
+
+class MPITaskSetup(TaskSetup):
+    # Common base for the backends launching the MPI tasks of a workflow as a single MPI application.
+    # The placement policies produce the (hostname, slots) of each rank, the backends write them to their own files.
     def __init__(self) -> None:
         super().__init__()
         self.folder = None
-        self.hostfilePath = None
-        self.rankfilePath = None
         self.commandfilePath = None
+        self.placedRanks = {}       # (hostname, slots, nbHostSlots) of the ranks of each MPI task, reused when re-placing
+        self.singletonCommands = {} # Command line of each singleton task, reused when re-placing
+
+    def getOutputPath(self, fileName:str) -> Path:
+        if self.folder is not None:
+            return self.folder / fileName
+        return Path(fileName)
+
+    def createWriter(self, workflow:Workflow):
+        raise NotImplementedError("Function createWriter() not implemented by a MPITaskSetup class.")
+
+    def appendMPITask(self, task:Task, rankOffset:int, writer) -> Tuple[str, int]:
+        raise NotImplementedError("Function appendMPITask() not implemented by a MPITaskSetup class.")
+
+    def getCommandLine(self, workflow:Workflow, appContexts:List[str], nbRanks:int) -> str:
+        raise NotImplementedError("Function getCommandLine() not implemented by a MPITaskSetup class.")
+
+    def getOutputFiles(self) -> List[Path]:
+        raise NotImplementedError("Function getOutputFiles() not implemented by a MPITaskSetup class.")
 
     def assignProcesses(self, workflow:Workflow, folder:Path = None) -> None :
         self.folder = folder
@@ -32,185 +98,295 @@ class OpenMPITaskSetup(TaskSetup):
         tasks = workflow.getTasks()
         if len(tasks) == 0:
             raise RuntimeError("Attempting to generate commands from an empty worklow. Abording.")
-        
-        rankfileName = f"rankfile.{workflow.getName()}.txt"
-        hostfileName = f"hostfile.{workflow.getName()}.txt"
-        commandfileName = f"launch.{workflow.getName()}.sh"
 
-        mpirunCommand = f"mpirun --hostfile {hostfileName} --rankfile {rankfileName} "
-        rankfileContent = ""
-        hostfileContent = ""
+        if folder is not None:
+            # Create the folder if it doesn't exist
+            folder.mkdir(parents=True, exist_ok=True)
+
+        self.placedRanks = {}
+        self.singletonCommands = {}
+        self.writeLaunchFiles(workflow, markTasks=True)
+
+    def reassignProcesses(self, workflow:Workflow, tasks:List[Task]) -> List[int]:
+        # Place again the given tasks of an already processed workflow, typically after their resources changed.
+        # The other tasks keep their ranks and processes, only their global rank offset can move if the number
+        # of ranks of a task placed before them changed. Return the global ranks whose placement changed.
+        previousRanks = self.getPlacedRanks(workflow)
+        for task in tasks:
+            if not task.hasBeenProcessed():
+                raise RuntimeError(f"The task {task.getName()} has not been processed yet, it cannot be placed again.")
+            self.placedRanks.pop(task.getName(), None)
+            self.singletonCommands.pop(task.getName(), None)
+            task.clearProcesses()
+
+        self.writeLaunchFiles(workflow, markTasks=False)
+
+        currentRanks = self.getPlacedRanks(workflow)
+        nbRanks = max(len(previousRanks), len(currentRanks))
+        return [rank for rank in range(nbRanks) if rank >= len(previousRanks) or rank >= len(currentRanks) or previousRanks[rank] != currentRanks[rank]]
+
+    def getPlacedRanks(self, workflow:Workflow) -> List[Tuple[str, List[int]]]:
+        # (hostname, slots) of each global rank of the MPI application
+        return [(hostname, slots) for task in workflow.getTasks() for (hostname, slots, _) in self.placedRanks.get(task.getName(), [])]
+
+    def writeLaunchFiles(self, workflow:Workflow, markTasks:bool = True) -> None:
+        tasks = workflow.getTasks()
+        writer = self.createWriter(workflow)
+        appContexts = []
+        singletonCommands = []
         rankOffset = 0
 
         # Process the tasks
-        for i, task in enumerate(tasks):
-            if task.getTaskType() != TaskType.MPI:
-                raise NotImplementedError("Only MPI tasks are supported for now.")
-            resource = task.getResources()
-            if resource is None:
-                raise ValueError(f"The task {task.getName()} does have resources assigned to it.")
-
-            if task.getTaskType() != TaskType.MPI:
-                raise RuntimeError(f"Trying to launch a non-mpi task with the mpi launcher.")
-            
-            # Variables to tracks the MPI ranks of the task
-            startRank = rankOffset
-
-            (hostfile, rankfile, cmd, newOffset) = self.appendMPITask(task, rankOffset)
-            hostfileContent += hostfile
-            rankfileContent += rankfile
-            if i == 0:
-                mpirunCommand += cmd
-            else:
-                mpirunCommand += f" :{cmd}"
-            rankOffset = newOffset
-            sizeRank = newOffset - startRank
-            
-            # Flag the task as been processed
-            task.setGlobalRanks(startRank, sizeRank)
-            task.markAsProcessed()
+        try:
+            for task in tasks:
+                resource = task.getResources()
+                if resource is None:
+                    raise ValueError(f"The task {task.getName()} does have resources assigned to it.")
+
+                # Singleton tasks are started as pinned processes next to the MPI application
+                if task.getTaskType() == TaskType.SINGLETON:
+                    if task.getName() not in self.singletonCommands:
+                        self.singletonCommands[task.getName()] = self.appendSingletonTask(task)
+                    singletonCommands.append(self.singletonCommands[task.getName()])
+                    if markTasks:
+                        task.markAsProcessed()
+                    continue
+                
+                # Variables to tracks the MPI ranks of the task
+                startRank = rankOffset
 
-        if folder is not None:
-            # Create the folder if it doesn't exist
-            folder.mkdir(parents=True, exist_ok=True)
+                (cmd, newOffset) = self.appendMPITask(task, rankOffset, writer)
+                appContexts.append(cmd)
+                rankOffset = newOffset
+                sizeRank = newOffset - startRank
+                
+                # Flag the task as been processed
+                task.setGlobalRanks(startRank, sizeRank)
+                if markTasks:
+                    task.markAsProcessed()
+
+            writer.close()
+            commandline = self.getCommandLine(workflow, appContexts, rankOffset) if rankOffset > 0 else ""
+        except BaseException:
+            writer.abort()
+            raise
+
+        # Write the command file
+        self.commandfilePath = self.getOutputPath(f"launch.{workflow.getName()}.sh")
+        with open(self.commandfilePath, "w") as f:
+            f.write("#! /bin/bash\n\n")
+            if len(singletonCommands) > 0:
+                f.write(SINGLETON_LAUNCH_FUNCTION)
+                f.writelines(f"{command}\n" for command in singletonCommands)
+            f.write(commandline)
+            if len(singletonCommands) > 0:
+                # Keep the script alive until the singleton processes are done as well
+                f.write("\nwait\n" if len(commandline) > 0 else "wait\n")
+
+        # Making the file executable
+        os.chmod(self.commandfilePath, stat.S_IREAD | stat.S_IEXEC | stat.S_IWRITE | stat.S_IROTH | stat.S_IXOTH) 
+
+    def appendSingletonTask(self, task:Task) -> str:
+        # A singleton task runs as one process on the first node of its resources, pinned to its cores.
+        # numactl also binds the memory when all the cores belong to the same known NUMA domain.
+        coreTable = task.getResources().getCoreTable()
+        nodeRanges = coreTable.getNodeRanges()
+        if len(nodeRanges) == 0:
+            raise ValueError(f"No cores found in the resources assigned to the task {task.getName()}.")
+        if len(nodeRanges) > 1:
+            raise ValueError(f"The singleton task {task.getName()} has resources on {len(nodeRanges)} nodes but runs as a single process.")
+
+        (start, end) = nodeRanges[0]
+        hostname = coreTable.getHostName(start)
+        cpus = compressSlots(coreTable.mainThreads[start:end])
+        numaDomains = set(coreTable.numaIds[start:end])
+
+        proc = Process(hostname=hostname, task=task)
+        task.addProcess(proc)
+
+        if len(numaDomains) == 1 and -1 not in numaDomains:
+            return f"godrickRun {hostname} numactl --physcpubind={cpus} --membind={numaDomains.pop()} {task.getCommandLine()}"
+        return f"godrickRun {hostname} taskset -c {cpus} {task.getCommandLine()}"
+
+    def placeMPITask(self, task:Task, rankOffset:int, writer) -> Tuple[int, Dict[str, str]]:
+        # Send the ranks of the task to the writer and create their processes
+        # Return expected: new rankoffset, environment variables to set for the task
+        # The ranks of a task already placed are reused along with their processes
+        ranks = self.placedRanks.get(task.getName())
+        createProcesses = ranks is None
+        if createProcesses:
+            ranks = list(self.getMPITaskRanks(task))
+            self.placedRanks[task.getName()] = ranks
+
+        nbRanks = 0
+        nbThreads = 0
+        for (hostname, slots, nbHostSlots) in ranks:
+            writer.addRank(rankOffset + nbRanks, hostname, slots, nbHostSlots)
+            nbRanks += 1
+            nbThreads = len(slots)
 
-            # Write the hostfile
-            self.hostfilePath = folder / hostfileName
-            with open(self.hostfilePath, "w") as f:
-                f.write(hostfileContent)
-                f.close()
-
-            # Write the rankfile
-            self.rankfilePath = folder / rankfileName
-            with open(self.rankfilePath, "w") as f:
-                f.write(rankfileContent)
-                f.close()
-
-            # Write the command file
-            self.commandfilePath = folder / commandfileName
-            with open(self.commandfilePath, "w") as f:
-                f.write("#! /bin/bash\n\n")
-                f.write(mpirunCommand)
-                f.close()
-
-            # Making the file executable
-            os.chmod(self.commandfilePath, stat.S_IREAD | stat.S_IEXEC | stat.S_IWRITE | stat.S_IROTH | stat.S_IXOTH) 
-        else:
-            # Write the hostfile
-            self.hostfilePath = Path(hostfileName)
-            with open(self.hostfilePath, "w") as f:
-                f.write(hostfileContent)
-                f.close()
-
-            # Write the rankfile
-            self.rankfilePath = Path(rankfileName)
-            with open(self.rankfilePath, "w") as f:
-                f.write(rankfileContent)
-                f.close()
-
-            # Write the command file
-            self.commandfilePath = Path(commandfileName)
-            with open(self.commandfilePath, "w") as f:
-                f.write("#! /bin/bash\n\n")
-                f.write(mpirunCommand)
-                f.close()
-
-            # Making the file executable
-            os.chmod(self.commandfilePath, stat.S_IREAD | stat.S_IEXEC | stat.S_IWRITE | stat.S_IROTH | stat.S_IXOTH) 
-
-    def appendMPITask(self, task:Task, rankOffset:int) -> Tuple[str, str, str, int]:
-        # Return expected: output hostfile, output rankfile, output cmdline, new rankoffset
+            # Create the corresponding process 
+            if createProcesses:
+                proc = Process(hostname=hostname, task=task)
+                task.addProcess(proc)
+
+        environment = {}
+        if task.getPlacementPolicy() == MPIPlacementPolicy.RANKSPERSOCKET:
+            # The threads of each rank are bound to the slots of the rank
+            environment["OMP_NUM_THREADS"] = str(nbThreads)
+            environment["OMP_PLACES"] = "threads" if nbThreads > task.getHybridLayout()[1] else "cores"
+            environment["OMP_PROC_BIND"] = "close"
+
+        return rankOffset + nbRanks, environment
+
+    def getMPITaskRanks(self, task:Task) -> Iterator[Tuple[str, List[int], int]]:
+        # Return expected: for each rank of the task, its hostname, its slots, and its number of slots in the hostfile
         placementPolicy = task.getPlacementPolicy()
         if placementPolicy == MPIPlacementPolicy.ONETASKPERCORE:
-            return self.appendMPITaskPerCore(task=task, rankOffset=rankOffset)
+            return self.getMPITaskRanksPerCore(task=task)
         elif placementPolicy == MPIPlacementPolicy.ONETASKPERSOCKET:
-            return self.appendMPITaskPerSocket(task=task, rankOffset=rankOffset)
+            coreTable = task.getResources().getCoreTable()
+            return self.getMPITaskRanksPerCoreRange(task, coreTable, coreTable.getSocketRanges())
         elif placementPolicy == MPIPlacementPolicy.ONETASKPERNODE:
-            return self.appendMPITaskPerNode(task=task, rankOffset=rankOffset)
+            coreTable = task.getResources().getCoreTable()
+            return self.getMPITaskRanksPerCoreRange(task, coreTable, coreTable.getNodeRanges())
+        elif placementPolicy == MPIPlacementPolicy.USERDEFINED:
+            return self.getMPITaskRanksUserDefined(task=task)
+        elif placementPolicy == MPIPlacementPolicy.RANKSPERSOCKET:
+            return self.getMPITaskRanksHybrid(task=task)
         else:
             raise NotImplementedError("Placement policy not implemented yet.")
 
-    def appendMPITaskPerCore(self, task:Task, rankOffset:int) -> Tuple[str, str, str, int]:
-        # Return expected: output hostfile, output rankfile, output cmdline, new rankoffset
-        resources = task.getResources()
-        coreList = resources.getListOfCores()
-
-        hostfile = ""
-        rankfile = ""
-        commandline = ""
-        nbCores = len(coreList)
+    def getMPITaskRanksPerCore(self, task:Task) -> Iterator[Tuple[str, List[int], int]]:
+        coreTable = task.getResources().getCoreTable()
+        nbCores = coreTable.getNbCores()
 
         if nbCores == 0:
             raise ValueError(f"No cores found in the resources assigned to the task {task.getName()}.")
         
-        for i, core in enumerate(coreList):
-            hostfile += f"{core['hostname']}\n"
-            rankfile += f"rank {rankOffset+i}={core['hostname']} slots={core['mainthread']}\n"
+        for i in range(nbCores):
+            yield coreTable.getHostName(i), [coreTable.mainThreads[i]], 1
 
-            # Create the corresponding process 
-            proc = Process(hostname=core['hostname'], task=task)
-            task.addProcess(proc)
-        
-        commandline += f" -np {nbCores} {task.getCommandLine()}"
+    def getMPITaskRanksPerCoreRange(self, task:Task, coreTable:CoreTable, ranges:List[Tuple[int, int]]) -> Iterator[Tuple[str, List[int], int]]:
+        # One rank per [start, end) range of rows of the core table, using all the cores of the range.
+        for (start, end) in ranges:
+            if start == end:
+                raise ValueError(f"No cores found in a socket assigned to the task {task.getName()}.")
+            yield coreTable.getHostName(start), coreTable.mainThreads[start:end].tolist(), end - start
+
+    def validateRankMap(self, task:Task, rankMap:List[Tuple[str, List[int]]]) -> None:
+        # Check all the ranks at once against the resources of the task: every core must belong to the 
+        # resources (main thread or hyperthread of the host) and can only be used by one rank.
+        coreTable = task.getResources().getCoreTable()
+        available = set()
+        for i in range(coreTable.getNbCores()):
+            hostname = coreTable.getHostName(i)
+            available.add((hostname, coreTable.mainThreads[i]))
+            if coreTable.hyperThreads[i] >= 0:
+                available.add((hostname, coreTable.hyperThreads[i]))
+
+        requested = [(hostname, core) for hostname, cores in rankMap for core in cores]
+        emptyRanks = [rank for rank, (hostname, cores) in enumerate(rankMap) if len(cores) == 0]
+        if len(emptyRanks) > 0:
+            raise ValueError(f"The ranks {emptyRanks} of the task {task.getName()} have no cores assigned in the rank map.")
+
+        missing = set(requested) - available
+        if len(missing) > 0:
+            raise ValueError(f"The rank map of the task {task.getName()} oversubscribes its resources: the cores {sorted(missing)} are not part of the resources assigned to the task.")
+
+        if len(set(requested)) != len(requested):
+            owners = {}
+            for rank, (hostname, cores) in enumerate(rankMap):
+                for core in cores:
+                    owners.setdefault((hostname, core), []).append(rank)
+            overlaps = {key: ranks for key, ranks in owners.items() if len(ranks) > 1}
+            raise ValueError(f"The rank map of the task {task.getName()} assigns the same cores to several ranks: {overlaps}.")
+
+    def getMPITaskRanksUserDefined(self, task:Task) -> Iterator[Tuple[str, List[int], int]]:
+        rankMap = task.getRankMap()
+        self.validateRankMap(task, rankMap)
+
+        for (hostname, cores) in rankMap:
+            yield hostname, list(cores), len(cores)
+
+    def getMPITaskRanksHybrid(self, task:Task) -> Iterator[Tuple[str, List[int], int]]:
+        # N ranks per socket with K cores each, the threads of each rank being bound to the slots of the rank.
+        ranksPerSocket, coresPerRank, useHTSiblings = task.getHybridLayout()
+        coreTable = task.getResources().getCoreTable()
+        nbThreads = -1
+
+        socketRanges = coreTable.getSocketRanges()
+        if len(socketRanges) == 0:
+            raise ValueError(f"No sockets found in the resources assigned to the task {task.getName()}.")
+
+        for (start, end) in socketRanges:
+            if end - start < ranksPerSocket * coresPerRank:
+                raise ValueError(f"The task {task.getName()} requests {ranksPerSocket} ranks of {coresPerRank} cores per socket but a socket of {coreTable.getHostName(start)} only has {end - start} cores.")
+            hostname = coreTable.getHostName(start)
+            for first in range(start, start + ranksPerSocket * coresPerRank, coresPerRank):
+                last = first + coresPerRank
+                slots = coreTable.mainThreads[first:last].tolist()
+                if useHTSiblings:
+                    slots += [ht for ht in coreTable.hyperThreads[first:last] if ht >= 0]
+                
+                # OMP_NUM_THREADS is set for the whole task, all the ranks must have the same number of threads
+                if nbThreads == -1:
+                    nbThreads = len(slots)
+                elif nbThreads != len(slots):
+                    raise ValueError(f"The ranks of the task {task.getName()} do not have the same number of hardware threads ({nbThreads} and {len(slots)}).")
 
-        return hostfile, rankfile, commandline, rankOffset + nbCores
+                yield hostname, slots, coresPerRank
     
-    def appendMPITaskPerSocket(self, task:Task, rankOffset:int) -> Tuple[str, str, str, int]:
-        # Return expected: output hostfile, output rankfile, output cmdline, new rankoffset
-        resources = task.getResources()
-        corePerSocketList = resources.getListOfCoresPerSocket()
-
-        hostfile = ""
-        rankfile = ""
-        commandline = ""
-        nbRanks = len(corePerSocketList)
-        
-        for i, socket in enumerate(corePerSocketList):
-            slots = ""
-            if len(socket) == 0:
-                raise ValueError(f"No cores found in a socket assigned to the task {task.getName()}.")
-            for core in socket:
-                hostfile += f"{core['hostname']}\n"
-                slots += f"{core['mainthread']},"
-            slots = slots.rstrip(",")
-            rankfile += f"rank {rankOffset+i}={core['hostname']} slots={slots}\n"
 
-            # Create the corresponding process 
-            proc = Process(hostname=core['hostname'], task=task)
-            task.addProcess(proc)
-        
-        commandline += f" -np {nbRanks} {task.getCommandLine()}"
+class OpenMPIFileWriter:
+    def __init__(self, hostfilePath:Path, rankfilePath:Path) -> None:
+        self.hostfilePath = hostfilePath
+        self.rankfilePath = rankfilePath
+        self.rankfile = open(rankfilePath, "w")
+        self.hostSlots = {}     # Number of slots per host, in order of first appearance
+
+    def addRank(self, rank:int, hostname:str, slots:List[int], nbHostSlots:int = -1) -> None:
+        # The rankfile is written as the ranks come, the hostfile only needs the slot count per host
+        self.rankfile.write(f"rank {rank}={hostname} slots={compressSlots(slots)}\n")
+        self.hostSlots[hostname] = self.hostSlots.get(hostname, 0) + (nbHostSlots if nbHostSlots >= 0 else len(slots))
+
+    def close(self) -> None:
+        self.rankfile.close()
+        with open(self.hostfilePath, "w") as f:
+            f.writelines(f"{hostname} slots={nbSlots}\n" for hostname, nbSlots in self.hostSlots.items())
+
+    def abort(self) -> None:
+        self.rankfile.close()
+        for path in [self.rankfilePath, self.hostfilePath]:
+            if path.is_file():
+                path.unlink()
+
+class OpenMPITaskSetup(MPITaskSetup):
+    def __init__(self, tagOutput:bool = False) -> None:
+        super().__init__()
+        self.hostfilePath = None
+        self.rankfilePath = None
+        self.tagOutput = tagOutput      # Prefix the output lines of each rank with [jobid,rank], used by the WorkflowExecutor
 
-        return hostfile, rankfile, commandline, rankOffset + nbRanks
-    
-    def appendMPITaskPerNode(self, task:Task, rankOffset:int) -> Tuple[str, str, str, int]:
-        # Return expected: output hostfile, output rankfile, output cmdline, new rankoffset
-        resources = task.getResources()
-        corePerNodeList = resources.getListOfCoresPerNode()
-
-        hostfile = ""
-        rankfile = ""
-        commandline = ""
-        nbRanks = len(corePerNodeList)
-        
-        for i, node in enumerate(corePerNodeList):
-            slots = ""
-            if len(node) == 0:
-                raise ValueError(f"No cores found in a socket assigned to the task {task.getName()}.")
-            for core in node:
-                hostfile += f"{core['hostname']}\n"
-                slots += f"{core['mainthread']},"
-            slots = slots.rstrip(",")
-            rankfile += f"rank {rankOffset+i}={core['hostname']} slots={slots}\n"
+    def createWriter(self, workflow:Workflow) -> OpenMPIFileWriter:
+        self.hostfilePath = self.getOutputPath(f"hostfile.{workflow.getName()}.txt")
+        self.rankfilePath = self.getOutputPath(f"rankfile.{workflow.getName()}.txt")
+        return OpenMPIFileWriter(self.hostfilePath, self.rankfilePath)
 
-            # Create the corresponding process 
-            proc = Process(hostname=core['hostname'], task=task)
-            task.addProcess(proc)
-        
-        commandline += f" -np {nbRanks} {task.getCommandLine()}"
+    def appendMPITask(self, task:Task, rankOffset:int, writer:OpenMPIFileWriter) -> Tuple[str, int]:
+        # Return expected: output app context, new rankoffset
+        (newOffset, environment) = self.placeMPITask(task, rankOffset, writer)
+        commandline = "".join(f" -x {key}={value}" for key, value in environment.items())
+        commandline += f" -np {newOffset - rankOffset} {task.getCommandLine()}"
+        return commandline, newOffset
+
+    def getCommandLine(self, workflow:Workflow, appContexts:List[str], nbRanks:int) -> str:
+        options = "--tag-output " if self.tagOutput else ""
+        return f"mpirun {options}--hostfile {self.hostfilePath.name} --rankfile {self.rankfilePath.name} " + " :".join(appContexts)
+
+    def getOutputFiles(self) -> List[Path]:
+        return [self.hostfilePath, self.rankfilePath, self.commandfilePath]
 
-        return hostfile, rankfile, commandline, rankOffset + nbRanks
-    
     def removeFiles(self) -> None:
         
         if self.rankfilePath is not None and self.rankfilePath.is_file():
@@ -222,12 +398,146 @@ class OpenMPITaskSetup(TaskSetup):
         if self.commandfilePath is not None and self.commandfilePath.is_file():
             self.commandfilePath.unlink()
 
+class SlurmFileWriter:
+    def __init__(self, hostfilePath:Path, multiprogPath:Path) -> None:
+        self.hostfilePath = hostfilePath
+        self.multiprogPath = multiprogPath
+        self.hostfile = open(hostfilePath, "w")
+        self.programs = []
+        self.nodeMasks = {}     # CPU masks of the ranks of each host, by local task id
+        self.masks = []
+
+    def addRank(self, rank:int, hostname:str, slots:List[int], nbHostSlots:int = -1) -> None:
+        # With --distribution=arbitrary, the line i of SLURM_HOSTFILE is the host of the rank i
+        self.hostfile.write(f"{hostname}\n")
+        self.nodeMasks.setdefault(hostname, []).append(slotsToCPUMask(slots))
+
+    def addProgram(self, line:str) -> None:
+        self.programs.append(line)
+
+    def close(self) -> None:
+        self.hostfile.close()
+        self.masks = mergeLocalBindings(self.nodeMasks, "srun --cpu-bind=mask_cpu")
+
+        with open(self.multiprogPath, "w") as f:
+            f.writelines(f"{line}\n" for line in self.programs)
+
+    def abort(self) -> None:
+        self.hostfile.close()
+        for path in [self.hostfilePath, self.multiprogPath]:
+            if path.is_file():
+                path.unlink()
+
+class SlurmTaskSetup(MPITaskSetup):
+    def __init__(self) -> None:
+        super().__init__()
+        self.hostfilePath = None
+        self.multiprogPath = None
+        self.writer = None
+
+    def createWriter(self, workflow:Workflow) -> SlurmFileWriter:
+        self.hostfilePath = self.getOutputPath(f"hostfile.{workflow.getName()}.txt")
+        self.multiprogPath = self.getOutputPath(f"multiprog.{workflow.getName()}.conf")
+        self.writer = SlurmFileWriter(self.hostfilePath, self.multiprogPath)
+        return self.writer
+
+    def appendMPITask(self, task:Task, rankOffset:int, writer:SlurmFileWriter) -> Tuple[str, int]:
+        # Return expected: output line of the multi-prog configuration, new rankoffset
+        (newOffset, environment) = self.placeMPITask(task, rankOffset, writer)
+        if newOffset == rankOffset:
+            raise ValueError(f"No ranks created for the task {task.getName()}.")
+        program = f"{rankOffset}-{newOffset-1}" if newOffset - rankOffset > 1 else f"{rankOffset}"
+        if len(environment) > 0:
+            program += " env" + "".join(f" {key}={value}" for key, value in environment.items())
+        program += f" {task.getCommandLine()}"
+        writer.addProgram(program)
+        return program, newOffset
+
+    def getCommandLine(self, workflow:Workflow, appContexts:List[str], nbRanks:int) -> str:
+        commandline = f"export SLURM_HOSTFILE={self.hostfilePath.name}\n"
+        commandline += f"srun --ntasks={nbRanks} --distribution=arbitrary --cpu-bind=mask_cpu:{','.join(self.writer.masks)} --multi-prog {self.multiprogPath.name}"
+        return commandline
+
+    def getOutputFiles(self) -> List[Path]:
+        return [self.hostfilePath, self.multiprogPath, self.commandfilePath]
+
+    def removeFiles(self) -> None:
+        for path in self.getOutputFiles():
+            if path is not None and path.is_file():
+                path.unlink()
+
+class HydraFileWriter:
+    def __init__(self, machinefilePath:Path) -> None:
+        self.machinefilePath = machinefilePath
+        self.machinefile = open(machinefilePath, "w")
+        self.currentHost = None
+        self.currentCount = 0
+        self.nodeBindings = {}  # Core lists of the ranks of each host, by local task id
+        self.bindings = []
+
+    def addRank(self, rank:int, hostname:str, slots:List[int], nbHostSlots:int = -1) -> None:
+        # Hydra fills the entries of the machinefile in order, consecutive ranks on the same host share a line
+        if hostname != self.currentHost:
+            self.flushHost()
+            self.currentHost = hostname
+        self.currentCount += 1
+        self.nodeBindings.setdefault(hostname, []).append("+".join(map(str, slots)))
+
+    def flushHost(self) -> None:
+        if self.currentCount > 0:
+            self.machinefile.write(f"{self.currentHost}:{self.currentCount}\n")
+        self.currentCount = 0
+
+    def close(self) -> None:
+        self.flushHost()
+        self.machinefile.close()
+        self.bindings = mergeLocalBindings(self.nodeBindings, "mpiexec -bind-to user")
+
+    def abort(self) -> None:
+        self.machinefile.close()
+        if self.machinefilePath.is_file():
+            self.machinefilePath.unlink()
+
+class HydraTaskSetup(MPITaskSetup):
+    def __init__(self) -> None:
+        super().__init__()
+        self.machinefilePath = None
+        self.writer = None
+
+    def createWriter(self, workflow:Workflow) -> HydraFileWriter:
+        self.machinefilePath = self.getOutputPath(f"machinefile.{workflow.getName()}.txt")
+        self.writer = HydraFileWriter(self.machinefilePath)
+        return self.writer
+
+    def appendMPITask(self, task:Task, rankOffset:int, writer:HydraFileWriter) -> Tuple[str, int]:
+        # Return expected: output executable section, new rankoffset
+        (newOffset, environment) = self.placeMPITask(task, rankOffset, writer)
+        commandline = "".join(f" -env {key} {value}" for key, value in environment.items())
+        commandline += f" -n {newOffset - rankOffset} {task.getCommandLine()}"
+        return commandline, newOffset
+
+    def getCommandLine(self, workflow:Workflow, appContexts:List[str], nbRanks:int) -> str:
+        return f"mpiexec -f {self.machinefilePath.name} -bind-to user:{','.join(self.writer.bindings)} " + " :".join(appContexts)
+
+    def getOutputFiles(self) -> List[Path]:
+        return [self.machinefilePath, self.commandfilePath]
+
+    def removeFiles(self) -> None:
+        for path in self.getOutputFiles():
+            if path is not None and path.is_file():
+                path.unlink()
+
 class CommunicatorSetup:
     def __init__(self) -> None:
         pass
 
     def configureCommunicator(self, workflow:Workflow, folder:Path = None) -> None :
         raise NotImplementedError("Function configureCommunicator() not implemented by a CommunicatorSetup class.")
+
+    def updateCommunicators(self, workflow:Workflow, taskNames:Set[str]) -> List[str]:
+        # Refresh the settings of the configured communicators after the tasks in taskNames were placed again
+        # Return the names of the communicators whose settings changed
+        return []
     
     def removeFiles(self) -> None:
         pass
@@ -242,44 +552,203 @@ class MPICommunicatorSetup(CommunicatorSetup):
                 continue
             
             inputTask = workflow.getTaskByName(comm.getInputTaskName())
-            comm.setInputMPIRanks(inputTask.getGlobalStartRank(), inputTask.getGlobalNbRank())
-
             outputTask = workflow.getTaskByName(comm.getOutputTaskName())
+            for task in [inputTask, outputTask]:
+                if task.getTaskType() != TaskType.MPI:
+                    raise RuntimeError(f"The MPI communicator {comm.getName()} is connected to the task {task.getName()} which is not launched as part of the MPI application.")
+
+            comm.setInputMPIRanks(inputTask.getGlobalStartRank(), inputTask.getGlobalNbRank())
             comm.setOutputMPIRanks(outputTask.getGlobalStartRank(), outputTask.getGlobalNbRank())
+            if comm.protocol == MPICommunicatorProtocol.BLOCK_REDISTRIBUTE:
+                comm.computeRedistributionPlan()
 
             # Done setting up the comm, marking it as processed
             comm.markAsProcessed()
+
+    def updateCommunicators(self, workflow:Workflow, taskNames:Set[str]) -> List[str]:
+        # The global ranks of any task can move when a task placed before it changed its number of ranks,
+        # so all the MPI communicators are checked, not only the ones connected to taskNames
+        updated = []
+        for comm in workflow.getCommunicators():
+            if comm.getCommunicatorTransportType() != CommunicatorTransportType.MPI:
+                continue
+            inputTask = workflow.getTaskByName(comm.getInputTaskName())
+            outputTask = workflow.getTaskByName(comm.getOutputTaskName())
+            previous = (comm.inStartRank, comm.inSize, comm.outStartRank, comm.outSize)
+            comm.setInputMPIRanks(inputTask.getGlobalStartRank(), inputTask.getGlobalNbRank())
+            comm.setOutputMPIRanks(outputTask.getGlobalStartRank(), outputTask.getGlobalNbRank())
+            if previous != (comm.inStartRank, comm.inSize, comm.outStartRank, comm.outSize):
+                if comm.protocol == MPICommunicatorProtocol.BLOCK_REDISTRIBUTE:
+                    comm.computeRedistributionPlan()
+                updated.append(comm.getName())
+        return updated
     
     def removeFiles(self) -> None:
         pass
 
 class ZMQCommunicatorSetup(CommunicatorSetup):
-    def __init__(self) -> None:
+    def __init__(self, portAllocator:ZMQPortAllocator = None, ipcFolder:str = ZMQ_IPC_FOLDER) -> None:
         super().__init__()
+        self.portAllocator = portAllocator
+        self.ipcFolder = ipcFolder
+
+    def assignIPCPath(self, workflow:Workflow, communicator) -> None:
+        # One socket file per communicator of the workflow, used if both sides end up on the same host.
+        # Paths too long for a Unix socket keep the communicator on TCP.
+        if communicator.isGate() or not communicator.useIPC:
+            return
+        path = f"{self.ipcFolder}/godrick.{workflow.getName()}.{communicator.getName()}.ipc"
+        if len(path) <= ZMQ_IPC_MAX_PATH:
+            communicator.setIPCPath(path)
+
+    def assignPort(self, workflow:Workflow, communicator) -> None:
+        # Record the port bound by each binding rank of the communicator on its host: the pinned ports if any, free ports otherwise
+        hostnames = communicator.getBindingHostNames()
+        if self.portAllocator is None or len(hostnames) == 0:
+            return
+        owner = f"{workflow.getName()}.{communicator.getName()}"
+        communicator.allocatedPorts = []
+        communicator.boundPorts = []
+        for rank, hostname in enumerate(hostnames):
+            rankOwner = owner if len(hostnames) == 1 else f"{owner}.{rank}"
+            if communicator.port is not None:
+                self.portAllocator.reservePort(hostname, communicator.port + rank, rankOwner)
+            else:
+                communicator.allocatedPorts.append(self.portAllocator.allocatePort(hostname, rankOwner))
+            communicator.boundPorts.append((hostname, communicator.getBindingPort(rank)))
     
     def configureCommunicator(self, workflow: Workflow, folder: Path = None) -> None:
         # Parse all the communicators, look for ZMQ types, and setup the addressses
-        communicators = workflow.getCommunicators()
-
-        for communicator in communicators:
-            if communicator.getCommunicatorTransportType() == CommunicatorTransportType.ZMQ:
-                
+        communicators = [communicator for communicator in workflow.getCommunicators() if communicator.getCommunicatorTransportType() == CommunicatorTransportType.ZMQ]
+
+        # The ports recorded for the workflow are given back if one of its communicators cannot be configured
+        previousPorts = copy.deepcopy(self.portAllocator.getAssignments()) if self.portAllocator is not None else {}
+        try:
+            # All the ports are assigned first, configuring a gate can configure the gate it is connected to.
+            # The pinned ports are reserved before handing out the free ones.
+            for communicator in sorted(communicators, key=lambda communicator: communicator.port is None):
                 if not communicator.isConfigurable():
                     raise RuntimeError(f"The ZMQ Communicator {communicator.getName()} cannnot be configured.")
+                self.assignPort(workflow, communicator)
+                self.assignIPCPath(workflow, communicator)
+
+            for communicator in communicators:
                 communicator.configure()
 
                 # Mark the communicator
                 communicator.markAsProcessed()
+        except Exception:
+            self.releaseNewPorts(previousPorts)
+            raise
+
+    def releaseNewPorts(self, previousPorts:Dict[str, Dict[int, str]]) -> None:
+        # Release the ports recorded since the allocator held previousPorts
+        if self.portAllocator is None:
+            return
+        for hostname, ports in self.portAllocator.getAssignments().items():
+            for port in [port for port in ports if port not in previousPorts.get(hostname, {})]:
+                self.portAllocator.releasePort(hostname, port)
+
+    def updateCommunicators(self, workflow:Workflow, taskNames:Set[str]) -> List[str]:
+        # The address of a ZMQ socket follows the binding process, only the communicators connected
+        # to the tasks placed again are configured again
+        updated = []
+        for communicator in workflow.getCommunicators():
+            if communicator.getCommunicatorTransportType() != CommunicatorTransportType.ZMQ:
+                continue
+            if communicator.getInputTaskName() not in taskNames and communicator.getOutputTaskName() not in taskNames:
+                continue
+
+            previous = dict(communicator.protocolSettings)
+            communicator.configured = False
+            if not communicator.isConfigurable():
+                raise RuntimeError(f"The ZMQ Communicator {communicator.getName()} cannnot be configured.")
+
+            # The ports used on the previous hosts are given back before binding on the new ones
+            if self.portAllocator is not None and len(communicator.getBindingHostNames()) > 0:
+                for hostname, port in communicator.boundPorts:
+                    self.portAllocator.releasePort(hostname, port)
+                self.assignPort(workflow, communicator)
+            communicator.configure()
+            if previous != communicator.protocolSettings:
+                updated.append(communicator.getName())
+        return updated
 
     def removeFiles(self) -> None:
         pass
 
-class MainLauncher:
+class SHMCommunicatorSetup(CommunicatorSetup):
     def __init__(self) -> None:
+        super().__init__()
+
+    def configureCommunicator(self, workflow: Workflow, folder: Path = None) -> None:
+        # Shared memory communicators are only configured when both of their processes share a host
+        for communicator in workflow.getCommunicators():
+            if communicator.getCommunicatorTransportType() != CommunicatorTransportType.SHM:
+                continue
+            if communicator.segmentName is None:
+                communicator.setSegmentName(f"/godrick.{workflow.getName()}.{communicator.getName()}")
+            communicator.configure()
+            communicator.markAsProcessed()
+
+    def updateCommunicators(self, workflow:Workflow, taskNames:Set[str]) -> List[str]:
+        # A task moved away from the host of its peer cannot keep a shared memory communicator, configure() raises
+        updated = []
+        for communicator in workflow.getCommunicators():
+            if communicator.getCommunicatorTransportType() != CommunicatorTransportType.SHM:
+                continue
+            if communicator.getInputTaskName() not in taskNames and communicator.getOutputTaskName() not in taskNames:
+                continue
+            previous = dict(communicator.protocolSettings)
+            communicator.configure()
+            if previous != communicator.protocolSettings:
+                updated.append(communicator.getName())
+        return updated
+
+    def removeFiles(self) -> None:
+        pass
+
+class TaskSetupType(Enum):
+    OPENMPI = 0,
+    SLURM = 1,
+    MPICH = 2
+
+class MainLauncher:
+    def __init__(self, taskSetupType:TaskSetupType = TaskSetupType.OPENMPI, cache:ArtifactCache = None, portAllocator:ZMQPortAllocator = None, tagOutput:bool = False) -> None:
+        if tagOutput and taskSetupType != TaskSetupType.OPENMPI:
+            raise ValueError(f"Tagging the output of the ranks is only supported by the task setup {TaskSetupType.OPENMPI.name}, got {taskSetupType.name}.")
+        self.taskSetupType = taskSetupType
+        self.tagOutput = tagOutput      # Let the WorkflowExecutor time the first message of each MPI task
+        self.portAllocator = portAllocator if portAllocator is not None else ZMQPortAllocator()
+        self.taskSetup = None
         self.launchers = []
         self.workflow = None
+        self.folder = None              # Folder receiving the files of the last workflow, the current directory if None
+        self.cache = cache
+        self.cachedArtifacts = None     # Artifacts reused from the cache for the last workflow
+        self.communicatorSetups = []
+        self.failedHosts = set()        # Hosts reported as failed through replaceFailedNodes()
         
     def generateOutputFiles(self, workflow:Workflow, folder:Path = None):
+
+        # Reuse the files generated for an identical workflow when possible. The placement and the files are
+        # skipped, the tasks and communicators get the state they had after the generation and the ports are reserved.
+        self.folder = folder
+        cacheKey = None
+        if self.cache is not None:
+            # The ports handed out depend on the ports already in use
+            previousPorts = copy.deepcopy(self.portAllocator.getAssignments())
+            cacheKey = self.cache.computeKey(workflow, folder, {"taskSetupType": self.taskSetupType, "tagOutput": self.tagOutput, "ports": previousPorts})
+            self.cachedArtifacts = self.cache.get(cacheKey)
+            if self.cachedArtifacts is not None:
+                self.cachedArtifacts.restoreFiles()
+                processedState = self.cachedArtifacts.getProcessedState()
+                restoreProcessedState(workflow, processedState)
+                self.forwardProcessesToCommunicators(workflow)
+                for (hostname, port, owner) in processedState["ports"]:
+                    self.portAllocator.reservePort(hostname, port, owner)
+                self.workflow = workflow
+                return
         
         # Process the tasks 
         self.processTasks(workflow, folder)
@@ -293,14 +762,41 @@ class MainLauncher:
         # Now that all the tasks have been processed, all the information required has been
         # associated with the relevant component. We can now generate the configuration for the
         # workflow
-        workflow.generateWorkflowConfiguration()
-
+        workflow.generateWorkflowConfiguration(self.folder)
 
         self.workflow = workflow
 
+        if self.cache is not None:
+            processedState = captureProcessedState(workflow)
+            processedState["ports"] = [(hostname, port, owner) for hostname, ports in self.portAllocator.getAssignments().items()
+                                                              for port, owner in ports.items() if port not in previousPorts.get(hostname, {})]
+            self.cache.put(cacheKey, self.getOutputFiles(), self.taskSetup.commandfilePath, processedState)
+
+    def getOutputFiles(self) -> List[Path]:
+        if self.cachedArtifacts is not None:
+            return self.cachedArtifacts.getFiles()
+        files = [path for path in self.taskSetup.getOutputFiles() if path is not None]
+        files.append(self.getOutputPath(self.workflow.getConfigurationFile()))
+        if len(self.workflow.getGateCommunicators()) > 0:
+            files.append(self.getOutputPath(self.workflow.getGatesFile()))
+        return files
+
+    def getOutputPath(self, fileName:str) -> Path:
+        if self.folder is not None:
+            return self.folder / fileName
+        return Path(fileName)
+
     def processTasks(self, workflow:Workflow, folder:Path = None) -> None:
-        mpiLauncher = OpenMPITaskSetup()
+        if self.taskSetupType == TaskSetupType.OPENMPI:
+            mpiLauncher = OpenMPITaskSetup(self.tagOutput)
+        elif self.taskSetupType == TaskSetupType.SLURM:
+            mpiLauncher = SlurmTaskSetup()
+        elif self.taskSetupType == TaskSetupType.MPICH:
+            mpiLauncher = HydraTaskSetup()
+        else:
+            raise NotImplementedError(f"Task setup {self.taskSetupType.name} not implemented yet.")
         mpiLauncher.assignProcesses(workflow=workflow, folder=folder)
+        self.taskSetup = mpiLauncher
 
         self.launchers.append(mpiLauncher)
 
@@ -327,15 +823,93 @@ class MainLauncher:
     def processCommunicators(self, workflow:Workflow, folder:Path = None) -> None:
         mpiCommLauncher = MPICommunicatorSetup()
         mpiCommLauncher.configureCommunicator(workflow=workflow, folder=folder)
-        zmqCommLauncher = ZMQCommunicatorSetup()
+        zmqCommLauncher = ZMQCommunicatorSetup(self.portAllocator)
         zmqCommLauncher.configureCommunicator(workflow=workflow, folder=folder)
+        shmCommLauncher = SHMCommunicatorSetup()
+        shmCommLauncher.configureCommunicator(workflow=workflow, folder=folder)
 
         self.launchers.append(mpiCommLauncher)
         self.launchers.append(zmqCommLauncher)
+        self.launchers.append(shmCommLauncher)
+        self.communicatorSetups = [mpiCommLauncher, zmqCommLauncher, shmCommLauncher]
+
+    def replaceFailedNodes(self, failedHosts:Iterable[str], spares:ComputeCollection, domain:ComputeDomain = ComputeDomain.SOCKET) -> dict:
+        # Move the tasks of the last generated workflow using failed hosts to spare cores, without generating
+        # the workflow again. Each affected task keeps its cores on the surviving hosts and receives as many cores
+        # from the spares as it lost, the spare cores already used by a task of the workflow being skipped.
+        # Only the affected tasks are placed again, the processes and ranks of the other tasks are reused, and only
+        # the communicators whose settings depend on the moved processes are updated before the files are rewritten.
+        # Return the names of the tasks moved, the global ranks and the communicators whose settings changed.
+        if self.workflow is None or self.taskSetup is None:
+            raise RuntimeError("No workflow generated by this launcher yet. Call generateOutputFiles() first.")
+        if self.cachedArtifacts is not None:
+            raise RuntimeError(f"The files of the workflow {self.workflow.getName()} were restored from the cache, its tasks were never placed by this launcher.")
+
+        # The hosts lost in previous calls are never used as spares again
+        self.failedHosts.update(failedHosts)
+        failedHosts = self.failedHosts
+        workflow = self.workflow
+        affectedTasks = []
+        lostCores = []
+        usedCores = set()
+        for task in workflow.getTasks():
+            coreTable = task.getResources().getCoreTable()
+            nbLost = 0
+            for i in range(coreTable.getNbCores()):
+                hostname = coreTable.getHostName(i)
+                usedCores.add((hostname, coreTable.mainThreads[i]))
+                if hostname in failedHosts:
+                    nbLost += 1
+            if nbLost > 0:
+                affectedTasks.append(task)
+                lostCores.append(nbLost)
+
+        result = {}
+        result["tasks"] = [task.getName() for task in affectedTasks]
+        result["ranks"] = []
+        result["communicators"] = []
+        if len(affectedTasks) == 0:
+            return result
+
+        available = spares.excludeHosts(failedHosts).excludeCores(usedCores)
+        if available.getCoreTable().getNbCores() < sum(lostCores):
+            raise ValueError(f"The failed hosts {sorted(failedHosts)} ran {sum(lostCores)} cores of the workflow {workflow.getName()} but only {available.getCoreTable().getNbCores()} spare cores are available.")
+        (partitions, _) = available.splitByCoreDemands(lostCores, domain)
+        for task, partition in zip(affectedTasks, partitions):
+            resources = task.getResources()
+            task.setResources(resources.excludeHosts(failedHosts).mergeWith(partition))
+
+        result["ranks"] = self.taskSetup.reassignProcesses(workflow, affectedTasks)
+
+        # The processes of the moved tasks are new objects, the communicators need the new lists
+        self.forwardProcessesToCommunicators(workflow)
+        taskNames = set(result["tasks"])
+        for setup in self.communicatorSetups:
+            result["communicators"] += setup.updateCommunicators(workflow, taskNames)
+
+        workflow.generateWorkflowConfiguration(self.folder)
+        return result
+
+    def getWorkflow(self) -> Workflow:
+        return self.workflow
+
+    def getPortAllocator(self) -> ZMQPortAllocator:
+        return self.portAllocator
+
+    def getCommandFile(self) -> Path:
+        if self.cachedArtifacts is not None:
+            return self.cachedArtifacts.getCommandFile()
+        if self.taskSetup is None or self.taskSetup.commandfilePath is None:
+            raise RuntimeError("No command file generated yet. Call generateOutputFiles() first.")
+        return self.taskSetup.commandfilePath
 
     def removeFiles(self) -> None:
+        if self.cachedArtifacts is not None:
+            for path in self.cachedArtifacts.getFiles():
+                if path.is_file():
+                    path.unlink()
         for launcher in self.launchers:
             launcher.removeFiles()
         if self.workflow is not None:
-            self.workflow.removeFiles()
+            self.workflow.removeFiles(self.folder)
 
@@ -0,0 +1,126 @@
+from godrick.workflow import Workflow
+from godrick.computeResources import ComputeCollection, ComputeDomain
+from typing import Dict, List, Tuple
+
+
+def estimateCrossNodeTraffic(workflow:Workflow) -> float:
+    # Estimate the traffic crossing node boundaries with the resources currently assigned to the tasks.
+    # The cores of a task are assumed to send and receive the same amount of data, so the fraction of the
+    # traffic of a communicator staying on a node is the product of the fractions of both tasks on that node.
+    distributions = {}
+    for task in workflow.getTasks():
+        resources = task.getResources()
+        if resources is None:
+            continue
+        table = resources.getCoreTable()
+        nbCores = table.getNbCores()
+        if nbCores == 0:
+            continue
+        distribution = {}
+        for start, end in table.getNodeRanges():
+            if end > start:
+                hostname = table.hostnames[table.nodeIds[start]]
+                distribution[hostname] = distribution.get(hostname, 0.0) + (end - start) / nbCores
+        distributions[task.getName()] = distribution
+
+    result = 0.0
+    for (taskA, taskB), traffic in workflow.getCommunicationGraph().items():
+        if taskA not in distributions or taskB not in distributions:
+            raise ValueError(f"Unable to estimate the traffic between the tasks {taskA} and {taskB}, one of them has no resources assigned.")
+        local = 0.0
+        for hostname, fraction in distributions[taskA].items():
+            local += fraction * distributions[taskB].get(hostname, 0.0)
+        result += traffic * (1.0 - local)
+    return result
+
+
+class CommunicationAwarePlacement():
+    # Assign partitions of a ComputeCollection to the tasks of a workflow so that tasks exchanging the most
+    # data through paired communicators share nodes, and sockets when possible. Tasks are placed one at a time,
+    # starting from the most connected one and then always picking the task with the most traffic towards the
+    # tasks already placed (greedy graph growing). Each task goes to the domain with the highest affinity with
+    # its already placed neighbors, falling back to the best fitting domain.
+    def __init__(self, resources:ComputeCollection, domain:ComputeDomain = ComputeDomain.SOCKET) -> None:
+        self.resources = resources
+        self.domain = domain
+        self.crossNodeTraffic = 0.0
+
+    def computePlacementOrder(self, graph:dict, demands:Dict[str, int]) -> Tuple[List[str], dict]:
+        # Returns the order in which the tasks are placed and the traffic between each task and its neighbors
+        neighbors = {name: {} for name in demands.keys()}
+        for (taskA, taskB), traffic in graph.items():
+            if taskA in neighbors and taskB in neighbors and taskA != taskB:
+                neighbors[taskA][taskB] = neighbors[taskA].get(taskB, 0.0) + traffic
+                neighbors[taskB][taskA] = neighbors[taskB].get(taskA, 0.0) + traffic
+
+        degrees = {name: sum(edges.values()) for name, edges in neighbors.items()}
+        order = []
+        remaining = list(demands.keys())
+        while len(remaining) > 0:
+            def priority(name:str):
+                placedTraffic = sum(traffic for neighbor, traffic in neighbors[name].items() if neighbor in order)
+                return (placedTraffic, degrees[name], demands[name])
+            best = max(remaining, key=priority)
+            order.append(best)
+            remaining.remove(best)
+        return order, neighbors
+
+    def assignResources(self, workflow:Workflow, demands:Dict[str, int]) -> float:
+        # demands: number of cores for each task to place. Returns the estimated cross-node traffic of the placement.
+        if len(demands) == 0:
+            raise ValueError("No core demands given for the placement.")
+        for name, demand in demands.items():
+            if not workflow.hasTask(name):
+                raise ValueError(f"Core demand given for the task {name} but the task is not declared in the workflow {workflow.getName()}.")
+            if demand < 1:
+                raise ValueError(f"The core demand of the task {name} has to be equal or greater than 1.")
+        nbCores = self.resources.getCoreTable().getNbCores()
+        if sum(demands.values()) > nbCores:
+            raise ValueError(f"Requested {sum(demands.values())} cores from the cluster {self.resources.name}, but only {nbCores} are available.")
+
+        domains = self.resources.listDomains(self.domain)
+        order, neighbors = self.computePlacementOrder(workflow.getCommunicationGraph(), demands)
+
+        # Number of cores of each placed task per node and per socket
+        coresPerNode = {}
+        coresPerSocket = {}
+
+        def freeCores(entry:list) -> int:
+            return len(entry[2]) - entry[3]
+
+        def affinity(name:str, entry:list) -> float:
+            score = 0.0
+            for neighbor, traffic in neighbors[name].items():
+                if neighbor not in coresPerNode:
+                    continue
+                score += traffic * coresPerNode[neighbor].get(entry[0], 0) / demands[neighbor]
+                score += traffic * coresPerSocket[neighbor].get((entry[0], entry[1]), 0) / demands[neighbor]
+            return score
+
+        for name in order:
+            remaining = demands[name]
+            allocation = []     # List of (domain, first taken, last taken)
+            coresPerNode[name] = {}
+            coresPerSocket[name] = {}
+            while remaining > 0:
+                available = [entry for entry in domains if freeCores(entry) > 0]
+                candidates = [entry for entry in available if freeCores(entry) >= remaining]
+                if len(candidates) > 0:
+                    entry = max(candidates, key=lambda entry: (affinity(name, entry), -freeCores(entry)))
+                    count = remaining
+                else:
+                    entry = max(available, key=lambda entry: (affinity(name, entry), freeCores(entry)))
+                    count = freeCores(entry)
+                allocation.append((entry, entry[3], entry[3] + count))
+                entry[3] += count
+                remaining -= count
+                coresPerNode[name][entry[0]] = coresPerNode[name].get(entry[0], 0) + count
+                coresPerSocket[name][(entry[0], entry[1])] = coresPerSocket[name].get((entry[0], entry[1]), 0) + count
+
+            workflow.getTaskByName(name).setResources(self.resources.createPartition(f"{self.resources.name}-{name}", allocation))
+
+        self.crossNodeTraffic = estimateCrossNodeTraffic(workflow)
+        return self.crossNodeTraffic
+
+    def getCrossNodeTraffic(self) -> float:
+        return self.crossNodeTraffic
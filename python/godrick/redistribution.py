@@ -0,0 +1,98 @@
+from typing import List, Tuple, Sequence
+
+import itertools
+
+# Regular block decomposition of a global array over a grid of ranks. Along each dimension, the block i
+# of p blocks covers [i * n // p, (i + 1) * n // p[, so the blocks differ by at most one element.
+# Ranks are numbered in row-major order over the grid, the last dimension being the fastest.
+
+def getBlockRange(size:int, nbBlocks:int, index:int) -> Tuple[int, int]:
+    return index * size // nbBlocks, (index + 1) * size // nbBlocks
+
+def getBlockOwner(size:int, nbBlocks:int, position:int) -> int:
+    # Index of the block containing the global position, inverse of getBlockRange
+    return ((position + 1) * nbBlocks - 1) // size
+
+def getGridCoordinates(grid:Sequence[int], rank:int) -> List[int]:
+    coordinates = []
+    for nbBlocks in reversed(grid):
+        coordinates.append(rank % nbBlocks)
+        rank //= nbBlocks
+    return list(reversed(coordinates))
+
+def getGridRank(grid:Sequence[int], coordinates:Sequence[int]) -> int:
+    rank = 0
+    for nbBlocks, coordinate in zip(grid, coordinates):
+        rank = rank * nbBlocks + coordinate
+    return rank
+
+def getBlock(extent:Sequence[int], grid:Sequence[int], rank:int) -> Tuple[List[int], List[int]]:
+    # Global start and number of elements along each dimension of the block owned by a rank
+    start = []
+    count = []
+    for size, nbBlocks, coordinate in zip(extent, grid, getGridCoordinates(grid, rank)):
+        (first, end) = getBlockRange(size, nbBlocks, coordinate)
+        start.append(first)
+        count.append(end - first)
+    return start, count
+
+def checkDecomposition(extent:Sequence[int], grid:Sequence[int]) -> None:
+    if len(extent) == 0:
+        raise ValueError("The global extent of a block decomposition needs at least one dimension.")
+    if len(grid) != len(extent):
+        raise ValueError(f"The grid {list(grid)} does not have the same number of dimensions as the extent {list(extent)}.")
+    if any(size < 1 for size in extent):
+        raise ValueError(f"All the dimensions of the extent {list(extent)} must be at least 1.")
+    if any(nbBlocks < 1 for nbBlocks in grid):
+        raise ValueError(f"All the dimensions of the grid {list(grid)} must be at least 1.")
+    # Every rank must own at least one element, a rank with an empty block would never receive anything
+    if any(nbBlocks > size for size, nbBlocks in zip(extent, grid)):
+        raise ValueError(f"The grid {list(grid)} has more blocks than elements along a dimension of the extent {list(extent)}.")
+
+def getGridSize(grid:Sequence[int]) -> int:
+    result = 1
+    for nbBlocks in grid:
+        result *= nbBlocks
+    return result
+
+def computeOverlapPlan(extent:Sequence[int], senderGrid:Sequence[int], receiverGrid:Sequence[int]) -> dict:
+    # Exact list of the boxes each sender rank sends to each receiver rank when moving from the sender
+    # decomposition to the receiver decomposition. Boxes are in global indices. The overlaps are found
+    # dimension by dimension, only visiting the receiver blocks intersecting each sender block.
+    checkDecomposition(extent, senderGrid)
+    checkDecomposition(extent, receiverGrid)
+
+    # overlaps[d][i] lists (j, start, count) for the receiver blocks j intersecting the sender block i along the dimension d
+    overlaps = []
+    for size, nbSenders, nbReceivers in zip(extent, senderGrid, receiverGrid):
+        dimension = []
+        for i in range(nbSenders):
+            (first, end) = getBlockRange(size, nbSenders, i)
+            entries = []
+            if end > first:
+                for j in range(getBlockOwner(size, nbReceivers, first), getBlockOwner(size, nbReceivers, end - 1) + 1):
+                    (receiverFirst, receiverEnd) = getBlockRange(size, nbReceivers, j)
+                    start = max(first, receiverFirst)
+                    entries.append((j, start, min(end, receiverEnd) - start))
+            dimension.append(entries)
+        overlaps.append(dimension)
+
+    nbSenders = getGridSize(senderGrid)
+    nbReceivers = getGridSize(receiverGrid)
+    sends = [[] for _ in range(nbSenders)]
+    receives = [[] for _ in range(nbReceivers)]
+    for sender in range(nbSenders):
+        coordinates = getGridCoordinates(senderGrid, sender)
+        for box in itertools.product(*[overlaps[d][coordinate] for d, coordinate in enumerate(coordinates)]):
+            receiver = getGridRank(receiverGrid, [entry[0] for entry in box])
+            start = [entry[1] for entry in box]
+            count = [entry[2] for entry in box]
+            sends[sender].append({"rank": receiver, "start": start, "count": count})
+            receives[receiver].append({"rank": sender, "start": start, "count": count})
+
+    plan = {}
+    plan["senderBlocks"] = [dict(zip(["start", "count"], getBlock(extent, senderGrid, rank))) for rank in range(nbSenders)]
+    plan["receiverBlocks"] = [dict(zip(["start", "count"], getBlock(extent, receiverGrid, rank))) for rank in range(nbReceivers)]
+    plan["sends"] = sends
+    plan["receives"] = receives
+    return plan
@@ -0,0 +1,338 @@
+from godrick.workflow import Workflow
+from godrick.communicator import CommunicatorTransportType, PairedCommunicator, MPICommunicatorProtocol, ZMQCommunicatorProtocol
+from typing import Callable, Dict, Union
+
+import heapq
+import math
+
+# Default high water mark of the ZMQ sockets
+ZMQ_DEFAULT_HWM = 1000
+
+# Types of the events of the simulation
+TASK_DONE = 0
+MESSAGE_DELIVERED = 1
+
+class LinkModel():
+    def __init__(self, bandwidth:float = math.inf, latency:float = 0.0, messageSize:float = 0.0, queueSize:int = -1) -> None:
+        # bandwidth in bytes/s, latency in s, messageSize in bytes.
+        # queueSize is the number of messages which can be queued on the link, -1 for the default of the transport
+        if bandwidth <= 0:
+            raise ValueError(f"The bandwidth of a link must be positive, got {bandwidth}.")
+        if latency < 0 or messageSize < 0:
+            raise ValueError("The latency and message size of a link cannot be negative.")
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.messageSize = messageSize
+        self.queueSize = queueSize
+
+    def getTransferTime(self, nbSteps:int = 1) -> float:
+        # Time during which the link is occupied by a message, nbSteps serialized copies of it
+        return nbSteps * self.messageSize / self.bandwidth
+
+class SimulatedTask():
+    def __init__(self, name:str, serviceTime:Union[float, Callable[[int], float]]) -> None:
+        self.name = name
+        self.serviceTime = serviceTime
+        self.inputs = []
+        self.outputs = []
+
+        self.iteration = 0
+        self.busy = False
+        self.nextOutput = -1        # Index of the next output to send to, -1 when not sending
+        self.waitingLink = None     # Link of a blocking send not delivered yet
+        self.startTime = 0.0
+        self.busyTime = 0.0
+        self.blockedTime = 0.0
+        self.blockedSince = -1.0
+        self.completionTimes = []
+
+    def getServiceTime(self) -> float:
+        if callable(self.serviceTime):
+            return self.serviceTime(self.iteration)
+        return self.serviceTime
+
+class SimulatedLink():
+    def __init__(self, name:str, sender:SimulatedTask, receiver:SimulatedTask, model:LinkModel, capacity:int, nbSteps:int, blockingSend:bool, dropWhenFull:bool, nbTokens:int) -> None:
+        self.name = name
+        self.sender = sender
+        self.receiver = receiver
+        self.model = model
+        self.capacity = capacity
+        self.nbSteps = nbSteps
+        self.blockingSend = blockingSend    # The sender waits for the message to be delivered (MPI)
+        self.dropWhenFull = dropWhenFull    # Messages sent to a full queue are lost (ZMQ PUB_SUB)
+        self.tokens = nbTokens
+
+        self.inFlight = 0
+        self.delivered = 0
+        self.linkFreeTime = 0.0
+        self.linkBusyTime = 0.0
+        self.nbSent = 0
+        self.nbDropped = 0
+
+    def isFull(self) -> bool:
+        return self.inFlight + self.delivered >= self.capacity
+
+    def hasInput(self) -> bool:
+        return self.tokens > 0 or self.delivered > 0
+
+class SimulationReport():
+    def __init__(self, duration:float, throughput:float, utilization:Dict[str, float], capacity:Dict[str, float], blocked:Dict[str, float], linkUtilization:Dict[str, float], linkBlocked:Dict[str, float], nbSent:Dict[str, int], nbDropped:Dict[str, int], iterations:Dict[str, int]) -> None:
+        self.duration = duration
+        self.throughput = throughput
+        self.utilization = utilization
+        self.capacity = capacity
+        self.blocked = blocked
+        self.linkUtilization = linkUtilization
+        self.linkBlocked = linkBlocked
+        self.nbSent = nbSent
+        self.nbDropped = nbDropped
+        self.iterations = iterations
+
+    def getDuration(self) -> float:
+        return self.duration
+
+    def getThroughput(self) -> float:
+        # Steady-state iterations per second of the slowest sink task
+        return self.throughput
+
+    def getUtilization(self, taskName:str) -> float:
+        return self.utilization[taskName]
+
+    def getBlockedFraction(self, taskName:str) -> float:
+        return self.blocked[taskName]
+
+    def getLinkUtilization(self, communicatorName:str) -> float:
+        return self.linkUtilization[communicatorName]
+
+    def getNbMessages(self, communicatorName:str) -> int:
+        return self.nbSent[communicatorName]
+
+    def getNbDropped(self, communicatorName:str) -> int:
+        return self.nbDropped[communicatorName]
+
+    def getNbIterations(self, taskName:str) -> int:
+        return self.iterations[taskName]
+
+    def getCapacity(self, taskName:str) -> float:
+        # Iterations per second the task could sustain if it never waited
+        return self.capacity[taskName]
+
+    def getBottleneckTask(self) -> str:
+        # Sources are busy all the time, the bottleneck is the task with the lowest capacity
+        return min(self.capacity, key=self.capacity.get)
+
+    def getBottleneckCommunicator(self) -> str:
+        # The busiest link, or the one blocking its sender the most when no link is busier
+        if len(self.linkUtilization) == 0:
+            return None
+        return max(self.linkUtilization, key=lambda name: (round(self.linkUtilization[name], 6), self.linkBlocked[name]))
+
+    def toDict(self) -> dict:
+        result = {}
+        result["duration"] = self.duration
+        result["throughput"] = self.throughput
+        result["utilization"] = self.utilization
+        result["capacity"] = self.capacity
+        result["blocked"] = self.blocked
+        result["linkUtilization"] = self.linkUtilization
+        result["linkBlocked"] = self.linkBlocked
+        result["bottleneckTask"] = self.getBottleneckTask()
+        result["bottleneckCommunicator"] = self.getBottleneckCommunicator()
+        return result
+
+class WorkflowSimulator():
+    # Discrete-event simulation of the message flow of a configured workflow.
+    # Every task loops over: receive one message (or token) on each input, compute, send one message on each output.
+    def __init__(self, workflow:Workflow, serviceTimes:Dict[str, Union[float, Callable[[int], float]]], linkModels:Dict[str, LinkModel] = {}) -> None:
+        self.workflow = workflow
+        self.serviceTimes = serviceTimes
+        self.linkModels = linkModels
+
+    def buildModel(self) -> None:
+        self.tasks = {}
+        for task in self.workflow.getTasks():
+            if task.getName() not in self.serviceTimes:
+                raise ValueError(f"No service time model provided for the task {task.getName()}.")
+            self.tasks[task.getName()] = SimulatedTask(task.getName(), self.serviceTimes[task.getName()])
+
+        # Gates connect to the outside of the workflow, their side is assumed to never be a bottleneck
+        self.links = []
+        for comm in self.workflow.getCommunicators():
+            if not isinstance(comm, PairedCommunicator):
+                continue
+            sender = self.tasks[comm.getOutputTaskName()]
+            receiver = self.tasks[comm.getInputTaskName()]
+            model = self.linkModels.get(comm.getName(), LinkModel())
+
+            if comm.getCommunicatorTransportType() == CommunicatorTransportType.MPI:
+                # The MPI protocols complete the transfer before returning from send, one message at a time
+                nbSenders = self.workflow.getTaskByName(comm.getOutputTaskName()).getGlobalNbRank()
+                nbReceivers = self.workflow.getTaskByName(comm.getInputTaskName()).getGlobalNbRank()
+                if nbSenders < 1 or nbReceivers < 1:
+                    raise RuntimeError(f"The MPI ranks of the communicator {comm.getName()} are not set. Generate the launch files of the workflow first.")
+                if comm.protocol == MPICommunicatorProtocol.BROADCAST:
+                    nbSteps = math.ceil(math.log2(nbReceivers + 1))     # Broadcast tree
+                else:
+                    nbSteps = max(nbSenders, nbReceivers) // min(nbSenders, nbReceivers)
+                capacity = model.queueSize if model.queueSize > 0 else 1
+                link = SimulatedLink(comm.getName(), sender, receiver, model, capacity, nbSteps, True, False, comm.nbTokens)
+            elif comm.getCommunicatorTransportType() == CommunicatorTransportType.SHM:
+                # The sender waits for a free slot of the ring, nothing is dropped
+                capacity = model.queueSize if model.queueSize > 0 else comm.capacity
+                link = SimulatedLink(comm.getName(), sender, receiver, model, capacity, 1, False, False, comm.nbTokens)
+            else:
+                capacity = model.queueSize if model.queueSize > 0 else ZMQ_DEFAULT_HWM
+                dropWhenFull = comm.protocol == ZMQCommunicatorProtocol.PUB_SUB
+                link = SimulatedLink(comm.getName(), sender, receiver, model, capacity, 1, False, dropWhenFull, comm.nbTokens)
+
+            sender.outputs.append(link)
+            receiver.inputs.append(link)
+            self.links.append(link)
+
+    def run(self, duration:float = math.inf, nbIterations:int = -1) -> SimulationReport:
+        # Simulate until the given time, or until the sources completed nbIterations iterations
+        if duration == math.inf and nbIterations < 0:
+            raise ValueError("The simulation needs either a duration or a number of iterations.")
+        self.buildModel()
+
+        self.events = []
+        self.eventCounter = 0
+        self.maxIterations = nbIterations
+        now = 0.0
+
+        for task in self.tasks.values():
+            self.tryStart(task, now)
+
+        while len(self.events) > 0:
+            (time, _, eventType, target) = heapq.heappop(self.events)
+            if time > duration:
+                break
+            now = time
+            if eventType == TASK_DONE:
+                target.busyTime += now - target.startTime
+                target.nextOutput = 0
+                self.sendOutputs(target, now)
+            else:
+                self.deliverMessage(target, now)
+
+        end = min(now, duration) if duration != math.inf else now
+        return self.makeReport(end)
+
+    def schedule(self, time:float, eventType:int, target) -> None:
+        # The counter keeps the order of the events scheduled at the same time
+        heapq.heappush(self.events, (time, self.eventCounter, eventType, target))
+        self.eventCounter += 1
+
+    def tryStart(self, task:SimulatedTask, now:float) -> None:
+        if task.busy or task.nextOutput >= 0:
+            return
+        if self.maxIterations >= 0 and task.iteration >= self.maxIterations:
+            return
+        for link in task.inputs:
+            if not link.hasInput():
+                return
+
+        # Consume one token or message on each input
+        for link in task.inputs:
+            if link.tokens > 0:
+                link.tokens -= 1
+            else:
+                link.delivered -= 1
+                if link.sender.nextOutput >= 0:
+                    self.sendOutputs(link.sender, now)
+
+        task.busy = True
+        task.startTime = now
+        self.schedule(now + task.getServiceTime(), TASK_DONE, task)
+
+    def sendOutputs(self, task:SimulatedTask, now:float) -> None:
+        # Send on the outputs in order, stopping at the first link which cannot take the message yet
+        if task.waitingLink is not None:
+            return
+        while task.nextOutput < len(task.outputs):
+            link = task.outputs[task.nextOutput]
+            if link.isFull() and not link.dropWhenFull:
+                if task.blockedSince < 0:
+                    task.blockedSince = now
+                return
+            if task.blockedSince >= 0:
+                task.blockedTime += now - task.blockedSince
+                task.blockedSince = -1.0
+
+            task.nextOutput += 1
+            link.nbSent += 1
+            if link.isFull():
+                link.nbDropped += 1
+                continue
+
+            start = max(now, link.linkFreeTime)
+            transferTime = link.model.getTransferTime(link.nbSteps)
+            link.linkFreeTime = start + transferTime
+            link.linkBusyTime += transferTime
+            link.inFlight += 1
+            self.schedule(link.linkFreeTime + link.model.latency * link.nbSteps, MESSAGE_DELIVERED, link)
+            if link.blockingSend:
+                # The sender resumes its outputs once the message is delivered
+                task.waitingLink = link
+                return
+
+        self.completeIteration(task, now)
+
+    def deliverMessage(self, link:SimulatedLink, now:float) -> None:
+        link.inFlight -= 1
+        link.delivered += 1
+        if link.sender.waitingLink is link:
+            link.sender.waitingLink = None
+            self.sendOutputs(link.sender, now)
+        self.tryStart(link.receiver, now)
+
+    def completeIteration(self, task:SimulatedTask, now:float) -> None:
+        task.busy = False
+        task.nextOutput = -1
+        task.iteration += 1
+        task.completionTimes.append(now)
+        self.tryStart(task, now)
+
+    def makeReport(self, end:float) -> SimulationReport:
+        utilization = {}
+        capacity = {}
+        blocked = {}
+        iterations = {}
+        for name, task in self.tasks.items():
+            busyTime = task.busyTime + (end - task.startTime if task.busy and task.nextOutput < 0 else 0.0)
+            blockedTime = task.blockedTime + (end - task.blockedSince if task.blockedSince >= 0 else 0.0)
+            utilization[name] = busyTime / end if end > 0 else 0.0
+            capacity[name] = task.iteration / task.busyTime if task.busyTime > 0 else math.inf
+            blocked[name] = blockedTime / end if end > 0 else 0.0
+            iterations[name] = task.iteration
+
+        linkUtilization = {}
+        linkBlocked = {}        # Blocked fraction of the sender of each link
+        nbSent = {}
+        nbDropped = {}
+        for link in self.links:
+            linkUtilization[link.name] = min(link.linkBusyTime, end) / end if end > 0 else 0.0
+            nbSent[link.name] = link.nbSent
+            nbDropped[link.name] = link.nbDropped
+            linkBlocked[link.name] = blocked[link.sender.name]
+
+        return SimulationReport(end, self.getSteadyThroughput(), utilization, capacity, blocked, linkUtilization, linkBlocked, nbSent, nbDropped, iterations)
+
+    def getSteadyThroughput(self) -> float:
+        # Rate of the slowest sink over the second half of its iterations, leaving out the warm-up
+        sinks = [task for task in self.tasks.values() if len(task.outputs) == 0]
+        if len(sinks) == 0:
+            sinks = list(self.tasks.values())
+        rates = []
+        for task in sinks:
+            times = task.completionTimes
+            if len(times) < 2:
+                rates.append(0.0)
+                continue
+            first = len(times) // 2
+            if first == len(times) - 1:
+                first = 0
+            elapsed = times[-1] - times[first]
+            rates.append((len(times) - 1 - first) / elapsed if elapsed > 0 else math.inf)
+        return min(rates)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from godrick.computeResources import ComputeCollection
 from godrick.port import InputPort, OutputPort
 from enum import Enum
-from typing import List
+from typing import List, Tuple, Callable, Union, Sequence
 import copy
 
 class TaskType(Enum):
@@ -65,7 +65,11 @@ class Task():
 
     def addProcess(self, process:Process) -> None:
         self.processes.append(process)
-    
+
+    def clearProcesses(self) -> None:
+        # Drop the processes of the task before a launcher places it again
+        self.processes = []
+
     def hasBeenProcessed(self) -> bool:
         return self.processedByLauncher
     
@@ -102,17 +106,34 @@ class SingletonTask(Task):
     def __init__(self, name:str = "defaultSingletonTaskName", cmdline:str = "", resources:ComputeCollection = None) -> None:
         super().__init__(TaskType.SINGLETON, name, cmdline, resources)  
 
+        self.processes = []
+
+    def getProcessList(self) -> List[Process]:
+        if not self.processedByLauncher:
+            raise RuntimeError(f"The Task {self.name} has not being processed yet, unable to determine the process list.")
+        return self.processes
+
 class MPIPlacementPolicy(Enum):
     ONETASKPERCORE = 0,
     ONETASKPERSOCKET = 1,
     ONETASKPERNODE = 2,
-    USERDEFINED = 3
+    USERDEFINED = 3,
+    RANKSPERSOCKET = 4
 
 class MPITask(Task):
     def __init__(self, name:str = "defaultMPITask", cmdline:str = "", resources:ComputeCollection = None, placementPolicy:MPIPlacementPolicy = MPIPlacementPolicy.ONETASKPERCORE) -> None:
         super().__init__(TaskType.MPI, name, cmdline, resources)
         self.placementPolicy = placementPolicy
 
+        # Rank map used by the USERDEFINED placement policy
+        self.rankMap = None
+        self.rankMapSize = -1
+
+        # Layout used by the RANKSPERSOCKET placement policy
+        self.ranksPerSocket = 1
+        self.coresPerRank = 1
+        self.useHTSiblings = False
+
         # Values which will be used to map the ranks of the global MPI application
         # as defined by the MPILauncher to the local ranks for the task
         self.startRank = -1
@@ -122,6 +143,45 @@ class MPITask(Task):
 
     def getPlacementPolicy(self) -> MPIPlacementPolicy:
         return self.placementPolicy
+
+    def setRankMap(self, rankMap:Union[Sequence[Tuple[str, List[int]]], Callable[[int], Tuple[str, List[int]]]], nbRanks:int = -1) -> None:
+        # Set the placement of each rank for the USERDEFINED placement policy.
+        # rankMap is either a sequence where the entry i is the (hostname, list of cores) of the rank i, 
+        # or a callable returning the (hostname, list of cores) of a given rank. A callable requires nbRanks.
+        if callable(rankMap):
+            if nbRanks < 1:
+                raise ValueError(f"A callable rank map requires the number of ranks of the task {self.name}.")
+            self.rankMapSize = nbRanks
+        else:
+            if len(rankMap) == 0:
+                raise ValueError(f"The rank map of the task {self.name} is empty.")
+            if nbRanks > 0 and nbRanks != len(rankMap):
+                raise ValueError(f"The rank map of the task {self.name} has {len(rankMap)} entries but {nbRanks} ranks were requested.")
+            self.rankMapSize = len(rankMap)
+        self.rankMap = rankMap
+        self.placementPolicy = MPIPlacementPolicy.USERDEFINED
+
+    def setHybridLayout(self, ranksPerSocket:int, coresPerRank:int, useHTSiblings:bool = False) -> None:
+        # Place ranksPerSocket ranks on each socket, each rank getting coresPerRank cores for its threads.
+        # If useHTSiblings is set, the hyperthreads of the cores are added to the rank as well.
+        if ranksPerSocket < 1:
+            raise ValueError(f"The number of ranks per socket of the task {self.name} must be at least 1, got {ranksPerSocket}.")
+        if coresPerRank < 1:
+            raise ValueError(f"The number of cores per rank of the task {self.name} must be at least 1, got {coresPerRank}.")
+        self.ranksPerSocket = ranksPerSocket
+        self.coresPerRank = coresPerRank
+        self.useHTSiblings = useHTSiblings
+        self.placementPolicy = MPIPlacementPolicy.RANKSPERSOCKET
+
+    def getHybridLayout(self) -> Tuple[int, int, bool]:
+        return self.ranksPerSocket, self.coresPerRank, self.useHTSiblings
+
+    def getRankMap(self) -> List[Tuple[str, List[int]]]:
+        if self.rankMap is None:
+            raise RuntimeError(f"The task {self.name} uses the USERDEFINED placement policy but no rank map was provided.")
+        if callable(self.rankMap):
+            return [self.rankMap(rank) for rank in range(self.rankMapSize)]
+        return list(self.rankMap)
     
     def setGlobalRanks(self, start:int, size:int) -> None:
         self.startRank = start
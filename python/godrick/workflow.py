@@ -62,6 +62,16 @@ class Workflow:
                 result.append(comm)
         return result
     
+    def getCommunicationGraph(self) -> dict:
+        # Returns the traffic between each pair of tasks connected by paired communicators, keyed by the sorted pair of task names
+        graph = {}
+        for comm in self.communicators.values():
+            if not comm.isPairedCommunicator():
+                continue
+            edge = tuple(sorted((comm.getOutputTaskName(), comm.getInputTaskName())))
+            graph[edge] = graph.get(edge, 0.0) + comm.getTraffic()
+        return graph
+
     def getName(self) -> str:
         return self.name
     
@@ -120,12 +130,16 @@ class Workflow:
                 json.dump(gateConfig, f, indent=4)
                 f.close()
 
-    def removeFiles(self) -> None:
+    def removeFiles(self, folder:Path = None) -> None:
         configFile = Path(self.getConfigurationFile())
+        if folder is not None:
+            configFile = folder / configFile
         if configFile.is_file():
             configFile.unlink()
 
         gateFile = Path(self.getGatesFile())
+        if folder is not None:
+            gateFile = folder / gateFile
         if gateFile.is_file():
             gateFile.unlink()
 
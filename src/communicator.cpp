@@ -1,4 +1,5 @@
 #include <godrick/communicator.h>
+#include <godrick/messageUtils.h>
 
 #include <spdlog/spdlog.h>
 
@@ -28,6 +29,78 @@ bool godrick::Communicator::initFromJSON(json& data, const std::string& taskName
     }
     m_msgFormat = strToMessageFormat.at(msgFormat);
 
+    // Configuration files written before the schema modes send the schema with every message
+    std::string schemaMode = data.value("schemaMode", "ALWAYS");
+    if(!strToSchemaMode.contains(schemaMode))
+    {
+        spdlog::error("Unknown schema mode {} received for the Communicator {}.", schemaMode, m_name);
+        return false;
+    }
+    m_schemaMode = strToSchemaMode.at(schemaMode);
+
+    // Configuration files written before the batching policy send every message on its own
+    if(data.contains("batching"))
+    {
+        auto& batching = data.at("batching");
+        m_batchMaxCount = batching.value("maxCount", 1u);
+        m_batchMaxBytes = batching.value("maxBytes", uint64_t(0));
+        m_batchMaxLinger = batching.value("maxLinger", 0.0);
+        if(m_batchMaxCount < 1)
+        {
+            spdlog::error("The batches of the Communicator {} must hold at least 1 message.", m_name);
+            return false;
+        }
+    }
+
+    return true;
+}
+
+bool godrick::Communicator::sendBatched(conduit::Node& data)
+{
+    if(m_batchMaxCount <= 1)
+        return send(data);
+
+    // The terminate message is never batched so the receiver gets all the pending messages before it
+    if(godrick::isTerminateMessage(data))
+        return sendBatch() && send(data);
+
+    if(m_batchCount == 0)
+        m_batchStart = std::chrono::steady_clock::now();
+    godrick::appendBatchMessage(m_batch, data);
+    m_batchCount += 1;
+    m_batchBytes += static_cast<uint64_t>(data.total_bytes_compact());
+
+    // Without a background thread, the linger time is only checked when a message is pushed or the port is flushed
+    std::chrono::duration<double> linger = std::chrono::steady_clock::now() - m_batchStart;
+    if(m_batchCount >= m_batchMaxCount || (m_batchMaxBytes > 0 && m_batchBytes >= m_batchMaxBytes) || (m_batchMaxLinger > 0.0 && linger.count() >= m_batchMaxLinger))
+        return sendBatch();
 
     return true;
-}
\ No newline at end of file
+}
+
+bool godrick::Communicator::sendBatch()
+{
+    if(m_batchCount == 0)
+        return true;
+
+    bool result = send(m_batch);
+    m_batch.reset();
+    m_batchCount = 0;
+    m_batchBytes = 0;
+    return result;
+}
+
+void godrick::Communicator::flushBatched()
+{
+    sendBatch();
+    flush();
+}
+
+godrick::MessageResponse godrick::Communicator::receiveBatched(std::vector<conduit::Node>& data)
+{
+    // The receiver may not batch while its sender does (gates), so the batches are always unpacked
+    MessageResponse result = receive(data);
+    if(result == MessageResponse::MESSAGES)
+        godrick::unpackBatchMessages(data);
+    return result;
+}
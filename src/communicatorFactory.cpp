@@ -5,6 +5,9 @@
 #ifdef GODRICK_ZMQ
 #include <godrick/zmq/communicatorZMQ.h>
 #endif
+#ifdef GODRICK_SHM
+#include <godrick/shm/communicatorSHM.h>
+#endif
 
 #include <spdlog/spdlog.h>
 
@@ -28,6 +31,15 @@ std::shared_ptr<godrick::Communicator> godrick::createCommunicator(const std::st
         return nullptr;
 #endif
     }
+    if(type.compare("SHM") == 0)
+    {
+#ifdef GODRICK_SHM
+        return std::make_shared<godrick::shm::CommunicatorSHM>();
+#else
+        spdlog::error("Godrick was not compiled with shared memory support, unable to create a SHM communicator.");
+        return nullptr;
+#endif
+    }
     
     spdlog::error("Unknown communicator type {}.", type);
     return nullptr;
@@ -1,5 +1,12 @@
 #include <godrick/messageUtils.h>
 
+#include <algorithm>
+#include <cstring>
+#include <functional>
+#include <random>
+
+#include <spdlog/spdlog.h>
+
 void godrick::setTerminateMessage(conduit::Node& data)
 {
     uint8_t val = 0;
@@ -10,4 +17,161 @@ void godrick::setTerminateMessage(conduit::Node& data)
 bool godrick::isTerminateMessage(const conduit::Node& data)
 {
     return data.has_path("godrick/terminate");
-}
\ No newline at end of file
+}
+
+void godrick::appendBatchMessage(conduit::Node& batch, const conduit::Node& data)
+{
+    batch["godrick"]["batch"].append().set(data);
+}
+
+bool godrick::isBatchMessage(const conduit::Node& data)
+{
+    return data.has_path("godrick/batch");
+}
+
+void godrick::unpackBatchMessages(std::vector<conduit::Node>& data)
+{
+    if(std::none_of(data.begin(), data.end(), godrick::isBatchMessage))
+        return;
+
+    std::vector<conduit::Node> result;
+    for(auto & msg : data)
+    {
+        if(godrick::isBatchMessage(msg))
+        {
+            conduit::NodeIterator itr = msg["godrick"]["batch"].children();
+            while(itr.has_next())
+            {
+                result.emplace_back();
+                result.back().set(itr.next());
+            }
+        }
+        else
+        {
+            result.emplace_back();
+            result.back().swap(msg);
+        }
+    }
+    data.swap(result);
+}
+
+void godrick::packConduitMessage(conduit::Node& data, conduit::Node& message, SchemaMode mode, SchemaCache& cache)
+{
+    conduit::Schema s_data_compact;
+
+    // schema will only be valid if compact and contig
+    if( data.is_compact() && data.is_contiguous())
+    {
+        s_data_compact = data.schema();
+    }
+    else
+    {
+        data.schema().compact_to(s_data_compact);
+    }
+
+    // Comparing the schemas is cheaper than generating and parsing the json on both sides
+    bool onChange = (mode == SchemaMode::ON_CHANGE);
+    bool sendSchema = (!onChange || !cache.valid || !cache.schema.equals(s_data_compact));
+
+    std::string snd_schema_json;
+    conduit::Schema s_msg;
+    s_msg["schema_len"].set(conduit::DataType::int64());
+    if(onChange)
+    {
+        s_msg["sender"].set(conduit::DataType::uint64());
+        s_msg["schema_id"].set(conduit::DataType::uint64());
+    }
+    if(sendSchema)
+    {
+        snd_schema_json = s_data_compact.to_json();
+        s_msg["schema"].set(conduit::DataType::char8_str(static_cast<int64_t>(snd_schema_json.size()+1)));
+    }
+    s_msg["data"].set(s_data_compact);
+
+    // create a compact schema to use
+    conduit::Schema s_msg_compact;
+    s_msg.compact_to(s_msg_compact);
+
+    // The receiver keeps the last schema of each sender, told apart by a random key drawn by the sender
+    if(onChange && sendSchema)
+    {
+        if(!cache.valid)
+        {
+            std::random_device device;
+            cache.sender = (static_cast<uint64_t>(device()) << 32) | static_cast<uint64_t>(device());
+        }
+        cache.schema = s_data_compact;
+        cache.id = static_cast<uint64_t>(std::hash<std::string>{}(snd_schema_json));
+        cache.valid = true;
+    }
+
+    // these sets won't realloc since schemas are compatible
+    message.set(s_msg_compact);
+    message["schema_len"].set(static_cast<int64_t>(sendSchema ? snd_schema_json.length() : -1));
+    if(onChange)
+    {
+        message["sender"].set(static_cast<uint64_t>(cache.sender));
+        message["schema_id"].set(static_cast<uint64_t>(cache.id));
+    }
+    if(sendSchema)
+        message["schema"].set(snd_schema_json);
+    message["data"].update(data);
+}
+
+bool godrick::unpackConduitMessage(uint8_t* buffer, size_t size, conduit::Node& data, SchemaMode mode, SchemaCache& cache)
+{
+    bool onChange = (mode == SchemaMode::ON_CHANGE);
+    size_t headerSize = sizeof(int64_t) + (onChange ? 2 * sizeof(uint64_t) : 0);
+    if(size < headerSize)
+    {
+        spdlog::error("Received a message of {} bytes, too short to hold a conduit message.", size);
+        return false;
+    }
+
+    // length of the schema is sent as a 64-bit signed int, -1 when the schema is not repeated
+    int64_t schemaLen = 0;
+    memcpy(&schemaLen, buffer, sizeof(int64_t));
+    uint64_t sender = 0;
+    uint64_t schemaId = 0;
+    if(onChange)
+    {
+        memcpy(&sender, buffer + sizeof(int64_t), sizeof(uint64_t));
+        memcpy(&schemaId, buffer + sizeof(int64_t) + sizeof(uint64_t), sizeof(uint64_t));
+    }
+    uint8_t* n_buff_ptr = buffer + headerSize;
+
+    conduit::Schema rcv_schema;
+    conduit::Schema* schema = &rcv_schema;
+    if(schemaLen >= 0)
+    {
+        // create the schema, replacing the previous one of the sender in ON_CHANGE mode
+        if(onChange)
+        {
+            ReceivedSchema& received = cache.received[sender];
+            received.id = schemaId;
+            schema = &received.schema;
+        }
+        schema->reset();
+        conduit::Generator gen(std::string(reinterpret_cast<char*>(n_buff_ptr), static_cast<size_t>(schemaLen)));
+        gen.walk(*schema);
+
+        // advance by the schema length
+        n_buff_ptr += schemaLen + 1;
+    }
+    else
+    {
+        auto cached = cache.received.find(sender);
+        if(!onChange || cached == cache.received.end() || cached->second.id != schemaId)
+        {
+            spdlog::error("Received a message without schema but the schema {} is not the last one received from its sender.", schemaId);
+            return false;
+        }
+        schema = &cached->second.schema;
+    }
+
+    // apply the schema to the data and copy out to our result node
+    conduit::Node n_data;
+    n_data.set_external(*schema, n_buff_ptr);
+    data.update(n_data);
+    return true;
+}
@@ -0,0 +1,278 @@
+#include <godrick/mpi/blockRedistributeMPI.h>
+
+#include <climits>
+#include <cstring>
+
+#include <spdlog/spdlog.h>
+
+static godrick::mpi::RedistributionBox parseBox(const json& data)
+{
+    godrick::mpi::RedistributionBox box;
+    box.rank = data.value("rank", -1);
+    box.start = data.at("start").get<std::vector<int64_t>>();
+    box.count = data.at("count").get<std::vector<int64_t>>();
+    return box;
+}
+
+static int64_t getNbElements(const std::vector<int64_t>& count)
+{
+    int64_t result = 1;
+    for(auto & size : count)
+        result *= size;
+    return result;
+}
+
+// Copy the elements of a box between the row-major array of a block and a packed buffer holding the box
+// in row-major order. The last dimension of the box is contiguous in both, so it is copied one row at a time.
+static void copyBox(const godrick::mpi::RedistributionBox& block, const godrick::mpi::RedistributionBox& box, uint8_t* blockData, uint8_t* boxData, size_t elementBytes, bool toBox)
+{
+    size_t nbDims = block.count.size();
+    std::vector<int64_t> strides(nbDims, 1);
+    for(size_t d = nbDims - 1; d > 0; --d)
+        strides[d - 1] = strides[d] * block.count[d];
+
+    size_t rowBytes = static_cast<size_t>(box.count[nbDims - 1]) * elementBytes;
+    int64_t nbRows = getNbElements(box.count) / box.count[nbDims - 1];
+    std::vector<int64_t> index(nbDims, 0);
+    for(int64_t row = 0; row < nbRows; ++row)
+    {
+        int64_t offset = 0;
+        for(size_t d = 0; d < nbDims; ++d)
+            offset += (box.start[d] - block.start[d] + index[d]) * strides[d];
+
+        uint8_t* blockRow = blockData + static_cast<size_t>(offset) * elementBytes;
+        uint8_t* boxRow = boxData + static_cast<size_t>(row) * rowBytes;
+        if(toBox)
+            memcpy(boxRow, blockRow, rowBytes);
+        else
+            memcpy(blockRow, boxRow, rowBytes);
+
+        // Next row of the box, the last dimension is handled by the memcpy
+        for(size_t d = nbDims - 1; d > 0; --d)
+        {
+            index[d - 1] += 1;
+            if(index[d - 1] < box.count[d - 1])
+                break;
+            index[d - 1] = 0;
+        }
+    }
+}
+
+godrick::mpi::BlockRedistributeProtocolImplMPI::BlockRedistributeProtocolImplMPI(MPI_Comm comm,
+                    int localInStartRank,
+                    int localInSize,
+                    int localOutStartRank,
+                    int localOutSize,
+                    int localRank,
+                    bool isSource,
+                    const json& settings) : ProtocolImplMPI(comm, localInStartRank, localInSize, localOutStartRank, localOutSize, localRank, isSource)
+{
+    // The plan lists, for each sender, the boxes to send to each receiver and, for each receiver, the boxes to receive.
+    // Only the part concerning the local rank is kept.
+    m_field = settings.value("field", "data");
+    auto& plan = settings.at("plan");
+    bool isReceiver = localRank >= localInStartRank && localRank < localInStartRank + localInSize;
+    if(!isSource && !isReceiver)
+        return;
+
+    auto& blocks = plan.at(isSource ? "senderBlocks" : "receiverBlocks");
+    auto& boxes = plan.at(isSource ? "sends" : "receives");
+    size_t index = static_cast<size_t>(isSource ? localRank - localOutStartRank : localRank - localInStartRank);
+    if(blocks.size() != static_cast<size_t>(isSource ? localOutSize : localInSize) || boxes.size() != blocks.size())
+    {
+        spdlog::error("The redistribution plan has {} blocks but the {} side has {} ranks.", blocks.size(), isSource ? "sender" : "receiver", isSource ? localOutSize : localInSize);
+        return;
+    }
+
+    m_block = parseBox(blocks.at(index));
+    for(auto & box : boxes.at(index))
+        m_boxes.push_back(parseBox(box));
+
+    // A rank without boxes would never get the control messages of the senders
+    if(m_boxes.empty())
+    {
+        spdlog::error("The redistribution plan has no box for the rank {}, every rank must own at least one element.", localRank);
+        return;
+    }
+    m_validPlan = true;
+}
+
+bool godrick::mpi::BlockRedistributeProtocolImplMPI::isValid() const
+{
+    // Any number of ranks on each side is supported, as long as the plan matches them
+    return m_validPlan;
+}
+
+void godrick::mpi::BlockRedistributeProtocolImplMPI::flush()
+{
+    for(auto & entry : m_transitMessages)
+        MPI_Wait(&entry.request, MPI_STATUS_IGNORE);
+    m_transitMessages.clear();
+}
+
+bool godrick::mpi::BlockRedistributeProtocolImplMPI::send(conduit::Node& data)
+{
+    // The control messages carry no block, they are forwarded as is
+    if(godrick::isTerminateMessage(data))
+        return sendControl(data);
+
+    if(!data.has_child(m_field))
+    {
+        spdlog::error("The message sent by the rank {} has no field {} to redistribute.", m_localRank, m_field);
+        return false;
+    }
+
+    // The array of the block must be compact to be sliced
+    conduit::Node compact;
+    const conduit::Node* field = &data[m_field];
+    if(!field->is_compact())
+    {
+        field->compact_to(compact);
+        field = &compact;
+    }
+
+    const conduit::DataType& dtype = field->dtype();
+    if(!dtype.is_number() || dtype.number_of_elements() != getNbElements(m_block.count))
+    {
+        spdlog::error("The field {} sent by the rank {} must be a numerical array of {} elements, got {} elements.", m_field, m_localRank, getNbElements(m_block.count), dtype.number_of_elements());
+        return false;
+    }
+
+    // Each message holds the type of the elements followed by the box in row-major order
+    size_t elementBytes = static_cast<size_t>(dtype.element_bytes());
+    uint8_t* blockData = static_cast<uint8_t*>(const_cast<void*>(field->data_ptr()));
+    int64_t typeId = dtype.id();
+    for(auto & box : m_boxes)
+    {
+        m_transitMessages.emplace_back();
+        RedistributionSentEntry& entry = m_transitMessages.back();
+        entry.buffer.resize(sizeof(int64_t) + static_cast<size_t>(getNbElements(box.count)) * elementBytes);
+        memcpy(entry.buffer.data(), &typeId, sizeof(int64_t));
+        copyBox(m_block, box, blockData, entry.buffer.data() + sizeof(int64_t), elementBytes, true);
+
+        MPI_Isend(  entry.buffer.data(),
+                    static_cast<int>(entry.buffer.size()),
+                    MPI_BYTE,
+                    m_localInStartRank + box.rank,
+                    m_sentMsgID,
+                    m_localComm,
+                    &entry.request);
+    }
+    m_sentMsgID = (m_sentMsgID == INT_MAX ? 0 : m_sentMsgID + 1);
+
+    return true;
+}
+
+bool godrick::mpi::BlockRedistributeProtocolImplMPI::sendControl(conduit::Node& data)
+{
+    // Every sender sends the message to every receiver of the plan, whether they share a box or not,
+    // so a receiver gets it from the first sender it expects a box from
+    conduit::Node message;
+    SchemaCache cache;
+    godrick::packConduitMessage(data, message, SchemaMode::ALWAYS, cache);
+    size_t messageSize = static_cast<size_t>(message.total_bytes_compact());
+    int64_t typeId = REDISTRIBUTION_CONTROL_TYPE;
+    for(int receiver = 0; receiver < m_localInSize; ++receiver)
+    {
+        m_transitMessages.emplace_back();
+        RedistributionSentEntry& entry = m_transitMessages.back();
+        entry.buffer.resize(sizeof(int64_t) + messageSize);
+        memcpy(entry.buffer.data(), &typeId, sizeof(int64_t));
+        memcpy(entry.buffer.data() + sizeof(int64_t), message.data_ptr(), messageSize);
+
+        MPI_Isend(  entry.buffer.data(),
+                    static_cast<int>(entry.buffer.size()),
+                    MPI_BYTE,
+                    m_localInStartRank + receiver,
+                    m_sentMsgID,
+                    m_localComm,
+                    &entry.request);
+    }
+    m_sentMsgID = (m_sentMsgID == INT_MAX ? 0 : m_sentMsgID + 1);
+
+    return true;
+}
+
+void godrick::mpi::BlockRedistributeProtocolImplMPI::receiveMessage(int source, std::vector<uint8_t>& buffer)
+{
+    MPI_Status status;
+    MPI_Probe(source, m_expectedMsgID, m_localComm, &status);
+
+    int bufferSize = 0;
+    MPI_Get_count(&status, MPI_BYTE, &bufferSize);
+    buffer.resize(static_cast<size_t>(bufferSize));
+    MPI_Recv(buffer.data(), bufferSize, MPI_BYTE, source, m_expectedMsgID, m_localComm, MPI_STATUS_IGNORE);
+}
+
+bool godrick::mpi::BlockRedistributeProtocolImplMPI::receiveControl(int source, std::vector<uint8_t>& buffer, conduit::Node& data)
+{
+    // The other senders sent the same message, their copies are dropped
+    std::vector<uint8_t> copy;
+    for(int sender = 0; sender < m_localOutSize; ++sender)
+    {
+        if(m_localOutStartRank + sender != source)
+            receiveMessage(m_localOutStartRank + sender, copy);
+    }
+    m_expectedMsgID = (m_expectedMsgID == INT_MAX ? 0 : m_expectedMsgID + 1);
+
+    data.reset();
+    SchemaCache cache;
+    return godrick::unpackConduitMessage(buffer.data() + sizeof(int64_t), buffer.size() - sizeof(int64_t), data, SchemaMode::ALWAYS, cache);
+}
+
+bool godrick::mpi::BlockRedistributeProtocolImplMPI::receive(std::vector<conduit::Node>& data)
+{
+    data.resize(1);
+    conduit::Node& result = data[0];
+    result.reset();
+    result["block/start"].set(m_block.start);
+    result["block/count"].set(m_block.count);
+
+    std::vector<uint8_t> buffer;
+    size_t elementBytes = 0;
+    for(auto & box : m_boxes)
+    {
+        int source = m_localOutStartRank + box.rank;
+        receiveMessage(source, buffer);
+        if(buffer.size() < sizeof(int64_t))
+        {
+            spdlog::error("The rank {} received a message of {} bytes from the sender {}, too short for a header.", m_localRank, buffer.size(), box.rank);
+            return false;
+        }
+
+        // The array of the block is allocated with the type of the first box received
+        int64_t typeId = 0;
+        memcpy(&typeId, buffer.data(), sizeof(int64_t));
+        if(typeId == REDISTRIBUTION_CONTROL_TYPE)
+        {
+            // The senders push the same sequence of messages, a control message never follows a box of the same step
+            if(elementBytes != 0)
+            {
+                spdlog::error("The rank {} received a control message from the sender {} in the middle of the boxes of the field {}.", m_localRank, box.rank, m_field);
+                return false;
+            }
+            return receiveControl(source, buffer, result);
+        }
+        if(elementBytes == 0)
+        {
+            result[m_field].set(conduit::DataType(typeId, getNbElements(m_block.count)));
+            elementBytes = static_cast<size_t>(result[m_field].dtype().element_bytes());
+        }
+        else if(typeId != result[m_field].dtype().id())
+        {
+            spdlog::error("The rank {} received boxes of different types for the field {}.", m_localRank, m_field);
+            return false;
+        }
+
+        if(buffer.size() != sizeof(int64_t) + static_cast<size_t>(getNbElements(box.count)) * elementBytes)
+        {
+            spdlog::error("The rank {} received {} bytes from the sender {} but expected a box of {} elements.", m_localRank, buffer.size(), box.rank, getNbElements(box.count));
+            return false;
+        }
+        copyBox(m_block, box, static_cast<uint8_t*>(result[m_field].data_ptr()), buffer.data() + sizeof(int64_t), elementBytes, false);
+    }
+
+    m_expectedMsgID = (m_expectedMsgID == INT_MAX ? 0 : m_expectedMsgID + 1);
+
+    return true;
+}
@@ -17,14 +17,38 @@ bool godrick::mpi::BroadcastProtocolImplMPI::isValid() const
 
 bool godrick::mpi::BroadcastProtocolImplMPI::send(conduit::Node& data)
 {
-    conduit::relay::mpi::broadcast_using_schema(data, m_localOutStartRank, m_localComm);
+    if(m_schemaMode == SchemaMode::ALWAYS)
+    {
+        conduit::relay::mpi::broadcast_using_schema(data, m_localOutStartRank, m_localComm);
+        return true;
+    }
+
+    // Same message as the other transports, all the receivers get every message so they all know the last schema sent
+    conduit::Node message;
+    godrick::packConduitMessage(data, message, m_schemaMode, m_schemaCache);
+    int64_t messageSize = static_cast<int64_t>(message.total_bytes_compact());
+    if(!conduit::utils::value_fits<int64_t,int>(messageSize))
+    {
+        spdlog::warn("Warning size value ( {} ) exceeds the size of MPI_Bcast max value ( {} )", messageSize, std::numeric_limits<int>::max());
+    }
+    MPI_Bcast(&messageSize, 1, MPI_INT64_T, m_localOutStartRank, m_localComm);
+    MPI_Bcast(message.data_ptr(), static_cast<int>(messageSize), MPI_BYTE, m_localOutStartRank, m_localComm);
     return true;
 }
 bool godrick::mpi::BroadcastProtocolImplMPI::receive(std::vector<conduit::Node>& data)
 {
     data.resize(1);
-    conduit::relay::mpi::broadcast_using_schema(data[0], m_localOutStartRank, m_localComm);
-    return true;
+    if(m_schemaMode == SchemaMode::ALWAYS)
+    {
+        conduit::relay::mpi::broadcast_using_schema(data[0], m_localOutStartRank, m_localComm);
+        return true;
+    }
+
+    int64_t messageSize = 0;
+    MPI_Bcast(&messageSize, 1, MPI_INT64_T, m_localOutStartRank, m_localComm);
+    std::vector<uint8_t> buffer(static_cast<size_t>(messageSize));
+    MPI_Bcast(buffer.data(), static_cast<int>(messageSize), MPI_BYTE, m_localOutStartRank, m_localComm);
+    return godrick::unpackConduitMessage(buffer.data(), buffer.size(), data[0], m_schemaMode, m_schemaCache);
 }
 
 void godrick::mpi::BroadcastProtocolImplMPI::print()
@@ -1,6 +1,7 @@
 #include <godrick/mpi/communicatorMPI.h>
 #include <godrick/mpi/broadcastMPI.h>
 #include <godrick/mpi/partialBcastGatherMPI.h>
+#include <godrick/mpi/blockRedistributeMPI.h>
 
 #include <spdlog/spdlog.h>
 
@@ -105,6 +106,21 @@ bool godrick::mpi::CommunicatorMPI::initFromJSON(json& data, const std::string&
             m_protocolImpl = std::make_unique<PartialBCastGatherProtocolImplMPI>(m_localComm, m_localInStartRank, m_localInSize, m_localOutStartRank, m_localOutSize, m_localRank, m_isSource);
             break;
         }
+        case MPICommProtocol::BLOCK_REDISTRIBUTE:
+        {
+            if(!data.contains("redistribution"))
+            {
+                spdlog::error("The communicator {} uses the protocol {} but has no redistribution plan.", m_name, protocolName);
+                return false;
+            }
+            if(m_batchMaxCount > 1)
+            {
+                spdlog::error("The communicator {} uses the protocol {} which cannot batch messages.", m_name, protocolName);
+                return false;
+            }
+            m_protocolImpl = std::make_unique<BlockRedistributeProtocolImplMPI>(m_localComm, m_localInStartRank, m_localInSize, m_localOutStartRank, m_localOutSize, m_localRank, m_isSource, data.at("redistribution"));
+            break;
+        }
         default:
         {
             spdlog::error("Protocol method {} not currently supported or implemented.", protocolName);
@@ -112,6 +128,9 @@ bool godrick::mpi::CommunicatorMPI::initFromJSON(json& data, const std::string&
         }
     }
 
+    // The block redistribution sends raw arrays, the schema mode only applies to the protocols sending conduit messages
+    m_protocolImpl->setSchemaMode(m_schemaMode);
+
     if(!m_protocolImpl->isValid())
     {
         spdlog::error("The communication protocol used by the communicator {} is not valid.", m_name);
@@ -99,6 +99,7 @@ bool godrick::mpi::GodrickMPI::initFromJSON(const std::string& jsonPath, const s
                         spdlog::error("Unable to create the communicator {} (something wrong in the json configuration file?).", comm["name"].get<std::string>());
                         return false;
                     }
+                    commObj->setTaskRank(m_taskRank);
                     commObj->initFromJSON(comm, taskName);
 
                     // Assign the communicator to its port.
@@ -138,6 +139,7 @@ bool godrick::mpi::GodrickMPI::initFromJSON(const std::string& jsonPath, const s
                         spdlog::error("Unable to create the communicator {} (something wrong in the json configuration file?).", comm["name"].get<std::string>());
                         return false;
                     }
+                    commObj->setTaskRank(m_taskRank);
                     commObj->initFromJSON(comm, taskName);
 
                     // Assign the gate to its port
@@ -83,37 +83,10 @@ void godrick::mpi::PartialBCastGatherProtocolImplMPI::flush()
 
 bool godrick::mpi::PartialBCastGatherProtocolImplMPI::send(conduit::Node& data)
 {
-    conduit::Schema s_data_compact;
-    
-    // schema will only be valid if compact and contig
-    if( data.is_compact() && data.is_contiguous())
-    {
-        s_data_compact = data.schema();
-    }
-    else
-    {
-        data.schema().compact_to(s_data_compact);
-    }
-    
-    std::string snd_schema_json = s_data_compact.to_json();
-        
-    conduit::Schema s_msg;
-    s_msg["schema_len"].set(conduit::DataType::int64());
-    s_msg["schema"].set(conduit::DataType::char8_str(static_cast<int64_t>(snd_schema_json.size()+1)));
-    s_msg["data"].set(s_data_compact);
-    
-    // create a compact schema to use
-    conduit::Schema s_msg_compact;
-    s_msg.compact_to(s_msg_compact);
-    
-    m_transitMessages.emplace_back(s_msg_compact);
+    m_transitMessages.emplace_back();
     MsgSentEntry& entry = m_transitMessages.back();
-    // these sets won't realloc since schemas are compatible
-    entry.data["schema_len"].set(static_cast<int64_t>(snd_schema_json.length()));
-    entry.data["schema"].set(snd_schema_json);
-    entry.data["data"].update(data);
+    godrick::packConduitMessage(data, entry.data, m_schemaMode, m_schemaCache);
 
-    
     size_t msg_data_size = static_cast<size_t>(entry.data.total_bytes_compact());
     
     if(!conduit::utils::value_fits<size_t,int>(msg_data_size))
@@ -124,7 +97,7 @@ bool godrick::mpi::PartialBCastGatherProtocolImplMPI::send(conduit::Node& data)
     // Sending the data to all the destinations
     for(auto & dest : m_destinations)
     {
-        spdlog::trace("Sending schema from {} to {}: {}", m_localRank,dest, entry.data["schema"].as_char8_str());
+        spdlog::trace("Sending message {} from {} to {}.", m_sentMsgID, m_localRank, dest);
         entry.requests.emplace_back();
         MPI_Isend(  entry.data.data_ptr(),
                     static_cast<int>(msg_data_size),
@@ -141,7 +114,7 @@ bool godrick::mpi::PartialBCastGatherProtocolImplMPI::send(conduit::Node& data)
 
 bool godrick::mpi::PartialBCastGatherProtocolImplMPI::receive(std::vector<conduit::Node>& data)
 {
-    // code taken from recv_using_schema in conduit_relay_mpi.cpp
+    // adapted from recv_using_schema in conduit_relay_mpi.cpp
 
     // Prepare the data 
     data.resize(static_cast<size_t>(m_nbExpectedReception));
@@ -168,29 +141,12 @@ bool godrick::mpi::PartialBCastGatherProtocolImplMPI::receive(std::vector<condui
                             m_localComm,
                             &status);
 
-        uint8_t *n_buff_ptr = reinterpret_cast<uint8_t*>(n_buffer.data_ptr());
-
-        conduit::Node n_msg;
-        // length of the schema is sent as a 64-bit signed int
-        // NOTE: we aren't using this value  ... 
-        n_msg["schema_len"].set_external(reinterpret_cast<int64_t*>(n_buff_ptr));
-        n_buff_ptr +=8;
-        // wrap the schema string
-        n_msg["schema"].set_external_char8_str(reinterpret_cast<char*>(n_buff_ptr));
-        // create the schema
-        conduit::Schema rcv_schema;
-        conduit::Generator gen(n_msg["schema"].as_char8_str());
-        spdlog::trace("Rank {} received schema from {}: {}", m_localRank, status.MPI_SOURCE, n_msg["schema"].as_char8_str());
-        gen.walk(rcv_schema);
-
-        // advance by the schema length
-        n_buff_ptr += n_msg["schema"].total_bytes_compact();
-        
-        // apply the schema to the data
-        n_msg["data"].set_external(rcv_schema,n_buff_ptr);
-        
-        // copy out to our result node
-        data[sourceIndex].update(n_msg["data"]);
+        // In ON_CHANGE mode, the last schema of each source is kept under the key of the source
+        if(!godrick::unpackConduitMessage(reinterpret_cast<uint8_t*>(n_buffer.data_ptr()), static_cast<size_t>(buffer_size), data[sourceIndex], m_schemaMode, m_schemaCache))
+        {
+            spdlog::error("Rank {} could not read the message received from {}.", m_localRank, status.MPI_SOURCE);
+            return false;
+        }
     }
 
     m_expectedMsgID = (m_expectedMsgID == INT_MAX ? 0 : m_expectedMsgID + 1);
@@ -6,7 +6,7 @@ bool godrick::OutputPort::push(conduit::Node& data) const
 {
     bool result = true;
     for(const auto & comm : m_communicators)
-        result &= comm->send(data);
+        result &= comm->sendBatched(data);
 
     return result;
 }
@@ -14,7 +14,7 @@ bool godrick::OutputPort::push(conduit::Node& data) const
 void godrick::OutputPort::flush() const
 {
     for(auto & comm : m_communicators)
-        comm->flush();
+        comm->flushBatched();
 }
 
 void godrick::InputPort::addCommunicator(std::shared_ptr<Communicator> comm)
@@ -35,5 +35,5 @@ godrick::MessageResponse godrick::InputPort::get(std::vector<conduit::Node>&  da
         return godrick::MessageResponse::EMPTY;
     else
         // Input ports only have a single communicator, accessing it directly
-        return m_communicators[0]->receive(data);
+        return m_communicators[0]->receiveBatched(data);
 }
\ No newline at end of file
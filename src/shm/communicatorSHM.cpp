@@ -0,0 +1,320 @@
+#include <godrick/shm/communicatorSHM.h>
+#include <godrick/messageUtils.h>
+
+#include <algorithm>
+#include <atomic>
+#include <cerrno>
+#include <chrono>
+#include <cstring>
+#include <thread>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+#include <spdlog/spdlog.h>
+
+static_assert(std::atomic_ref<uint64_t>::is_always_lock_free, "The SHM ring requires lock free 64 bits atomics to be shared between processes.");
+
+// Spin for a while before yielding, then sleep, until the condition is true
+template<typename Predicate>
+static void waitFor(Predicate condition)
+{
+    for(uint32_t i = 0; !condition(); ++i)
+    {
+        if(i < 1024)
+            continue;
+        else if(i < 2048)
+            std::this_thread::yield();
+        else
+            std::this_thread::sleep_for(std::chrono::microseconds(50));
+    }
+}
+
+godrick::shm::CommunicatorSHM::~CommunicatorSHM()
+{
+    if(m_segment != nullptr)
+    {
+        munmap(m_segment, m_segmentSize);
+
+        // The first side to leave removes the name, the other side keeps its mapping until it leaves
+        shm_unlink(m_segmentName.c_str());
+    }
+}
+
+bool godrick::shm::CommunicatorSHM::initFromJSON(json& data, const std::string& taskName)
+{
+    if(data.count("transport") == 0 || data.at("transport").get<std::string>().compare("SHM") != 0)
+    {
+        spdlog::error("Wrong communicator transport associated with the communicator. This reader can only process SHM commuinicator.");
+        return false;
+    }
+
+    // First initialize from the parent class
+    if(!godrick::Communicator::initFromJSON(data, taskName))
+        return false;
+
+    spdlog::info("Loading the settings for the communicator {} from the task {}.", m_name, taskName);
+    std::string receiverTask = data.at("inputTaskName").get<std::string>();
+    std::string senderTask = data.at("outputTaskName").get<std::string>();
+    bool isReceiver = receiverTask.compare(taskName) == 0;
+    m_isSender = senderTask.compare(taskName) == 0;
+    if(!isReceiver && !m_isSender)
+    {
+        spdlog::error("Trying to process the communicator {} from task {}, but the task is neither the sender not the receiver. Something went wrong when processing the configuration file.", m_name, taskName);
+        return false;
+    }
+
+    auto& settings = data.at("protocolSettings");
+    m_segmentName = settings.at("segment").get<std::string>();
+    m_capacity = settings.at("capacity").get<uint64_t>();
+    m_slotSize = settings.at("slotsize").get<uint64_t>();
+    m_nowait = data.value("nonblocking", false);
+    if(m_capacity < 2 || m_slotSize == 0 || m_slotSize % 8 != 0)
+    {
+        spdlog::error("Invalid ring settings for the communicator {}: {} slots of {} bytes.", m_name, m_capacity, m_slotSize);
+        return false;
+    }
+
+    // Both sides create the segment if needed and give it the same size, whichever comes first
+    m_segmentSize = sizeof(RingHeader) + m_capacity * (sizeof(SlotHeader) + m_slotSize);
+    int fd = shm_open(m_segmentName.c_str(), O_CREAT | O_RDWR, 0600);
+    if(fd < 0)
+    {
+        spdlog::error("Unable to open the shared memory segment {} of the communicator {}: {}.", m_segmentName, m_name, strerror(errno));
+        return false;
+    }
+    if(ftruncate(fd, static_cast<off_t>(m_segmentSize)) != 0)
+    {
+        spdlog::error("Unable to resize the shared memory segment {} to {} bytes: {}.", m_segmentName, m_segmentSize, strerror(errno));
+        close(fd);
+        return false;
+    }
+    void* segment = mmap(nullptr, m_segmentSize, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if(segment == MAP_FAILED)
+    {
+        spdlog::error("Unable to map the shared memory segment {}: {}.", m_segmentName, strerror(errno));
+        return false;
+    }
+
+    m_segment = segment;
+    m_header = static_cast<RingHeader*>(segment);
+    m_slots = static_cast<uint8_t*>(segment) + sizeof(RingHeader);
+    if(m_isSender)
+        startGeneration();
+    spdlog::info("The {} {} is using the shared memory segment {} ({} slots of {} bytes).", m_isSender ? "sender" : "receiver", taskName, m_segmentName, m_capacity, m_slotSize);
+    return true;
+}
+
+godrick::shm::SlotHeader* godrick::shm::CommunicatorSHM::getSlot(uint64_t index) const
+{
+    return reinterpret_cast<SlotHeader*>(m_slots + (index % m_capacity) * (sizeof(SlotHeader) + m_slotSize));
+}
+
+void godrick::shm::CommunicatorSHM::startGeneration()
+{
+    // The segment may come from a previous run, the ring restarts empty under a generation never used
+    // in this segment. The consumer resets the tail when attaching to it.
+    std::atomic_ref<uint64_t> head(m_header->head);
+    std::atomic_ref<uint64_t> generation(m_header->generation);
+    std::atomic_ref<uint64_t> consumerGeneration(m_header->consumerGeneration);
+
+    m_generation = std::max(generation.load(std::memory_order_relaxed), consumerGeneration.load(std::memory_order_relaxed)) + 1;
+    head.store(0, std::memory_order_relaxed);
+    generation.store(m_generation, std::memory_order_release);
+}
+
+bool godrick::shm::CommunicatorSHM::isConsumerAttached() const
+{
+    std::atomic_ref<uint64_t> consumerGeneration(m_header->consumerGeneration);
+    return consumerGeneration.load(std::memory_order_acquire) == m_generation;
+}
+
+bool godrick::shm::CommunicatorSHM::attachToProducer()
+{
+    // Return true once the consumer is attached to the generation of the current producer
+    std::atomic_ref<uint64_t> tail(m_header->tail);
+    std::atomic_ref<uint64_t> generation(m_header->generation);
+    std::atomic_ref<uint64_t> consumerGeneration(m_header->consumerGeneration);
+
+    uint64_t current = generation.load(std::memory_order_acquire);
+    if(current == 0 || current == m_generation)
+        return current != 0;
+
+    // A generation already acknowledged by a consumer was started by the producer of a previous run
+    if(m_generation == 0 && current == consumerGeneration.load(std::memory_order_relaxed))
+        return false;
+
+    m_generation = current;
+    tail.store(0, std::memory_order_relaxed);
+    consumerGeneration.store(current, std::memory_order_release);
+    return true;
+}
+
+bool godrick::shm::CommunicatorSHM::writeMessage(const uint8_t* data, size_t size)
+{
+    // Only the producer moves the head, only the consumer moves the tail
+    std::atomic_ref<uint64_t> head(m_header->head);
+    std::atomic_ref<uint64_t> tail(m_header->tail);
+
+    // The tail is only meaningful once the consumer reset it for this generation
+    waitFor([&](){ return isConsumerAttached(); });
+
+    uint64_t position = head.load(std::memory_order_relaxed);
+    size_t offset = 0;
+    do
+    {
+        waitFor([&](){ return position - tail.load(std::memory_order_acquire) < m_capacity; });
+
+        SlotHeader* slot = getSlot(position);
+        size_t chunkSize = std::min(size - offset, static_cast<size_t>(m_slotSize));
+        slot->totalSize = size;
+        slot->offset = offset;
+        slot->chunkSize = chunkSize;
+        memcpy(reinterpret_cast<uint8_t*>(slot) + sizeof(SlotHeader), data + offset, chunkSize);
+
+        position += 1;
+        head.store(position, std::memory_order_release);
+        offset += chunkSize;
+    } while(offset < size);
+
+    return true;
+}
+
+bool godrick::shm::CommunicatorSHM::readMessage(std::vector<uint8_t>& buffer)
+{
+    std::atomic_ref<uint64_t> head(m_header->head);
+    std::atomic_ref<uint64_t> tail(m_header->tail);
+    std::atomic_ref<uint64_t> generation(m_header->generation);
+
+    // Nothing is read from the ring until the producer of this run started it
+    if(m_nowait && !attachToProducer())
+        return false;
+    waitFor([&](){ return attachToProducer(); });
+
+    uint64_t position = tail.load(std::memory_order_relaxed);
+    if(m_nowait && head.load(std::memory_order_acquire) == position)
+        return false;
+
+    // Once the first chunk is there, the rest of the message is on its way
+    bool complete = false;
+    while(!complete)
+    {
+        waitFor([&](){ return head.load(std::memory_order_acquire) != position || generation.load(std::memory_order_acquire) != m_generation; });
+
+        // A producer started a new generation, the consumer attached to a stale one
+        if(generation.load(std::memory_order_acquire) != m_generation)
+            return readMessage(buffer);
+
+        SlotHeader* slot = getSlot(position);
+        if(slot->offset == 0)
+            buffer.resize(slot->totalSize);
+        memcpy(buffer.data() + slot->offset, reinterpret_cast<uint8_t*>(slot) + sizeof(SlotHeader), slot->chunkSize);
+        complete = slot->offset + slot->chunkSize >= slot->totalSize;
+
+        position += 1;
+        tail.store(position, std::memory_order_release);
+    }
+    return true;
+}
+
+void godrick::shm::CommunicatorSHM::flush()
+{
+    // Wait until the consumer read everything, typically the terminate message when closing
+    if(!m_isSender || m_header == nullptr)
+        return;
+    std::atomic_ref<uint64_t> head(m_header->head);
+    std::atomic_ref<uint64_t> tail(m_header->tail);
+    waitFor([&](){ return isConsumerAttached(); });
+    waitFor([&](){ return tail.load(std::memory_order_acquire) == head.load(std::memory_order_relaxed); });
+}
+
+bool godrick::shm::CommunicatorSHM::send(conduit::Node& data)
+{
+    switch (m_msgFormat)
+    {
+        case godrick::MessageFormat::CONDUIT:
+        {
+            return sendConduitFormat(data);
+        }
+        case godrick::MessageFormat::JSON:
+        {
+            return sendJSONFormat(data);
+        }
+        default:
+        {
+            spdlog::error("Unsupported message format requested when sending on the SHM communicator {}.", m_name);
+            return false;
+        }
+    }
+}
+
+bool godrick::shm::CommunicatorSHM::sendConduitFormat(conduit::Node& data)
+{
+    // Same message layout as the ZMQ communicator
+    conduit::Node entry;
+    godrick::packConduitMessage(data, entry, m_schemaMode, m_schemaCache);
+    return writeMessage(reinterpret_cast<const uint8_t*>(entry.data_ptr()), static_cast<size_t>(entry.total_bytes_compact()));
+}
+
+bool godrick::shm::CommunicatorSHM::sendJSONFormat(conduit::Node& data)
+{
+    auto jsonContent = data.to_json();
+    return writeMessage(reinterpret_cast<const uint8_t*>(jsonContent.c_str()), jsonContent.size());
+}
+
+godrick::MessageResponse godrick::shm::CommunicatorSHM::receive(std::vector<conduit::Node>& data)
+{
+    if(m_nbTokenLeft > 0)
+    {
+        m_nbTokenLeft -= 1;
+        return godrick::MessageResponse::TOKEN;
+    }
+
+    std::vector<uint8_t> buffer;
+    if(!readMessage(buffer))
+        return godrick::MessageResponse::EMPTY;
+
+    if(buffer.empty())
+    {
+        spdlog::warn("Empty message received by the communicator {}.", m_name);
+        return godrick::MessageResponse::EMPTY;
+    }
+
+    data.resize(1);
+    switch(m_msgFormat)
+    {
+        case godrick::MessageFormat::CONDUIT:
+        {
+            return receiveConduitFormat(data, buffer);
+        }
+        case godrick::MessageFormat::JSON:
+        {
+            return receiveJSONFormat(data, buffer);
+        }
+        default:
+        {
+            spdlog::error("Unsupported message format requested when receiving on the SHM communicator {}.", m_name);
+            data.clear();
+            return godrick::MessageResponse::ERROR;
+        }
+    }
+}
+
+godrick::MessageResponse godrick::shm::CommunicatorSHM::receiveConduitFormat(std::vector<conduit::Node>& data, std::vector<uint8_t>& buffer)
+{
+    if(!godrick::unpackConduitMessage(buffer.data(), buffer.size(), data[0], m_schemaMode, m_schemaCache))
+    {
+        data.clear();
+        return godrick::MessageResponse::ERROR;
+    }
+    return godrick::MessageResponse::MESSAGES;
+}
+
+godrick::MessageResponse godrick::shm::CommunicatorSHM::receiveJSONFormat(std::vector<conduit::Node>& data, std::vector<uint8_t>& buffer)
+{
+    std::string msgJSON(reinterpret_cast<char*>(buffer.data()), buffer.size());
+    data[0].parse(msgJSON, "json");
+    return godrick::MessageResponse::MESSAGES;
+}
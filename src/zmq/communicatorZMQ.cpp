@@ -1,4 +1,5 @@
 #include <godrick/zmq/communicatorZMQ.h>
+#include <godrick/messageUtils.h>
 
 #include <spdlog/spdlog.h>
 
@@ -6,6 +7,70 @@
 constexpr auto g_bindingSideSender = "ZMQ_BIND_SENDER";
 constexpr auto g_bindingSideReceiver = "ZMQ_BIND_RECEIVER";
 
+// The launcher writes the endpoint of the socket, ipc:// for co-located tasks and tcp:// otherwise.
+// Configuration files without endpoint use the TCP address and port.
+static std::string getEndpoint(const json& settings)
+{
+    if(settings.contains("endpoint"))
+        return settings.at("endpoint").get<std::string>();
+
+    std::stringstream ss;
+    ss<<"tcp://"<<settings.at("addr").get<std::string>()<<":"<<settings.at("port").get<int>();
+    return ss.str();
+}
+
+// Bind the endpoint of the local rank. With a single binding rank, the endpoint of the communicator is used.
+bool godrick::grzmq::CommunicatorZMQ::bindSocket(const json& settings, const std::string& taskName)
+{
+    std::string endpoint;
+    if(settings.contains("endpoints"))
+    {
+        auto& endpoints = settings.at("endpoints");
+        if(m_taskRank < 0 || static_cast<size_t>(m_taskRank) >= endpoints.size())
+        {
+            spdlog::error("The rank {} of the task {} has no endpoint to bind for the communicator {} ({} endpoints).", m_taskRank, taskName, m_name, endpoints.size());
+            return false;
+        }
+        endpoint = endpoints.at(static_cast<size_t>(m_taskRank)).get<std::string>();
+    }
+    else
+    {
+        endpoint = getEndpoint(settings);
+    }
+
+    m_socket.bind(endpoint);
+    spdlog::info("Binding the rank {} of the task {} to the address {}.", m_taskRank, taskName, endpoint);
+    return true;
+}
+
+// Connect the local rank to the endpoints of its peers, fanning in or out when they are several.
+// A ZMQ socket connected to several endpoints round-robins PUSH messages and fair-queues incoming messages.
+bool godrick::grzmq::CommunicatorZMQ::connectSocket(const json& settings, const std::string& taskName)
+{
+    if(!settings.contains("peers"))
+    {
+        std::string endpoint = getEndpoint(settings);
+        m_socket.connect(endpoint);
+        spdlog::info("Connecting the rank {} of the task {} to the address {}.", m_taskRank, taskName, endpoint);
+        return true;
+    }
+
+    auto& peers = settings.at("peers");
+    auto& endpoints = settings.at("endpoints");
+    if(m_taskRank < 0 || static_cast<size_t>(m_taskRank) >= peers.size())
+    {
+        spdlog::error("The rank {} of the task {} has no peer for the communicator {} ({} connecting ranks).", m_taskRank, taskName, m_name, peers.size());
+        return false;
+    }
+    for(auto& peer : peers.at(static_cast<size_t>(m_taskRank)))
+    {
+        std::string endpoint = endpoints.at(peer.get<size_t>()).get<std::string>();
+        m_socket.connect(endpoint);
+        spdlog::info("Connecting the rank {} of the task {} to the address {}.", m_taskRank, taskName, endpoint);
+    }
+    return true;
+}
+
 bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string& taskName)
 {
     if(data.count("transport") == 0 || data.at("transport").get<std::string>().compare("ZMQ") != 0)
@@ -54,8 +119,6 @@ bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string
     {
         case ZMQCommProtocol::PUB_SUB:
         {
-            std::string addr = data["protocolSettings"].at("addr").get<std::string>();
-            int port = data["protocolSettings"].at("port").get<int>();
             std::string bindingSide = data["protocolSettings"].at("bindingside").get<std::string>();
             if(m_nowait)
                 m_nowait = data.value("nonblocking", false);
@@ -68,21 +131,19 @@ bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string
                 return false;
             }
 
-            std::stringstream ss;
-            ss<<"tcp://"<<addr<<":"<<port;
             if(isSender)
             {
                 if(bindOnSender)
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PUB);
-                    m_socket.bind(ss.str());
-                    spdlog::info("Binding the sender {} to the address {}.", taskName, ss.str());
+                    if(!bindSocket(data["protocolSettings"], taskName))
+                        return false;
                 }
                 else
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PUB);
-                    m_socket.connect(ss.str());
-                    spdlog::info("Connecting the sender {} to the address {}.", taskName, ss.str());
+                    if(!connectSocket(data["protocolSettings"], taskName))
+                        return false;
                 }
             }
             else
@@ -90,24 +151,22 @@ bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string
                 if(!bindOnSender)
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_SUB);
-                    m_socket.bind(ss.str());
+                    if(!bindSocket(data["protocolSettings"], taskName))
+                        return false;
                     m_socket.set(zmq::sockopt::subscribe, "");  // We subscribe to anything
-                    spdlog::info("Binding the receiver {} to the address {}.", taskName, ss.str());
                 }
                 else
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_SUB);
-                    m_socket.connect(ss.str());
+                    if(!connectSocket(data["protocolSettings"], taskName))
+                        return false;
                     m_socket.set(zmq::sockopt::subscribe, "");  // We subscribe to anything
-                    spdlog::info("Connecting the receiver {} to the address {}.", taskName, ss.str());
                 }
             }
             return true;
         }
         case ZMQCommProtocol::PUSH_PULL:
         {
-            std::string addr = data["protocolSettings"].at("addr").get<std::string>();
-            int port = data["protocolSettings"].at("port").get<int>();
             std::string bindingSide = data["protocolSettings"].at("bindingside").get<std::string>();
             m_nowait = data.value("nonblocking", false);
             if(m_nowait)
@@ -121,22 +180,20 @@ bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string
                 return false;
             }
             
-            std::stringstream ss;
-            ss<<"tcp://"<<addr<<":"<<port;
             if(isSender)
             {
                 if(bindOnSender)
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PUSH);
-                    m_socket.bind(ss.str());
-                    spdlog::info("Binding the sender {} to the address {}.", taskName, ss.str());
+                    if(!bindSocket(data["protocolSettings"], taskName))
+                        return false;
                 }
                 else
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PUSH);
-                    m_socket.connect(ss.str());
+                    if(!connectSocket(data["protocolSettings"], taskName))
+                        return false;
                     //m_socket.set(zmq::sockopt::subscribe, "");  // We subscribe to anything
-                    spdlog::info("Connecting the sender {} to the address {}.", taskName, ss.str());
                 }
             }
             else
@@ -144,15 +201,15 @@ bool godrick::grzmq::CommunicatorZMQ::initFromJSON(json& data, const std::string
                 if(!bindOnSender)
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PULL);
-                    m_socket.bind(ss.str());
-                    spdlog::info("Binding the receiver {} to the address {}.", taskName, ss.str());
+                    if(!bindSocket(data["protocolSettings"], taskName))
+                        return false;
                 }
                 else
                 {
                     m_socket = zmq::socket_t(m_context, ZMQ_PULL);
-                    m_socket.connect(ss.str());
+                    if(!connectSocket(data["protocolSettings"], taskName))
+                        return false;
                     //m_socket.set(zmq::sockopt::subscribe, "");  // We subscribe to anything
-                    spdlog::info("Connecting the receiver {} to the address {}.", taskName, ss.str());
                 }
             }
             return true;
@@ -193,42 +250,10 @@ bool godrick::grzmq::CommunicatorZMQ::send(conduit::Node& data)
 
 bool godrick::grzmq::CommunicatorZMQ::sendConduitFormat(conduit::Node& data)
 {
-    conduit::Schema s_data_compact;
-    
-    // schema will only be valid if compact and contig
-    if( data.is_compact() && data.is_contiguous())
-    {
-        s_data_compact = data.schema();
-    }
-    else
-    {
-        data.schema().compact_to(s_data_compact);
-    }
-    
-    std::string snd_schema_json = s_data_compact.to_json();
-        
-    conduit::Schema s_msg;
-    s_msg["schema_len"].set(conduit::DataType::int64());
-    s_msg["schema"].set(conduit::DataType::char8_str(static_cast<int64_t>(snd_schema_json.size()+1)));
-    s_msg["data"].set(s_data_compact);
-    
-    // create a compact schema to use
-    conduit::Schema s_msg_compact;
-    s_msg.compact_to(s_msg_compact);
-
-    conduit::Node entry(s_msg_compact);
-    // these sets won't realloc since schemas are compatible
-    entry["schema_len"].set(static_cast<int64_t>(snd_schema_json.length()));
-    entry["schema"].set(snd_schema_json);
-    entry["data"].update(data);
+    conduit::Node entry;
+    godrick::packConduitMessage(data, entry, m_schemaMode, m_schemaCache);
 
     size_t msg_data_size = static_cast<size_t>(entry.total_bytes_compact());
-    
-    //if(!conduit::utils::value_fits<size_t,int>(msg_data_size))
-    //{
-    //    spdlog::warn("Warning size value ( {} ) exceeds the size of MPI_Send max value ( {} )", msg_data_size, std::numeric_limits<int>::max());
-    //}
-    //zmq::message_t msg(entry.data_ptr(), static_cast<int>(msg_data_size));
     zmq::message_t msg(entry.data_ptr(), msg_data_size);
     m_socket.send(msg, zmq::send_flags::none); // Not doing asynchronous for now.
     return true;
@@ -311,35 +336,12 @@ godrick::MessageResponse godrick::grzmq::CommunicatorZMQ::receive(std::vector<co
 
 godrick::MessageResponse godrick::grzmq::CommunicatorZMQ::receiveConduitFormat(std::vector<conduit::Node>& data, zmq::message_t& msg)
 {
-    conduit::Node n_buffer(conduit::DataType::uint8(static_cast<int>(msg.size())));
-
-    uint8_t *n_buff_ptr = reinterpret_cast<uint8_t*>(n_buffer.data_ptr());
-
-    conduit::Node n_msg;
-
-    // Copy the data to the conduit
-    memcpy(n_buffer.data_ptr(), msg.data(), msg.size());
-
-    // length of the schema is sent as a 64-bit signed int
-    // NOTE: we aren't using this value  ... 
-    n_msg["schema_len"].set_external(reinterpret_cast<int64_t*>(n_buff_ptr));
-    n_buff_ptr +=8;
-    // wrap the schema string
-    n_msg["schema"].set_external_char8_str(reinterpret_cast<char*>(n_buff_ptr));
-    // create the schema
-    conduit::Schema rcv_schema;
-    conduit::Generator gen(n_msg["schema"].as_char8_str());
-    gen.walk(rcv_schema);
-
-    // advance by the schema length
-    n_buff_ptr += n_msg["schema"].total_bytes_compact();
-    
-    // apply the schema to the data
-    n_msg["data"].set_external(rcv_schema,n_buff_ptr);
-    
-    // copy out to our result node
-    data[0].update(n_msg["data"]);
-
+    // The message buffer stays valid until the data is copied out
+    if(!godrick::unpackConduitMessage(static_cast<uint8_t*>(msg.data()), msg.size(), data[0], m_schemaMode, m_schemaCache))
+    {
+        data.clear();
+        return godrick::MessageResponse::ERROR;
+    }
 
     return godrick::MessageResponse::MESSAGES;
 }
@@ -0,0 +1,100 @@
+#include <catch2/catch.hpp>
+
+#include <godrick/mpi/godrickMPI.h>
+#include <spdlog/spdlog.h>
+
+#include <filesystem>
+
+// The communicator sends a batch once it holds 3 messages or 40 bytes, see data/config.MPIBatchingWorkflow.json.
+// Each get returns the messages of one batch, in the order they were pushed.
+SCENARIO("MPI transport with Broadcast protocol and batched messages.")
+{
+    int size_world, rank;
+    MPI_Comm_size(MPI_COMM_WORLD, &size_world);
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+
+    if( size_world != 4 )
+    {
+        spdlog::error("Unit test mpi batching requires 4 mpi processes." );
+        REQUIRE(false);
+        return;
+    }
+
+    // Check that the config file exist
+    std::string configPath = "data/config.MPIBatchingWorkflow.json";
+    REQUIRE(std::filesystem::exists(configPath));
+
+    auto handler = godrick::mpi::GodrickMPI();
+
+    if(rank == 0)
+    {
+        // Sender code
+        std::string taskName = "send";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // 3 small messages, sent when the batch is full
+        uint32_t step = 0;
+        for(; step < 3; ++step)
+        {
+            conduit::Node data;
+            data["data"] = step;
+            REQUIRE(handler.push("out", data));
+        }
+
+        // A message over the size limit, sent on its own
+        conduit::Node large;
+        large["data"] = step++;
+        large["values"].set(std::vector<double>(8, 1.0));
+        REQUIRE(handler.push("out", large));
+
+        // 2 small messages, sent by the flush
+        for(; step < 6; ++step)
+        {
+            conduit::Node data;
+            data["data"] = step;
+            REQUIRE(handler.push("out", data));
+        }
+        handler.flush("out");
+
+        // A pending message, sent before the terminate message when closing
+        conduit::Node data;
+        data["data"] = step;
+        REQUIRE(handler.push("out", data));
+
+        // Closing the application
+        handler.close();
+    }
+    else 
+    {
+        // Receiver code
+        std::string taskName = "receive";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Receiving the data
+        std::vector<conduit::Node> receivedData;
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 3);
+        for(uint32_t i = 0; i < 3; ++i)
+            REQUIRE(receivedData[i]["data"].as_uint32() == i);
+
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["data"].as_uint32() == 3);
+        REQUIRE(receivedData[0]["values"].dtype().number_of_elements() == 8);
+
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 2);
+        REQUIRE(receivedData[0]["data"].as_uint32() == 4);
+        REQUIRE(receivedData[1]["data"].as_uint32() == 5);
+
+        // The terminate message is never batched with the pending message
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["data"].as_uint32() == 6);
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::TERMINATE);
+        REQUIRE(receivedData.size() == 1);
+
+        // Closing the application
+        handler.close();
+    }
+}
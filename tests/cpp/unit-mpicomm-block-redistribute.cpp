@@ -0,0 +1,89 @@
+#include <catch2/catch.hpp>
+
+#include <godrick/mpi/godrickMPI.h>
+#include <spdlog/spdlog.h>
+
+#include <filesystem>
+
+// Global array of 6x4 elements holding their row-major index
+static const int64_t NB_ROWS = 6;
+static const int64_t NB_COLUMNS = 4;
+
+SCENARIO("MPI transport with Block Redistribute protocol between 3 ranks and 1 rank.")
+{
+    int size_world, rank;
+    MPI_Comm_size(MPI_COMM_WORLD, &size_world);
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+
+    if( size_world != 4 )
+    {
+        spdlog::error("Unit test mpi block redistribute requires 4 mpi processes." );
+        REQUIRE(false);
+        return;
+    }
+
+    // Check that the config file exist
+    std::string configPath = "data/config.MPIBlockRedistributeWorkflow.json";
+    REQUIRE(std::filesystem::exists(configPath));
+
+    auto handler = godrick::mpi::GodrickMPI();
+
+    if(rank < 3)
+    {
+        // The 3 ranks own 2 rows each for the gather, 1, 1 and 2 columns after the scatter
+        std::string taskName = "blocks";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Sending the rows of the rank
+        conduit::Node data;
+        std::vector<double> values;
+        for(int64_t i = 2 * rank; i < 2 * rank + 2; ++i)
+            for(int64_t j = 0; j < NB_COLUMNS; ++j)
+                values.push_back(static_cast<double>(i * NB_COLUMNS + j));
+        data["data"].set(values);
+        REQUIRE(handler.push("out", data));
+        handler.flush("out");
+
+        // Receiving the columns of the rank
+        std::vector<conduit::Node> receivedData;
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        const int64_t* start = receivedData[0]["block/start"].as_int64_ptr();
+        const int64_t* count = receivedData[0]["block/count"].as_int64_ptr();
+        REQUIRE(start[0] == 0);
+        REQUIRE(start[1] == rank);
+        REQUIRE(count[0] == NB_ROWS);
+        REQUIRE(count[1] == (rank < 2 ? 1 : 2));
+        const double* block = receivedData[0]["data"].as_float64_ptr();
+        for(int64_t i = 0; i < count[0]; ++i)
+            for(int64_t j = 0; j < count[1]; ++j)
+                REQUIRE(block[i * count[1] + j] == static_cast<double>(i * NB_COLUMNS + start[1] + j));
+
+        // Closing the application, the terminate message of the other task closes the input port
+        handler.close();
+    }
+    else 
+    {
+        std::string taskName = "whole";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Receiving the whole array from the 3 ranks
+        std::vector<conduit::Node> receivedData;
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["data"].dtype().number_of_elements() == NB_ROWS * NB_COLUMNS);
+        const double* values = receivedData[0]["data"].as_float64_ptr();
+        for(int64_t i = 0; i < NB_ROWS * NB_COLUMNS; ++i)
+            REQUIRE(values[i] == static_cast<double>(i));
+
+        // Sending it back to the 3 ranks
+        REQUIRE(handler.push("out", receivedData[0]));
+        handler.flush("out");
+
+        // Every rank of the other task closed its output port
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::TERMINATE);
+
+        // Closing the application
+        handler.close();
+    }
+}
@@ -0,0 +1,152 @@
+#include <catch2/catch.hpp>
+
+#include <godrick/mpi/godrickMPI.h>
+#include <godrick/shm/communicatorSHM.h>
+#include <spdlog/spdlog.h>
+
+#include <filesystem>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+// Same settings as data/config.SHMRingWorkflow.json
+static const char* SEGMENT_NAME = "/godrick.test.SHMRingWorkflow.myComm";
+static const uint64_t CAPACITY = 4;
+static const uint64_t SLOT_SIZE = 64;
+
+// Leave a segment behind like a run which crashed with unread messages in the ring
+static bool createStaleSegment()
+{
+    size_t segmentSize = sizeof(godrick::shm::RingHeader) + CAPACITY * (sizeof(godrick::shm::SlotHeader) + SLOT_SIZE);
+    int fd = shm_open(SEGMENT_NAME, O_CREAT | O_RDWR, 0600);
+    if(fd < 0)
+        return false;
+    if(ftruncate(fd, static_cast<off_t>(segmentSize)) != 0)
+    {
+        close(fd);
+        return false;
+    }
+    void* segment = mmap(nullptr, segmentSize, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+    if(segment == MAP_FAILED)
+        return false;
+
+    auto header = static_cast<godrick::shm::RingHeader*>(segment);
+    header->head = 7;
+    header->tail = 5;
+    header->generation = 3;
+    header->consumerGeneration = 3;
+    for(uint64_t i = 0; i < CAPACITY; ++i)
+    {
+        auto slot = reinterpret_cast<godrick::shm::SlotHeader*>(static_cast<uint8_t*>(segment) + sizeof(godrick::shm::RingHeader) + i * (sizeof(godrick::shm::SlotHeader) + SLOT_SIZE));
+        slot->totalSize = 8;
+        slot->offset = 0;
+        slot->chunkSize = 8;
+    }
+    munmap(segment, segmentSize);
+    return true;
+}
+
+SCENARIO("SHM transport with a nonblocking ring left behind by a previous run.")
+{
+    int size_world, rank;
+    MPI_Comm_size(MPI_COMM_WORLD, &size_world);
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+
+    if( size_world < 2 )
+    {
+        spdlog::error("Unit test shm requires at least 2 processes." );
+        REQUIRE(false);
+        return;
+    }
+
+    if (rank >= 2)
+    {
+        // The ring only uses 2 processes but all the unit tests using MPI 
+        // have 4 processes. Ignoring the other 2.
+
+        // Calling Barrier to unlock the stale segment barrier
+        MPI_Barrier(MPI_COMM_WORLD);
+
+        // Calling Barrier to unlock the empty ring barrier
+        MPI_Barrier(MPI_COMM_WORLD);
+
+        //Calling Barrier to unlok the handler.close()
+        MPI_Barrier(MPI_COMM_WORLD);
+        MPI_Finalize();
+        return;
+    }
+
+    // Check that the config file exist
+    std::string configPath = "data/config.SHMRingWorkflow.json";
+    REQUIRE(std::filesystem::exists(configPath));
+
+    // Barrier to create the stale segment before any side opens it
+    if(rank == 0)
+        REQUIRE(createStaleSegment());
+    MPI_Barrier(MPI_COMM_WORLD);
+
+    auto handler = godrick::mpi::GodrickMPI();
+
+    if(rank == 0)
+    {
+        // Sender code
+        std::string taskName = "sendshm";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Barrier to let the receiver find the ring empty first
+        MPI_Barrier(MPI_COMM_WORLD);
+
+        // A message fitting in a slot
+        conduit::Node data;
+        uint32_t val = 10;
+        data["data"] = val;
+        REQUIRE(handler.push("out", data));
+
+        // A message larger than the whole ring, written in chunks while the receiver reads them
+        conduit::Node array;
+        std::vector<double> values(100);
+        for(size_t i = 0; i < values.size(); ++i)
+            values[i] = static_cast<double>(i);
+        array["values"].set(values);
+        REQUIRE(handler.push("out", array));
+
+        // Closing the application
+        handler.close();
+    }
+    else 
+    {
+        // Receiver code
+        std::string taskName = "receiveshm";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // The messages left in the stale segment are never received
+        std::vector<conduit::Node> receivedData;
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::EMPTY);
+
+        MPI_Barrier(MPI_COMM_WORLD);
+
+        // Receiving the data, the receiver doesn't wait for the messages
+        godrick::MessageResponse response;
+        while((response = handler.get("in", receivedData)) == godrick::MessageResponse::EMPTY) {}
+        REQUIRE(response == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        uint32_t val = 10;
+        REQUIRE(receivedData[0]["data"].as_uint32() == val);
+
+        while((response = handler.get("in", receivedData)) == godrick::MessageResponse::EMPTY) {}
+        REQUIRE(response == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["values"].dtype().number_of_elements() == 100);
+        const double* values = receivedData[0]["values"].as_float64_ptr();
+        for(size_t i = 0; i < 100; ++i)
+            REQUIRE(values[i] == static_cast<double>(i));
+
+        // The terminate message closes the port before closing the application
+        while((response = handler.get("in", receivedData)) == godrick::MessageResponse::EMPTY) {}
+        REQUIRE(response == godrick::MessageResponse::TERMINATE);
+
+        handler.close();
+    }
+}
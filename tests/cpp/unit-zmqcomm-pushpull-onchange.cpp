@@ -0,0 +1,108 @@
+#include <catch2/catch.hpp>
+
+#include <godrick/mpi/godrickMPI.h>
+#include <spdlog/spdlog.h>
+
+#include <filesystem>
+
+// The layout of the messages changes twice, the receiver must follow the schema of the sender
+static void pushSequence(godrick::mpi::GodrickMPI& handler)
+{
+    for(uint32_t i = 0; i < 2; ++i)
+    {
+        conduit::Node data;
+        data["data"] = 10 + i;
+        REQUIRE(handler.push("out", data));
+    }
+    for(uint32_t i = 0; i < 2; ++i)
+    {
+        conduit::Node data;
+        std::vector<double> values = {1.0 * i, 2.0 * i, 3.0 * i};
+        data["data"].set(values);
+        data["step"] = static_cast<int32_t>(i);
+        REQUIRE(handler.push("out", data));
+    }
+    conduit::Node data;
+    data["data"] = static_cast<uint32_t>(12);
+    REQUIRE(handler.push("out", data));
+}
+
+static void checkSequence(godrick::mpi::GodrickMPI& handler)
+{
+    std::vector<conduit::Node> receivedData;
+    for(uint32_t i = 0; i < 2; ++i)
+    {
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["data"].as_uint32() == 10 + i);
+    }
+    for(uint32_t i = 0; i < 2; ++i)
+    {
+        REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+        REQUIRE(receivedData.size() == 1);
+        REQUIRE(receivedData[0]["data"].dtype().number_of_elements() == 3);
+        const double* values = receivedData[0]["data"].as_float64_ptr();
+        REQUIRE(values[0] == 1.0 * i);
+        REQUIRE(values[2] == 3.0 * i);
+        REQUIRE(receivedData[0]["step"].as_int32() == static_cast<int32_t>(i));
+    }
+    REQUIRE(handler.get("in", receivedData) == godrick::MessageResponse::MESSAGES);
+    REQUIRE(receivedData.size() == 1);
+    REQUIRE(receivedData[0]["data"].as_uint32() == 12);
+    REQUIRE(!receivedData[0].has_child("step"));
+}
+
+SCENARIO("ZMQ transport with PUSH_PULL protocol and the schema sent on change.")
+{
+    int size_world, rank;
+    MPI_Comm_size(MPI_COMM_WORLD, &size_world);
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+
+    if( size_world < 2 )
+    {
+        spdlog::error("Unit test zmq requires at least 2 processes." );
+        REQUIRE(false);
+        return;
+    }
+
+    if (rank >= 2)
+    {
+        // The pushpull only uses 2 processes for now but all the unit tests using MPI 
+        // have 4 processes. Ignoring the other 2.
+        MPI_Barrier(MPI_COMM_WORLD);
+        MPI_Finalize();
+        return;
+    }
+
+    // Check that the config file exist
+    std::string configPath = "data/config.ZMQPushPullOnChangeWorkflow.json";
+    REQUIRE(std::filesystem::exists(configPath));
+
+    auto handler = godrick::mpi::GodrickMPI();
+
+    if(rank == 0)
+    {
+        // Sender code
+        std::string taskName = "sendpushpull";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Sending the data
+        pushSequence(handler);
+        handler.flush("out");
+
+        // Closing the application
+        handler.close();
+    }
+    else 
+    {
+        // Receiver code
+        std::string taskName = "receivepushpull";
+        REQUIRE(handler.initFromJSON(configPath, taskName));
+
+        // Receiving the data
+        checkSequence(handler);
+
+        // Closing the application
+        handler.close();
+    }
+}
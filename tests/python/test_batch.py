@@ -0,0 +1,67 @@
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol
+from godrick.batch import generateBatch
+
+from functools import partial
+from pathlib import Path
+import json
+import os
+
+def buildVariant(firstCores:int, protocol:MPICommunicatorProtocol) -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange([firstCores, 4 - firstCores])
+
+    workflow = Workflow(f"Batch{firstCores}{protocol.name}")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm = MPIPairedCommunicator(id="comm", protocol=protocol)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    return workflow
+
+def buildInvalidVariant() -> Workflow:
+    workflow = Workflow("BatchInvalid")
+    workflow.declareTask(MPITask(name="noResources", cmdline="bin/task"))
+    return workflow
+
+def test_generateBatch(tmp_path):
+    builders = [partial(buildVariant, cores, protocol) for cores in [1, 2, 3] for protocol in [MPICommunicatorProtocol.BROADCAST, MPICommunicatorProtocol.PARTIAL_BCAST_GATHER]]
+    builders.append(buildInvalidVariant)
+
+    manifest = generateBatch(builders, tmp_path, nbWorkers=2)
+
+    assert manifest["nbVariants"] == 7
+    assert manifest["nbFailed"] == 1
+    assert "error" in manifest["variants"][6]
+    assert (tmp_path / "manifest.json").is_file()
+    with open(tmp_path / "manifest.json") as f:
+        assert json.load(f)["nbVariants"] == 7
+
+    for variant in manifest["variants"][:6]:
+        folder = Path(variant["folder"])
+        assert folder.parent == tmp_path.resolve()
+        assert sorted(os.listdir(folder)) == variant["files"]
+
+    # Variant 2 uses 2 cores per node for each task
+    assert manifest["variants"][2]["tasks"] == {"send": 6, "receive": 6}
+    with open(Path(manifest["variants"][2]["folder"]) / manifest["variants"][2]["commandFile"]) as f:
+        assert f.read().endswith("-np 6 bin/send : -np 6 bin/receive")
+
+def test_generateBatchSerial(tmp_path):
+    builders = [partial(buildVariant, cores, MPICommunicatorProtocol.BROADCAST) for cores in [1, 2]]
+    currentFolder = os.getcwd()
+    manifest = generateBatch(builders, tmp_path, nbWorkers=1)
+    assert manifest["nbFailed"] == 0
+    assert [variant["name"] for variant in manifest["variants"]] == ["Batch1BROADCAST", "Batch2BROADCAST"]
+    # The variants are generated in their folder without moving the current process there
+    assert os.getcwd() == currentFolder
+    assert not Path("config.Batch1BROADCAST.json").exists()
@@ -0,0 +1,128 @@
+from godrick.workflow import Workflow
+from godrick.task import MPITask
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol, ZMQPairedCommunicator, ZMQPortAllocator
+from godrick.cache import ArtifactCache
+
+import os
+from pathlib import Path
+
+def createWorkflow(coreRanges:list, zmq:bool = False) -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange(coreRanges)
+
+    workflow = Workflow("CacheWorkflow")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0])
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1])
+    task2.addInputPort("in")
+    comm = MPIPairedCommunicator(id="myComm", protocol=MPICommunicatorProtocol.PARTIAL_BCAST_GATHER)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    if zmq:
+        task1.addOutputPort("zmqOut")
+        task2.addInputPort("zmqIn")
+        zmqComm = ZMQPairedCommunicator(id="zmqComm", useIPC=False)
+        zmqComm.connectToOutputPort(task1.getOutputPort("zmqOut"))
+        zmqComm.connectToInputPort(task2.getInputPort("zmqIn"))
+        workflow.declareCommunicator(zmqComm)
+    return workflow
+
+def test_artifactCacheHit(tmp_path):
+    cache = ArtifactCache()
+
+    launcher = MainLauncher(cache=cache)
+    launcher.generateOutputFiles(workflow=createWorkflow([2, 2]), folder=tmp_path)
+    files = launcher.getOutputFiles()
+    assert len(files) == 4
+    contents = {path: path.read_bytes() for path in files}
+    mtimes = {path.resolve(): path.stat().st_mtime_ns for path in files}
+    assert cache.getStatistics()["misses"] == 1
+
+    # The same workflow built again is a hit, nothing is rewritten
+    launcher = MainLauncher(cache=cache)
+    launcher.generateOutputFiles(workflow=createWorkflow([2, 2]), folder=tmp_path)
+    assert cache.getStatistics()["hits"] == 1
+    assert cache.getHitRate() == 0.5
+    for path in launcher.getOutputFiles():
+        assert path.stat().st_mtime_ns == mtimes[path]
+    assert launcher.getCommandFile().name == "launch.CacheWorkflow.sh"
+    assert os.access(launcher.getCommandFile(), os.X_OK)
+
+    # Deleted files are restored from the cache
+    launcher.removeFiles()
+    for path in files:
+        assert not path.is_file()
+    launcher = MainLauncher(cache=cache)
+    launcher.generateOutputFiles(workflow=createWorkflow([2, 2]), folder=tmp_path)
+    for path in files:
+        assert path.read_bytes() == contents[path]
+    assert cache.getHitRate() == 2 / 3
+
+    # A different split of the resources is a miss
+    launcher = MainLauncher(cache=cache)
+    launcher.generateOutputFiles(workflow=createWorkflow([1, 3]), folder=tmp_path)
+    assert cache.getStatistics()["misses"] == 2
+    assert cache.getNbEntries() == 2
+
+    launcher.removeFiles()
+
+def test_artifactCacheProcessedState(tmp_path):
+    cache = ArtifactCache()
+    launcher = MainLauncher(cache=cache)
+    workflow = createWorkflow([2, 2], zmq=True)
+    launcher.generateOutputFiles(workflow=workflow, folder=tmp_path)
+    ports = launcher.getPortAllocator().getAssignments()
+    assert len(ports) > 0
+
+    # A hit leaves the workflow in the same state as a generation
+    allocator = ZMQPortAllocator()
+    launcher = MainLauncher(cache=cache, portAllocator=allocator)
+    cachedWorkflow = createWorkflow([2, 2], zmq=True)
+    launcher.generateOutputFiles(workflow=cachedWorkflow, folder=tmp_path)
+    assert cache.getStatistics()["hits"] == 1
+    cachedTasks = {task.getName(): task for task in cachedWorkflow.getTasks()}
+    cachedComms = {comm.getName(): comm for comm in cachedWorkflow.getCommunicators()}
+    for task in workflow.getTasks():
+        cachedTask = cachedTasks[task.getName()]
+        assert [process.hostname for process in cachedTask.getProcessList()] == [process.hostname for process in task.getProcessList()]
+        assert cachedTask.getGlobalStartRank() == task.getGlobalStartRank()
+        assert cachedTask.getGlobalNbRank() == task.getGlobalNbRank()
+    for comm in workflow.getCommunicators():
+        cachedComm = cachedComms[comm.getName()]
+        assert cachedComm.hasBeenProcessed()
+        assert cachedComm.toDict() == comm.toDict()
+        assert len(cachedComm.senderProcesses) == len(comm.senderProcesses)
+        assert len(cachedComm.receiverProcesses) == len(comm.receiverProcesses)
+
+    # The ports of the cached workflow are reserved again
+    assert allocator.getAssignments() == ports
+
+    launcher.removeFiles()
+
+def test_artifactCacheEviction(tmp_path):
+    # Room for a single set of artifacts
+    cache = ArtifactCache()
+    launcher = MainLauncher(cache=cache)
+    launcher.generateOutputFiles(workflow=createWorkflow([2, 2]), folder=tmp_path)
+    size = cache.getSize()
+    launcher.removeFiles()
+
+    cache = ArtifactCache(maxBytes=size + size // 2)
+    for coreRanges in [[2, 2], [1, 3], [2, 2]]:
+        launcher = MainLauncher(cache=cache)
+        launcher.generateOutputFiles(workflow=createWorkflow(coreRanges), folder=tmp_path)
+        launcher.removeFiles()
+
+    statistics = cache.getStatistics()
+    assert statistics["hits"] == 0
+    assert statistics["misses"] == 3
+    assert statistics["evictions"] == 2
+    assert cache.getNbEntries() == 1
+    assert cache.getSize() <= size + size // 2
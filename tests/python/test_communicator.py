@@ -2,11 +2,13 @@ from godrick.workflow import Workflow
 from godrick.task import MPITask, MPIPlacementPolicy
 from godrick.launcher import MainLauncher
 from godrick.computeResources import ComputeCollection
-from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol, CommunicatorTransportType
+from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol, CommunicatorTransportType, CommunicatorFactory
+from godrick.redistribution import computeOverlapPlan
 
 import os
 from pathlib import Path
 import json
+import pytest
 
 def test_MPICommunicator():
     exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
@@ -63,3 +65,94 @@ def test_MPICommunicator():
 
     launcher.removeFiles()
 
+def createRedistributionWorkflow(senderGrid:list, receiverGrid:list) -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange([1, 3])
+
+    workflow = Workflow("MPIRedistributionWorkflow")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+
+    comm = MPIPairedCommunicator("redistribute")
+    comm.setBlockRedistribution(extent=[10, 4], senderGrid=senderGrid, receiverGrid=receiverGrid, field="values")
+    comm.connectToInputPort(task2.getInputPort("in"))
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    return workflow
+
+def test_MPICommunicatorBlockRedistribution():
+    # 3 senders split the rows, 9 receivers use a 3x3 grid: neither count divides the other
+    workflow = createRedistributionWorkflow([3, 1], [3, 3])
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        commDict = json.load(f)["communicators"][0]
+        assert commDict["mpiprotocol"] == MPICommunicatorProtocol.BLOCK_REDISTRIBUTE.name
+        assert commDict["outSize"] == 3
+        assert commDict["inSize"] == 9
+        redistribution = commDict["redistribution"]
+        assert redistribution["field"] == "values"
+        plan = redistribution["plan"]
+        assert plan["senderBlocks"][1] == {"start": [3, 0], "count": [3, 4]}
+        assert plan["receiverBlocks"][4] == {"start": [3, 1], "count": [3, 1]}
+
+        # The second sender owns the rows 3 to 5, shared by the receivers of the second and third grid rows
+        assert plan["sends"][1] == [{"rank": 3, "start": [3, 0], "count": [3, 1]},
+                                    {"rank": 4, "start": [3, 1], "count": [3, 1]},
+                                    {"rank": 5, "start": [3, 2], "count": [3, 2]}]
+        assert plan["receives"][6] == [{"rank": 2, "start": [6, 0], "count": [4, 1]}]
+
+        # Every element is sent exactly once
+        assert sum(box["count"][0] * box["count"][1] for boxes in plan["sends"] for box in boxes) == 40
+
+    launcher.removeFiles()
+
+    # The grids must match the number of ranks of the tasks
+    workflow = createRedistributionWorkflow([2, 1], [3, 3])
+    launcher = MainLauncher()
+    with pytest.raises(RuntimeError):
+        launcher.generateOutputFiles(workflow=workflow)
+    launcher.removeFiles()
+
+    # Each rank must own at least one element along every dimension
+    with pytest.raises(ValueError):
+        computeOverlapPlan([2], [1], [4])
+    with pytest.raises(ValueError):
+        MPIPairedCommunicator("tooManyBlocks").setBlockRedistribution([2, 8], [1, 1], [3, 1])
+
+def test_MPICommunicatorBatching():
+    comm = MPIPairedCommunicator("diagnostics", protocol=MPICommunicatorProtocol.PARTIAL_BCAST_GATHER)
+    assert not comm.isBatching()
+    comm.setBatchingPolicy(maxCount=64, maxBytes=65536, maxLinger=0.01)
+    assert comm.isBatching()
+
+    data = comm.toDict()
+    assert data["batching"] == {"maxCount": 64, "maxBytes": 65536, "maxLinger": 0.01}
+    parsed = CommunicatorFactory().jsonToCommunicator(data)
+    assert (parsed.batchMaxCount, parsed.batchMaxBytes, parsed.batchMaxLinger) == (64, 65536, 0.01)
+
+    # Configurations written before the batching policy send every message on its own
+    del data["batching"]
+    assert not CommunicatorFactory().jsonToCommunicator(data).isBatching()
+
+    with pytest.raises(ValueError):
+        comm.setBatchingPolicy(maxCount=0)
+    with pytest.raises(ValueError):
+        comm.setBatchingPolicy(maxBytes=-1)
+    with pytest.raises(ValueError):
+        comm.setBatchingPolicy(maxLinger=-0.5)
+
+    # The redistribution sends the blocks of a single array per message
+    workflow = createRedistributionWorkflow([1, 1], [3, 1])
+    workflow.getCommunicators()[0].setBatchingPolicy(maxCount=8)
+    launcher = MainLauncher()
+    with pytest.raises(RuntimeError):
+        launcher.generateOutputFiles(workflow=workflow)
+    launcher.removeFiles()
@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 import pytest
 
-from godrick.computeResources import ComputeCollection
+from godrick.computeResources import ComputeCollection, ComputeDomain, ComputeSocket, CoreRangeSet, expandNodeList, expandRepeatCounts
 
 def test_singleHost():
 
@@ -38,4 +38,193 @@ def test_clusterSocketOutOfBound():
     node = cluster.getNodeByIndex(0)
     
     with pytest.raises(Exception) as e_info:
-        socket = node.getSocketByIndex(1)
\ No newline at end of file
+        socket = node.getSocketByIndex(1)
+
+def test_coreTable():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    table = cluster.getCoreTable()
+    assert table.getNbCores() == 12
+    assert table.getNbNodes() == 3
+    assert table.getNbSockets() == 3
+    assert table.hostnames == ["machine1", "machine2", "machine3"]
+    assert list(table.nodeIds) == [0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2]
+    assert list(table.mainThreads) == [0, 1, 2, 3] * 3
+    assert list(table.hyperThreads) == [4, 5, 6, 7] * 3
+    assert table.getNodeRanges() == [(0, 4), (4, 8), (8, 12)]
+    assert table.getSocketRanges() == [(0, 4), (4, 8), (8, 12)]
+    assert table.getHostName(5) == "machine2"
+
+    # Dict views are built from the table
+    cores = cluster.getListOfCores()
+    assert len(cores) == 12
+    assert cores[4] == {"hostname": "machine2", "mainthread": 0, "hyperthread": 4}
+    assert len(cluster.getListOfCoresPerNode()) == 3
+    assert cluster.getListOfCoresPerSocket()[2][3] == {"hostname": "machine3", "mainthread": 3, "hyperthread": 7}
+
+def test_coreTableNoHT():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, False)
+
+    table = cluster.getCoreTable()
+    assert list(table.hyperThreads) == [-1, -1, -1, -1]
+    assert not table.hasHyperthread(0)
+    assert cluster.getListOfCores()[0] == {"hostname": "machine1", "mainthread": 0}
+
+def test_initFromSysfs():
+    sysfsRoot = Path(__file__).resolve().parent / "../../data/tests/sysfs/dualsocket"
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromLocalhost(useHT=True, sysfsRoot=sysfsRoot)
+
+    assert cluster.getNbNodes() == 1
+    node = cluster.getNodeByIndex(0)
+    assert node.getHostName() == "localhost"
+    assert node.getNbSockets() == 2
+
+    # Siblings are paired from thread_siblings_list, not assumed at offset + nbCores
+    socket0 = node.getSocketByIndex(0)
+    assert socket0.getCoresIndexes() == [0, 1]
+    assert socket0.getHTIndexes() == [4, 5]
+    assert socket0.getNUMAIndexes() == [0, 0]
+    socket1 = node.getSocketByIndex(1)
+    assert socket1.getCoresIndexes() == [2, 3]
+    assert socket1.getHTIndexes() == [6, 7]
+    assert socket1.getNUMAIndexes() == [1, 1]
+
+    table = cluster.getCoreTable()
+    assert list(table.numaIds) == [0, 0, 1, 1]
+    assert list(table.socketIds) == [0, 0, 1, 1]
+
+def test_initFromSysfsNoHT():
+    sysfsRoot = Path(__file__).resolve().parent / "../../data/tests/sysfs/dualsocket"
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromLocalhost(useHT=False, sysfsRoot=sysfsRoot)
+
+    socket = cluster.getNodeByIndex(0).getSocketByIndex(1)
+    assert socket.hasHyperthreads() == False
+    assert socket.getCoresIndexes() == [2, 3]
+    assert socket.getHTIndexes() == []
+
+def test_expandNodeList():
+    assert list(expandNodeList("nid[0001-0003,0010],login1")) == ["nid0001", "nid0002", "nid0003", "nid0010", "login1"]
+    assert list(expandNodeList("rack[1-2]-node[01-02]")) == ["rack1-node01", "rack1-node02", "rack2-node01", "rack2-node02"]
+    assert list(expandRepeatCounts("36(x2),72")) == [36, 36, 72]
+
+    # Expansion is lazy, a large range does not get materialized
+    hosts = expandNodeList("nid[000001-999999]")
+    assert next(hosts) == "nid000001"
+
+def test_initFromNodeList():
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromNodeList("nid[0001-0003]", "4(x2),2", False)
+    assert cluster.getNbNodes() == 3
+    assert [cluster.getNodeByIndex(i).getHostName() for i in range(3)] == ["nid0001", "nid0002", "nid0003"]
+    assert [cluster.getNodeByIndex(i).getNbCores() for i in range(3)] == [4, 4, 2]
+
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromNodeList("nid[0001-4096]", 128, True)
+    assert cluster.getNbNodes() == 4096
+    assert cluster.getCoreTable().getNbCores() == 4096 * 128
+
+    cluster = ComputeCollection(name="myCluster")
+    with pytest.raises(ValueError):
+        cluster.initFromNodeList("nid[0001-0003]", "4(x2)", False)
+
+def test_initFromSlurmEnvironment():
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromSlurmEnvironment(addHT=True, environment={"SLURM_JOB_NODELIST": "machine[1-2]", "SLURM_JOB_CPUS_PER_NODE": "4(x2)"})
+    assert cluster.getNbNodes() == 2
+    socket = cluster.getNodeByIndex(1).getSocketByIndex(0)
+    assert socket.getCoresIndexes() == [0, 1, 2, 3]
+    assert socket.getHTIndexes() == [4, 5, 6, 7]
+
+def test_initFromOpenMPIHostFile():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/openmpihost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromOpenMPIHostFile(exampleFile, False)
+    assert cluster.getNbNodes() == 3
+    assert [cluster.getNodeByIndex(i).getNbCores() for i in range(3)] == [4, 2, 1]
+
+def test_coreRangeSet():
+    cores = CoreRangeSet.fromList([0, 1, 2, 3, 8, 9, 4])
+    assert cores.getNbIntervals() == 3
+    assert len(cores) == 7
+    assert cores.toList() == [0, 1, 2, 3, 8, 9, 4]
+
+    positions = cores.findPositionsInRange(2, 8)
+    assert positions == [(2, 4), (4, 5), (6, 7)]
+    assert cores.selectPositions(positions).toList() == [2, 3, 8, 4]
+
+def test_splitNodesByCoreRangeKeepsHTPairs():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    partitions = cluster.splitNodesByCoreRange([1, 3])
+    assert len(partitions) == 2
+    for partition in partitions:
+        assert partition.getNbNodes() == 3
+
+    socket = partitions[1].getNodeByIndex(2).getSocketByIndex(0)
+    assert socket.getHostName() == "machine3"
+    assert socket.getCoresIndexes() == [1, 2, 3]
+    assert socket.getHTIndexes() == [5, 6, 7]
+    assert partitions[0].getListOfCores()[0] == {"hostname": "machine1", "mainthread": 0, "hyperthread": 4}
+
+    with pytest.raises(RuntimeError):
+        cluster.splitNodesByCoreRange([4, 1])
+
+def test_splitByCoreDemandsSocketAligned():
+    sysfsRoot = Path(__file__).resolve().parent / "../../data/tests/sysfs/dualsocket"
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromLocalhost(useHT=True, sysfsRoot=sysfsRoot)
+
+    # A flat split would give cores 1 and 2 (straddling the sockets) to the second task
+    partitions, nbSpanning = cluster.splitByCoreDemands([1, 2])
+    assert nbSpanning == 0
+    assert partitions[0].getListOfCores() == [{"hostname": "localhost", "mainthread": 2, "hyperthread": 6}]
+    assert [core["mainthread"] for core in partitions[1].getListOfCores()] == [0, 1]
+    assert partitions[1].getNodeByIndex(0).getSocketByIndex(0).getHTIndexes() == [4, 5]
+    assert partitions[0].getNodeByIndex(0).getSocketByIndex(0).getNUMAIndexes() == [1]
+
+    partitions, nbSpanning = cluster.splitByCoreDemands([3, 1], ComputeDomain.NUMA)
+    assert nbSpanning == 1
+    assert [core["mainthread"] for core in partitions[0].getListOfCores()] == [0, 1, 2]
+    assert [core["mainthread"] for core in partitions[1].getListOfCores()] == [3]
+
+def test_splitByCoreDemandsMultipleNodes():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    partitions, nbSpanning = cluster.splitByCoreDemands([2, 4, 2, 4])
+    assert nbSpanning == 0
+    assert [partition.getNbNodes() for partition in partitions] == [1, 1, 1, 1]
+
+    partitions, nbSpanning = cluster.splitByCoreDemands([6, 6])
+    assert nbSpanning == 2
+    assert sum(len(partition.getListOfCores()) for partition in partitions) == 12
+
+    with pytest.raises(ValueError):
+        cluster.splitByCoreDemands([8, 8])
+
+def test_socketThreadsReadOnly():
+    socket = ComputeSocket()
+    socket.initManual("machine1", [0, 1, 2, 3], [4, 5, 6, 7])
+
+    # In-place changes would be lost on the range storage, they are rejected
+    with pytest.raises(AttributeError):
+        socket.mainThreads.append(8)
+    with pytest.raises(TypeError):
+        socket.hyperThreads[0] = 9
+    assert socket.getCoresIndexes() == [0, 1, 2, 3]
+    assert socket.getHTIndexes() == [4, 5, 6, 7]
+
+    # Assigning a new list replaces the cores
+    socket.mainThreads = [0, 1, 2, 3, 8]
+    socket.hyperThreads = [4, 5, 6, 7, 9]
+    assert socket.mainThreads == (0, 1, 2, 3, 8)
+    assert socket.getHTIndexes() == [4, 5, 6, 7, 9]
@@ -0,0 +1,106 @@
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol, ZMQPairedCommunicator, ZMQCommunicatorProtocol
+from godrick.ensemble import createEnsemble
+
+import os
+import json
+import pytest
+from pathlib import Path
+
+def test_ensemble():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    # Template workflow, without resources
+    template = Workflow("Member")
+    task1 = MPITask(name="send", cmdline="bin/send --name {name} --config {config}", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive --name {name} --config {config}", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm = MPIPairedCommunicator(id="comm", protocol=MPICommunicatorProtocol.BROADCAST)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    template.declareTask(task1)
+    template.declareTask(task2)
+    template.declareCommunicator(comm)
+
+    ensemble = createEnsemble(template, 3, cluster, {"send": 1, "receive": 3}, name="MemberEnsemble")
+    assert [task.getName() for task in ensemble.getTasks()] == ["send.0", "receive.0", "send.1", "receive.1", "send.2", "receive.2"]
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=ensemble)
+
+    # Each instance is packed on its own node
+    for instance in range(3):
+        hosts = set(proc.hostname for name in ["send", "receive"] for proc in ensemble.getTaskByName(f"{name}.{instance}").getProcessList())
+        assert len(hosts) == 1
+
+    with open(Path("launch.MemberEnsemble.sh")) as f:
+        content = f.read()
+        assert content.count("mpirun") == 1
+        assert "-np 1 bin/send --name send.1 --config config.MemberEnsemble.json : -np 3 bin/receive --name receive.1 --config config.MemberEnsemble.json" in content
+
+    with open(Path(ensemble.getConfigurationFile())) as f:
+        data = json.load(f)
+        comms = {comm["name"]: comm for comm in data["communicators"]}
+        assert len(comms) == 3
+        for instance in range(3):
+            instanceComm = comms[f"comm.{instance}"]
+            assert instanceComm["inputTaskName"] == f"receive.{instance}"
+            assert instanceComm["outStartRank"] == 4 * instance
+            assert instanceComm["outSize"] == 1
+            assert instanceComm["inStartRank"] == 4 * instance + 1
+            assert instanceComm["inSize"] == 3
+
+    # The template itself is untouched
+    assert not task1.hasBeenProcessed()
+    assert comm.getName() == "comm"
+
+    launcher.removeFiles()
+
+def zmqTemplate(port:int = None) -> Workflow:
+    template = Workflow("ZMQMember")
+    task1 = MPITask(name="send", cmdline="bin/send --name {name} --config {config}", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive --name {name} --config {config}", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+    comm = ZMQPairedCommunicator(id="comm", protocol=ZMQCommunicatorProtocol.PUSH_PULL, port=port, useIPC=False)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    template.declareTask(task1)
+    template.declareTask(task2)
+    template.declareCommunicator(comm)
+    return template
+
+def test_ensembleZMQ():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    template = zmqTemplate()
+    ensemble = createEnsemble(template, 2, cluster, {"send": 1, "receive": 1}, name="ZMQMemberEnsemble")
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=ensemble)
+
+    # Both instances run on the same host, each one binds its own port
+    clones = ensemble.getCommunicators()
+    assert [clone.boundPorts for clone in clones] == [[("machine1", 50000)], [("machine1", 50001)]]
+    with open(Path(ensemble.getConfigurationFile())) as f:
+        data = json.load(f)
+        endpoints = [comm["protocolSettings"]["endpoint"] for comm in data["communicators"]]
+        assert endpoints == ["tcp://machine1:50000", "tcp://machine1:50001"]
+
+    # The launcher state of the clones is not shared with the template
+    comm = template.getCommunicators()[0]
+    assert comm.allocatedPorts == [] and comm.boundPorts == [] and comm.protocolSettings == {}
+    assert comm.senderProcesses == [] and comm.receiverProcesses == []
+    launcher.removeFiles()
+
+    # A pinned port would be bound by every instance
+    with pytest.raises(ValueError):
+        createEnsemble(zmqTemplate(port=6000), 2, cluster, {"send": 1, "receive": 1})
+    assert createEnsemble(zmqTemplate(port=6000), 1, cluster, {"send": 1, "receive": 1}).getCommunicators()[0].port == 6000
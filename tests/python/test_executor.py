@@ -0,0 +1,122 @@
+from godrick.executor import WorkflowExecutor
+from godrick.workflow import Workflow
+from godrick.task import MPITask
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+
+import os
+import sys
+import time
+from pathlib import Path
+
+def test_executorSuccess():
+    messages = []
+    executor = WorkflowExecutor(outputCallback=lambda name, stream, line: messages.append((name, stream, line)))
+    executor.addCommand("hello", "echo hello; echo world 1>&2")
+    executor.addCommand("late", "sleep 0.2; echo done")
+
+    assert executor.run(timeout=10)
+
+    assert ("hello", "stdout", "hello") in messages
+    assert ("hello", "stderr", "world") in messages
+    assert ("late", "stdout", "done") in messages
+
+    timings = executor.getTimings()
+    (firstMessage, exit) = timings["late"]
+    assert firstMessage >= 0.2
+    assert exit >= firstMessage
+    for execution in executor.getExecutions():
+        assert execution.getReturnCode() == 0
+
+def test_executorFailureTeardown():
+    executor = WorkflowExecutor(outputCallback=None, terminationGracePeriod=1.0)
+    executor.addCommand("failing", "sleep 0.1; exit 3")
+    longRunning = executor.addCommand("longRunning", "sleep 30")
+
+    start = time.perf_counter()
+    assert not executor.run(timeout=10)
+    assert time.perf_counter() - start < 5
+
+    assert executor.getExecutions()[0].getReturnCode() == 3
+    assert longRunning.getReturnCode() != 0
+    assert longRunning.getTimeToFirstMessage() is None
+
+def test_executorLongLines():
+    # Lines longer than the buffer of the streams are reported in pieces
+    messages = []
+    executor = WorkflowExecutor(outputCallback=lambda name, stream, line: messages.append(line))
+    executor.addCommand("long", f"{sys.executable} -c \"print('x' * 3000000); print('end')\"")
+
+    assert executor.run(timeout=10)
+    assert executor.getExecutions()[0].getReturnCode() == 0
+    assert sum(len(line) for line in messages[:-1]) == 3000000
+    assert messages[-1] == "end"
+
+def test_executorSupervisorFailureTeardown():
+    # A command whose output cannot be handled is torn down with the others
+    def failingCallback(name, stream, line):
+        raise RuntimeError("Unable to handle the output.")
+    executor = WorkflowExecutor(outputCallback=failingCallback, terminationGracePeriod=1.0)
+    failing = executor.addCommand("failing", "echo hello; sleep 30")
+    longRunning = executor.addCommand("longRunning", "sleep 30")
+
+    start = time.perf_counter()
+    assert not executor.run(timeout=10)
+    assert time.perf_counter() - start < 5
+
+    assert failing.getReturnCode() is not None and failing.getReturnCode() != 0
+    assert longRunning.getReturnCode() != 0
+
+def test_executorTimeout():
+    executor = WorkflowExecutor(outputCallback=None)
+    executor.addCommand("longRunning", "sleep 30")
+
+    start = time.perf_counter()
+    assert not executor.run(timeout=0.2)
+    assert time.perf_counter() - start < 5
+
+def createExecutorWorkflow() -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange([1, 3])
+
+    workflow = Workflow(name="ExecutorWorkflow")
+    workflow.declareTask(MPITask(name="first", cmdline="first", resources=partitions[0]))
+    workflow.declareTask(MPITask(name="second", cmdline="second", resources=partitions[1]))
+    return workflow
+
+def test_executorLauncher(tmp_path, monkeypatch):
+    # Dummy mpirun printing a message for a rank of each task, tagged like Open MPI when asked to
+    fakeBin = tmp_path / "bin"
+    fakeBin.mkdir()
+    fakeMpirun = fakeBin / "mpirun"
+    fakeMpirun.write_text("#! /bin/bash\ntag() { if [ \"$1\" = \"--tag-output\" ]; then echo \"[1,$2]<stdout>:\"; fi; }\n"
+                          "echo \"$(tag $1 0)first ready\"\nsleep 0.1\necho \"$(tag $1 5)second ready\"\n")
+    fakeMpirun.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{fakeBin}:{os.environ['PATH']}")
+
+    launcher = MainLauncher(tagOutput=True)
+    launcher.generateOutputFiles(workflow=createExecutorWorkflow(), folder=tmp_path)
+    assert launcher.getCommandFile().read_text().startswith("#! /bin/bash\n\nmpirun --tag-output --hostfile")
+
+    executor = WorkflowExecutor(outputCallback=None)
+    executor.addLauncher(launcher)
+    assert executor.run(timeout=10)
+
+    assert executor.getTaskTimeToFirstMessage("first") is not None
+    assert executor.getTaskTimeToFirstMessage("second") >= 0.1
+    assert executor.getTaskTimeToFirstMessage("first") < executor.getTaskTimeToFirstMessage("second")
+
+    launcher.removeFiles()
+
+    # Without tagged output, only the whole command is timed
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=createExecutorWorkflow(), folder=tmp_path)
+    executor = WorkflowExecutor(outputCallback=None)
+    executor.addLauncher(launcher)
+    assert executor.run(timeout=10)
+    assert executor.getTaskTimeToFirstMessage("first") is None
+    assert executor.getTimings()["ExecutorWorkflow"][0] is not None
+
+    launcher.removeFiles()
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+import pytest
+
+from godrick.workflow import Workflow
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator
+from godrick.placement import CommunicationAwarePlacement, estimateCrossNodeTraffic
+
+def createCoupledWorkflow() -> Workflow:
+    # Two pairs of heavily coupled tasks (A-B and C-D) with a light link between A and C
+    workflow = Workflow("CoupledWorkflow")
+    tasks = {}
+    for name in ["A", "C", "B", "D"]:
+        task = MPITask(name=name, cmdline=f"bin/{name}", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+        task.addInputPort("in")
+        task.addOutputPort("out")
+        tasks[name] = task
+        workflow.declareTask(task)
+
+    for sender, receiver, traffic in [("A", "B", 100.0), ("C", "D", 100.0), ("A", "C", 1.0)]:
+        comm = MPIPairedCommunicator(f"{sender}to{receiver}")
+        comm.connectToOutputPort(tasks[sender].getOutputPort("out"))
+        comm.connectToInputPort(tasks[receiver].getInputPort("in"))
+        comm.setTraffic(traffic)
+        workflow.declareCommunicator(comm)
+    return workflow
+
+def test_communicationGraph():
+    workflow = createCoupledWorkflow()
+    assert workflow.getCommunicationGraph() == {("A", "B"): 100.0, ("C", "D"): 100.0, ("A", "C"): 1.0}
+
+def test_communicationAwarePlacement():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    # Declaration order with a flat split puts A and C together, then B and D together
+    workflow = createCoupledWorkflow()
+    partitions = cluster.selectNodesByRange([1, 1])
+    for i, name in enumerate(["A", "C", "B", "D"]):
+        workflow.getTaskByName(name).setResources(partitions[i // 2].splitNodesByCoreRange([2, 2])[i % 2])
+    assert estimateCrossNodeTraffic(workflow) == 200.0
+
+    workflow = createCoupledWorkflow()
+    placement = CommunicationAwarePlacement(cluster)
+    crossNodeTraffic = placement.assignResources(workflow, {"A": 2, "B": 2, "C": 2, "D": 2})
+    assert crossNodeTraffic == 1.0
+    assert placement.getCrossNodeTraffic() == 1.0
+
+    hostA = workflow.getTaskByName("A").getResources().getListOfCores()[0]["hostname"]
+    hostB = workflow.getTaskByName("B").getResources().getListOfCores()[0]["hostname"]
+    hostC = workflow.getTaskByName("C").getResources().getListOfCores()[0]["hostname"]
+    hostD = workflow.getTaskByName("D").getResources().getListOfCores()[0]["hostname"]
+    assert hostA == hostB
+    assert hostC == hostD
+    assert hostA != hostC
+
+def test_communicationAwarePlacementSpill():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    workflow = createCoupledWorkflow()
+    placement = CommunicationAwarePlacement(cluster)
+    placement.assignResources(workflow, {"A": 6, "B": 2, "C": 2, "D": 2})
+    assert len(workflow.getTaskByName("A").getResources().getListOfCores()) == 6
+
+    with pytest.raises(ValueError):
+        placement.assignResources(workflow, {"A": 16})
+    with pytest.raises(ValueError):
+        placement.assignResources(workflow, {"E": 1})
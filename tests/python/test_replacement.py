@@ -0,0 +1,82 @@
+from godrick.workflow import Workflow
+from godrick.launcher import MainLauncher
+from godrick.task import MPITask, MPIPlacementPolicy, SingletonTask
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import MPIPairedCommunicator, ZMQPairedCommunicator, ZMQCommunicatorProtocol
+
+import os
+import json
+import pytest
+from pathlib import Path
+
+def createWorkflow(name:str):
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    # machine1 runs the producer and the analysis, machine2 the simulation and the logger, machine3 is a spare
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+    (producerCores, analysisCores) = node1.splitNodesByCoreRange([1, 3])
+    (simCores, loggerCores) = node2.splitNodesByCoreRange([3, 1])
+
+    workflow = Workflow(name)
+    producer = MPITask(name="producer", cmdline="bin/producer", resources=producerCores, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    producer.addOutputPort("out")
+    analysis = MPITask(name="analysis", cmdline="bin/analysis", resources=analysisCores, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    analysis.addInputPort("in")
+    sim = MPITask(name="sim", cmdline="bin/sim", resources=simCores, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    sim.addOutputPort("out")
+    logger = SingletonTask(name="logger", cmdline="bin/logger", resources=loggerCores)
+    logger.addInputPort("in")
+
+    simToAnalysis = MPIPairedCommunicator(id="simToAnalysis")
+    simToAnalysis.connectToOutputPort(sim.getOutputPort("out"))
+    simToAnalysis.connectToInputPort(analysis.getInputPort("in"))
+    producerToLogger = ZMQPairedCommunicator(id="producerToLogger", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    producerToLogger.connectToOutputPort(producer.getOutputPort("out"))
+    producerToLogger.connectToInputPort(logger.getInputPort("in"))
+
+    for task in [producer, analysis, sim, logger]:
+        workflow.declareTask(task)
+    workflow.declareCommunicator(simToAnalysis)
+    workflow.declareCommunicator(producerToLogger)
+    return workflow, cluster
+
+def test_replaceFailedNodes():
+    (workflow, cluster) = createWorkflow("ReplacementWorkflow")
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path("rankfile.ReplacementWorkflow.txt")) as f:
+        previousLines = f.read().splitlines()
+    simProcesses = list(workflow.getTaskByName("sim").getProcessList())
+
+    # machine1 is lost, the whole cluster is given as spares: the cores used by the workflow are skipped
+    result = launcher.replaceFailedNodes(["machine1"], cluster)
+    assert result["tasks"] == ["producer", "analysis"]
+    assert result["ranks"] == [0, 1, 2, 3]
+    assert result["communicators"] == ["producerToLogger"]
+
+    # The ranks of the simulation and their processes are reused
+    with open(Path("rankfile.ReplacementWorkflow.txt")) as f:
+        lines = f.read().splitlines()
+    # The largest demand is placed first: the analysis gets the first spare cores
+    assert lines[:4] == ["rank 0=machine3 slots=3", "rank 1=machine3 slots=0", "rank 2=machine3 slots=1", "rank 3=machine3 slots=2"]
+    assert lines[4:] == previousLines[4:]
+    assert all(a is b for a, b in zip(workflow.getTaskByName("sim").getProcessList(), simProcesses))
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        comms = {comm["name"]: comm for comm in data["communicators"]}
+        assert comms["producerToLogger"]["protocolSettings"]["addr"] == "machine3"
+        assert comms["simToAnalysis"]["inStartRank"] == 1
+        assert comms["simToAnalysis"]["outStartRank"] == 4
+
+    # Losing a host not used by the workflow doesn't change anything
+    assert launcher.replaceFailedNodes(["machine4"], cluster)["tasks"] == []
+
+    # No spare cores left for the simulation
+    with pytest.raises(ValueError):
+        launcher.replaceFailedNodes(["machine2"], cluster)
+
+    launcher.removeFiles()
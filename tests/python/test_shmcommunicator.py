@@ -0,0 +1,65 @@
+from godrick.workflow import Workflow
+from godrick.launcher import MainLauncher
+from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import SHMPairedCommunicator, CommunicatorTransportType, CommunicatorFactory
+
+import os
+from pathlib import Path
+import json
+import pytest
+
+def createSHMWorkflow(name:str, colocated:bool) -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+    (core1, core2, _) = node1.splitNodesByCoreRange([1, 1, 2])
+    if not colocated:
+        core2 = node2.splitNodesByCoreRange([1, 3])[0]
+
+    workflow = Workflow(name)
+    task1 = MPITask(name="send", cmdline="bin/send", resources=core1, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=core2, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+
+    comm = SHMPairedCommunicator(id="channel", capacity=8, slotSize=4096)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    return workflow
+
+def test_SHMCommunicator():
+    workflow = createSHMWorkflow("SHMWorkflow", True)
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        comm = data["communicators"][0]
+        assert comm["transport"] == CommunicatorTransportType.SHM.name
+        assert comm["protocolSettings"]["segment"] == "/godrick.SHMWorkflow.channel"
+        assert comm["protocolSettings"]["capacity"] == 8
+        assert comm["protocolSettings"]["slotsize"] == 4096
+        assert comm["protocolSettings"]["host"] == "machine1"
+
+        parsed = CommunicatorFactory().jsonToCommunicator(comm)
+        assert isinstance(parsed, SHMPairedCommunicator)
+        assert parsed.segmentName == "/godrick.SHMWorkflow.channel"
+
+    launcher.removeFiles()
+
+def test_SHMCommunicatorRemote():
+    workflow = createSHMWorkflow("SHMRemoteWorkflow", False)
+    launcher = MainLauncher()
+    with pytest.raises(RuntimeError):
+        launcher.generateOutputFiles(workflow=workflow)
+    launcher.removeFiles()
+
+    with pytest.raises(ValueError):
+        SHMPairedCommunicator(id="tooSmall", capacity=1)
+    with pytest.raises(ValueError):
+        SHMPairedCommunicator(id="unaligned", slotSize=100)
@@ -0,0 +1,114 @@
+from godrick.workflow import Workflow
+from godrick.task import MPITask
+from godrick.launcher import MainLauncher
+from godrick.computeResources import ComputeCollection
+from godrick.communicator import ZMQPairedCommunicator, ZMQCommunicatorProtocol, MPIPairedCommunicator, MPICommunicatorProtocol
+from godrick.simulator import WorkflowSimulator, LinkModel
+
+import os
+from pathlib import Path
+
+def createPipeline(name:str, nbStages:int, protocol:ZMQCommunicatorProtocol = ZMQCommunicatorProtocol.PUSH_PULL) -> Workflow:
+    workflow = Workflow(name)
+    tasks = []
+    for i in range(nbStages):
+        task = MPITask(name=f"stage{i}", cmdline=f"bin/stage{i}")
+        task.addInputPort("in")
+        task.addOutputPort("out")
+        workflow.declareTask(task)
+        tasks.append(task)
+    for i in range(nbStages-1):
+        comm = ZMQPairedCommunicator(id=f"comm{i}", protocol=protocol)
+        comm.connectToOutputPort(tasks[i].getOutputPort("out"))
+        comm.connectToInputPort(tasks[i+1].getInputPort("in"))
+        workflow.declareCommunicator(comm)
+    return workflow
+
+def test_simulatorPipeline():
+    workflow = createPipeline("SimPipeline", 3)
+    simulator = WorkflowSimulator(workflow, serviceTimes={"stage0": 0.01, "stage1": 0.02, "stage2": 0.005})
+    report = simulator.run(duration=10.0)
+
+    assert abs(report.getThroughput() - 50.0) < 0.5
+    assert report.getBottleneckTask() == "stage1"
+    assert report.getUtilization("stage1") > 0.99
+    assert abs(report.getUtilization("stage2") - 0.25) < 0.01
+
+def test_simulatorLinkBottleneck():
+    workflow = createPipeline("SimLink", 3)
+    links = {"comm1": LinkModel(bandwidth=1e7, latency=1e-4, messageSize=1e6)}
+    simulator = WorkflowSimulator(workflow, serviceTimes={"stage0": 0.01, "stage1": 0.01, "stage2": 0.01}, linkModels=links)
+    report = simulator.run(duration=10.0)
+
+    assert abs(report.getThroughput() - 10.0) < 0.1
+    assert report.getBottleneckCommunicator() == "comm1"
+    assert report.getLinkUtilization("comm1") > 0.99
+
+def test_simulatorBackPressureAndDrops():
+    # PUSH_PULL blocks the sender once the queue is full, PUB_SUB drops the messages instead
+    workflow = createPipeline("SimPushPull", 2)
+    report = WorkflowSimulator(workflow, {"stage0": 0.001, "stage1": 0.01}, {"comm0": LinkModel(queueSize=10)}).run(duration=1.0)
+    assert report.getNbDropped("comm0") == 0
+    assert report.getBlockedFraction("stage0") > 0.8
+    assert report.getNbIterations("stage0") <= report.getNbIterations("stage1") + 11
+
+    workflow = createPipeline("SimPubSub", 2, ZMQCommunicatorProtocol.PUB_SUB)
+    report = WorkflowSimulator(workflow, {"stage0": 0.001, "stage1": 0.01}, {"comm0": LinkModel(queueSize=10)}).run(duration=1.0)
+    assert report.getNbDropped("comm0") > 800
+    assert report.getBlockedFraction("stage0") == 0.0
+
+def test_simulatorTokens():
+    # A feedback loop only runs if the communicator closing the loop provides a token
+    workflow = createPipeline("SimLoop", 2)
+    feedback = ZMQPairedCommunicator(id="feedback", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    workflow.getTaskByName("stage1").addOutputPort("feedback")
+    workflow.getTaskByName("stage0").addInputPort("feedback")
+    feedback.connectToOutputPort(workflow.getTaskByName("stage1").getOutputPort("feedback"))
+    feedback.connectToInputPort(workflow.getTaskByName("stage0").getInputPort("feedback"))
+    workflow.declareCommunicator(feedback)
+
+    serviceTimes = {"stage0": 0.01, "stage1": 0.01}
+    # The "in" port of stage0 is not connected in this workflow, only the feedback gates it
+    report = WorkflowSimulator(workflow, serviceTimes).run(duration=1.0)
+    assert report.getNbIterations("stage0") == 0
+
+    feedback.setNbToken(1)
+    report = WorkflowSimulator(workflow, serviceTimes).run(duration=1.0)
+    assert abs(report.getThroughput() - 50.0) < 1.0
+
+def test_simulatorMPI(tmp_path):
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange([1, 3])
+
+    workflow = Workflow("SimMPI")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0])
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1])
+    task2.addInputPort("in")
+    comm = MPIPairedCommunicator(id="mpiComm", protocol=MPICommunicatorProtocol.PARTIAL_BCAST_GATHER)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow, folder=tmp_path)
+
+    # 3 senders and 9 receivers: each send goes to 3 receivers, one after the other
+    links = {"mpiComm": LinkModel(bandwidth=1e6, messageSize=1e4)}
+    report = WorkflowSimulator(workflow, {"send": 0.0, "receive": 0.0}, links).run(nbIterations=100)
+    assert abs(report.getThroughput() - 1.0 / 0.03) < 0.5
+    assert report.getNbIterations("receive") == 100
+
+    launcher.removeFiles()
+    workflow.removeFiles()
+
+def test_simulatorLongRun():
+    # 2 s of simulated time at 10000 iterations per second, each stage lagging one message behind the previous one
+    workflow = createPipeline("SimLongRun", 4)
+    simulator = WorkflowSimulator(workflow, serviceTimes={f"stage{i}": 0.0001 for i in range(4)})
+    report = simulator.run(duration=2.0)
+
+    assert [report.getNbMessages(f"comm{i}") for i in range(3)] == [20000, 19999, 19998]
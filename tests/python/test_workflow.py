@@ -1,10 +1,11 @@
 import os
 from pathlib import Path
 import uuid
+import pytest
 
 from godrick.workflow import Workflow
 from godrick.task import MPITask, MPIPlacementPolicy
-from godrick.launcher import MainLauncher
+from godrick.launcher import MainLauncher, TaskSetupType, compressSlots
 from godrick.computeResources import ComputeCollection
 from godrick.communicator import MPIPairedCommunicator, MPICommunicatorProtocol
 
@@ -44,10 +45,7 @@ rank 3=machine1 slots=3
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine1
-machine1
-machine1
+        assert content == """machine1 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow1.sh")
     assert commandfilePath.is_file()
@@ -104,18 +102,9 @@ rank 11=machine3 slots=3
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow2.sh")
     assert commandfilePath.is_file()
@@ -181,18 +170,9 @@ rank 11=machine3 slots=3
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow3.sh")
     assert commandfilePath.is_file()
@@ -258,18 +238,9 @@ rank 11=machine3 slots=3
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine2
-machine3
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow4.sh")
     assert commandfilePath.is_file()
@@ -321,26 +292,17 @@ def test_multipleTaskMultipleHostPerSocketWorkflow():
         assert content == """rank 0=machine1 slots=0
 rank 1=machine2 slots=0
 rank 2=machine3 slots=0
-rank 3=machine1 slots=1,2,3
-rank 4=machine2 slots=1,2,3
-rank 5=machine3 slots=1,2,3
+rank 3=machine1 slots=1-3
+rank 4=machine2 slots=1-3
+rank 5=machine3 slots=1-3
 """
     hostfilePath = Path("hostfile.MyWorkflow5.txt")
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine2
-machine3
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow5.sh")
     assert commandfilePath.is_file()
@@ -392,26 +354,17 @@ def test_multipleTaskMultipleHostPerNodeWorkflow():
         assert content == """rank 0=machine1 slots=0
 rank 1=machine2 slots=0
 rank 2=machine3 slots=0
-rank 3=machine1 slots=1,2,3
-rank 4=machine2 slots=1,2,3
-rank 5=machine3 slots=1,2,3
+rank 3=machine1 slots=1-3
+rank 4=machine2 slots=1-3
+rank 5=machine3 slots=1-3
 """
     hostfilePath = Path("hostfile.MyWorkflow6.txt")
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine2
-machine3
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = Path("launch.MyWorkflow6.sh")
     assert commandfilePath.is_file()
@@ -467,26 +420,17 @@ def test_differentFolderWorkflow():
         assert content == """rank 0=machine1 slots=0
 rank 1=machine2 slots=0
 rank 2=machine3 slots=0
-rank 3=machine1 slots=1,2,3
-rank 4=machine2 slots=1,2,3
-rank 5=machine3 slots=1,2,3
+rank 3=machine1 slots=1-3
+rank 4=machine2 slots=1-3
+rank 5=machine3 slots=1-3
 """
     hostfilePath = folder / Path("hostfile.MyWorkflow7.txt")
     assert hostfilePath.is_file()
     with open(hostfilePath, "r") as f:
         content = f.read()
-        assert content == """machine1
-machine2
-machine3
-machine1
-machine1
-machine1
-machine2
-machine2
-machine2
-machine3
-machine3
-machine3
+        assert content == """machine1 slots=4
+machine2 slots=4
+machine3 slots=4
 """
     commandfilePath = folder / Path("launch.MyWorkflow7.sh")
     assert commandfilePath.is_file()
@@ -552,4 +496,221 @@ def test_multipleTaskMultipleHostWorkflowReload():
 
 
     # Cleanup the files after testing
-    launcher.removeFiles()
\ No newline at end of file
+    launcher.removeFiles()
+
+
+def test_userDefinedPlacementWorkflow():
+    # Create resources
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    # Create an empty workflow
+    workflow = Workflow(name="MyWorkflow9")
+
+    # Create two tasks, one with a rank map given as a list, one with a callable
+    task1 = MPITask(name="testTask1", cmdline="myExecutable1 --args 1", resources=cluster)
+    task1.setRankMap([("machine1", [0, 1]), ("machine3", [2])])
+    task2 = MPITask(name="testTask2", cmdline="myExecutable2 --args 2", resources=cluster)
+    task2.setRankMap(lambda rank: ("machine2", [rank]), nbRanks=3)
+
+    workflow.declareTask(task=task1)
+    workflow.declareTask(task=task2)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    rankfilePath = Path("rankfile.MyWorkflow9.txt")
+    assert rankfilePath.is_file()
+    with open(rankfilePath, "r") as f:
+        content = f.read()
+        assert content == """rank 0=machine1 slots=0,1
+rank 1=machine3 slots=2
+rank 2=machine2 slots=0
+rank 3=machine2 slots=1
+rank 4=machine2 slots=2
+"""
+    assert len(task1.getProcessList()) == 2
+    assert len(task2.getProcessList()) == 3
+
+    commandfilePath = Path("launch.MyWorkflow9.sh")
+    with open(commandfilePath, "r") as f:
+        content = f.read()
+        assert content == """#! /bin/bash
+
+mpirun --hostfile hostfile.MyWorkflow9.txt --rankfile rankfile.MyWorkflow9.txt  -np 2 myExecutable1 --args 1 : -np 3 myExecutable2 --args 2"""
+
+    launcher.removeFiles()
+
+def test_userDefinedPlacementValidation():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    partitions = cluster.splitNodesByCoreRange([2,2])
+
+    # Cores outside of the resources of the task
+    workflow = Workflow(name="MyWorkflow10")
+    task = MPITask(name="testTask1", cmdline="myExecutable1", resources=partitions[0])
+    task.setRankMap([("machine1", [0]), ("machine1", [3])])
+    workflow.declareTask(task=task)
+    with pytest.raises(ValueError):
+        MainLauncher().generateOutputFiles(workflow=workflow)
+
+    # Cores shared between two ranks
+    workflow = Workflow(name="MyWorkflow11")
+    task = MPITask(name="testTask1", cmdline="myExecutable1", resources=partitions[0])
+    task.setRankMap([("machine1", [0, 1]), ("machine1", [1])])
+    workflow.declareTask(task=task)
+    with pytest.raises(ValueError):
+        MainLauncher().generateOutputFiles(workflow=workflow)
+
+    # A callable needs the number of ranks
+    with pytest.raises(ValueError):
+        task.setRankMap(lambda rank: ("machine1", [rank]))
+
+def test_hybridPlacementWorkflow():
+    # Create resources: 2 sockets with 2 cores and their hyperthreads
+    sysfsRoot = Path(__file__).resolve().parent / "../../data/tests/sysfs/dualsocket"
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromLocalhost(useHT=True, sysfsRoot=sysfsRoot)
+    hostname = cluster.getCoreTable().getHostName(0)
+
+    workflow = Workflow(name="MyWorkflow12")
+
+    # One rank per socket with 2 cores each and their siblings, two single core ranks per socket
+    task1 = MPITask(name="testTask1", cmdline="myExecutable1 --args 1", resources=cluster)
+    task1.setHybridLayout(ranksPerSocket=1, coresPerRank=2, useHTSiblings=True)
+    task2 = MPITask(name="testTask2", cmdline="myExecutable2 --args 2", resources=cluster)
+    task2.setHybridLayout(ranksPerSocket=2, coresPerRank=1)
+    workflow.declareTask(task=task1)
+    workflow.declareTask(task=task2)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path("rankfile.MyWorkflow12.txt"), "r") as f:
+        content = f.read()
+        assert content == f"""rank 0={hostname} slots=0,1,4,5
+rank 1={hostname} slots=2,3,6,7
+rank 2={hostname} slots=0
+rank 3={hostname} slots=1
+rank 4={hostname} slots=2
+rank 5={hostname} slots=3
+"""
+    with open(Path("launch.MyWorkflow12.sh"), "r") as f:
+        content = f.read()
+        assert content == """#! /bin/bash
+
+mpirun --hostfile hostfile.MyWorkflow12.txt --rankfile rankfile.MyWorkflow12.txt  -x OMP_NUM_THREADS=4 -x OMP_PLACES=threads -x OMP_PROC_BIND=close -np 2 myExecutable1 --args 1 : -x OMP_NUM_THREADS=1 -x OMP_PLACES=cores -x OMP_PROC_BIND=close -np 4 myExecutable2 --args 2"""
+
+    launcher.removeFiles()
+
+    # Not enough cores in the sockets for the layout
+    workflow = Workflow(name="MyWorkflow13")
+    task = MPITask(name="testTask1", cmdline="myExecutable1", resources=cluster)
+    task.setHybridLayout(ranksPerSocket=2, coresPerRank=2)
+    workflow.declareTask(task=task)
+    with pytest.raises(ValueError):
+        MainLauncher().generateOutputFiles(workflow=workflow)
+
+def test_compressSlots():
+    assert compressSlots([0]) == "0"
+    assert compressSlots([0, 1]) == "0,1"
+    assert compressSlots(range(32)) == "0-31"
+    assert compressSlots([0, 1, 2, 3, 8, 9, 12, 13, 14]) == "0-3,8,9,12-14"
+    assert compressSlots([4, 5, 6, 0, 1, 2]) == "4-6,0-2"
+
+def test_slurmWorkflow():
+    # Create resources
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    workflow = Workflow(name="MyWorkflow14")
+
+    task1 = MPITask(name="testTask1", cmdline="myExecutable1 --args 1", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2 = MPITask(name="testTask2", cmdline="myExecutable2 --args 2", placementPolicy=MPIPlacementPolicy.ONETASKPERSOCKET)
+    partitions = cluster.splitNodesByCoreRange([1,3])
+    task1.setResources(partitions[0])
+    task2.setResources(partitions[1])
+    workflow.declareTask(task=task1)
+    workflow.declareTask(task=task2)
+
+    launcher = MainLauncher(taskSetupType=TaskSetupType.SLURM)
+    launcher.generateOutputFiles(workflow=workflow)
+
+    assert task1.getGlobalStartRank() == 0
+    assert task1.getGlobalNbRank() == 3
+    assert task2.getGlobalStartRank() == 3
+    assert task2.getGlobalNbRank() == 3
+
+    with open(Path("hostfile.MyWorkflow14.txt"), "r") as f:
+        content = f.read()
+        assert content == """machine1
+machine2
+machine3
+machine1
+machine2
+machine3
+"""
+    with open(Path("multiprog.MyWorkflow14.conf"), "r") as f:
+        content = f.read()
+        assert content == """0-2 myExecutable1 --args 1
+3-5 myExecutable2 --args 2
+"""
+    with open(Path("launch.MyWorkflow14.sh"), "r") as f:
+        content = f.read()
+        assert content == """#! /bin/bash
+
+export SLURM_HOSTFILE=hostfile.MyWorkflow14.txt
+srun --ntasks=6 --distribution=arbitrary --cpu-bind=mask_cpu:0x1,0xe --multi-prog multiprog.MyWorkflow14.conf"""
+
+    launcher.removeFiles()
+
+    # The local tasks of machine1 and machine2 would need different masks
+    workflow = Workflow(name="MyWorkflow15")
+    task = MPITask(name="testTask1", cmdline="myExecutable1", resources=cluster)
+    task.setRankMap([("machine1", [0]), ("machine2", [1])])
+    workflow.declareTask(task=task)
+    with pytest.raises(ValueError):
+        MainLauncher(taskSetupType=TaskSetupType.SLURM).generateOutputFiles(workflow=workflow)
+    assert not Path("hostfile.MyWorkflow15.txt").is_file()
+
+def test_mpichWorkflow():
+    # Create resources
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    workflow = Workflow(name="MyWorkflow16")
+
+    task1 = MPITask(name="testTask1", cmdline="myExecutable1 --args 1", placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2 = MPITask(name="testTask2", cmdline="myExecutable2 --args 2", placementPolicy=MPIPlacementPolicy.ONETASKPERSOCKET)
+    partitions = cluster.splitNodesByCoreRange([2,2])
+    task1.setResources(partitions[0])
+    task2.setResources(partitions[1])
+    workflow.declareTask(task=task1)
+    workflow.declareTask(task=task2)
+
+    launcher = MainLauncher(taskSetupType=TaskSetupType.MPICH)
+    launcher.generateOutputFiles(workflow=workflow)
+
+    assert task2.getGlobalStartRank() == 6
+    assert task2.getGlobalNbRank() == 3
+
+    with open(Path("machinefile.MyWorkflow16.txt"), "r") as f:
+        content = f.read()
+        assert content == """machine1:2
+machine2:2
+machine3:2
+machine1:1
+machine2:1
+machine3:1
+"""
+    with open(Path("launch.MyWorkflow16.sh"), "r") as f:
+        content = f.read()
+        assert content == """#! /bin/bash
+
+mpiexec -f machinefile.MyWorkflow16.txt -bind-to user:0,1,2+3  -n 6 myExecutable1 --args 1 : -n 3 myExecutable2 --args 2"""
+
+    launcher.removeFiles()
@@ -1,12 +1,14 @@
 from godrick.workflow import Workflow
-from godrick.launcher import MainLauncher
-from godrick.task import MPITask, MPIPlacementPolicy
+from godrick.launcher import MainLauncher, SINGLETON_LAUNCH_FUNCTION
+from godrick.task import MPITask, MPIPlacementPolicy, SingletonTask
 from godrick.computeResources import ComputeCollection
-from godrick.communicator import ZMQPairedCommunicator, ZMQCommunicatorProtocol, CommunicatorTransportType, ZMQBindingSide
+from godrick.communicator import ZMQPairedCommunicator, ZMQCommunicatorProtocol, CommunicatorTransportType, ZMQBindingSide, ZMQPortAllocator, ZMQGateCommunicator, CommunicatorGateSideFlag, ZMQRankMapping, getZMQRankPeers, CommunicatorSchemaMode, MPIPairedCommunicator, CommunicatorFactory
 
 import os
 from pathlib import Path
 import json
+import pytest
+import subprocess
 
 def test_ZMQCommunicator():
     exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
@@ -58,3 +60,260 @@ def test_ZMQCommunicator():
         assert commDict["protocolSettings"]["bindingside"] == ZMQBindingSide.ZMQ_BIND_SENDER.name
 
     launcher.removeFiles()
+
+def test_ZMQCommunicatorSingletonTask():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    workflow = Workflow("SingletonWorkflow")
+    partitions = cluster.splitNodesByCoreRange([1, 1])
+
+    # The sender is a monitor launched outside of mpirun
+    task1 = SingletonTask(name="monitor", cmdline="bin/monitor --config config.SingletonWorkflow.json", resources=partitions[0])
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+
+    comm1 = ZMQPairedCommunicator(id="myComm", protocol=ZMQCommunicatorProtocol.PUB_SUB)
+    comm1.connectToInputPort(task2.getInputPort("in"))
+    comm1.connectToOutputPort(task1.getOutputPort("out"))
+
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm1)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    assert len(task1.getProcessList()) == 1
+    assert task1.getProcessList()[0].hostname == "machine1"
+    assert task2.getGlobalStartRank() == 0
+    assert task2.getGlobalNbRank() == 1
+
+    with open(Path("launch.SingletonWorkflow.sh")) as f:
+        content = f.read()
+        assert "godrickRun machine1 taskset -c 0 bin/monitor --config config.SingletonWorkflow.json\n" in content
+        assert content.endswith("mpirun --hostfile hostfile.SingletonWorkflow.txt --rankfile rankfile.SingletonWorkflow.txt  -np 1 bin/receive\nwait\n")
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.loads(f.read())
+        commDict = data["communicators"][0]
+        assert commDict["protocolSettings"]["addr"] == "machine1"
+
+    launcher.removeFiles()
+
+def test_singletonRemoteArguments(tmp_path):
+    # ssh replaced by a function running the remote command line in a local shell
+    script = tmp_path / "remote.sh"
+    script.write_text("ssh() { bash -c \"$3\"; }\n" + SINGLETON_LAUNCH_FUNCTION + "godrickRun remotehost printf '[%s]' 'a b' \"it's\" '$HOME'\nwait\n")
+    result = subprocess.run(["bash", str(script)], capture_output=True, text=True, cwd=tmp_path)
+    assert result.stdout == "[a b][it's][$HOME]"
+
+def createPortWorkflow(name:str, cluster:ComputeCollection, pinnedPort:int = None) -> Workflow:
+    # One sender bound on machine1 with two ZMQ channels and a gate
+    workflow = Workflow(name)
+    partitions = cluster.splitNodesByCoreRange([1, 1])
+
+    task1 = MPITask(name="send", cmdline="bin/send", resources=partitions[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out1")
+    task1.addOutputPort("out2")
+    task1.addOutputPort("out3")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=partitions[1], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in1")
+    task2.addInputPort("in2")
+
+    comm1 = ZMQPairedCommunicator(id="comm1", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    comm1.connectToInputPort(task2.getInputPort("in1"))
+    comm1.connectToOutputPort(task1.getOutputPort("out1"))
+    comm2 = ZMQPairedCommunicator(id="comm2", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    comm2.connectToInputPort(task2.getInputPort("in2"))
+    comm2.connectToOutputPort(task1.getOutputPort("out2"))
+    gate = ZMQGateCommunicator(name="gate", side=CommunicatorGateSideFlag.OPEN_SENDER, bindingSide=ZMQBindingSide.ZMQ_BIND_SENDER, port=pinnedPort)
+    gate.connectToOutputPort(task1.getOutputPort("out3"))
+
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm1)
+    workflow.declareCommunicator(comm2)
+    workflow.declareCommunicator(gate)
+    return workflow
+
+def getPorts(workflow:Workflow) -> dict:
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        return {comm["name"]: comm["protocolSettings"]["port"] for comm in data["communicators"]}
+
+def test_ZMQPortAllocator():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+
+    # Channels bound on the same host get different ports, the pinned port of the gate is kept
+    allocator = ZMQPortAllocator(firstPort=50000, lastPort=50003)
+    workflow1 = createPortWorkflow("PortWorkflow1", cluster, pinnedPort=50001)
+    launcher1 = MainLauncher(portAllocator=allocator)
+    launcher1.generateOutputFiles(workflow=workflow1)
+    assert getPorts(workflow1) == {"comm1": 50000, "comm2": 50002, "gate": 50001}
+
+    # A second workflow on the same node with the same allocator doesn't reuse the ports
+    workflow2 = createPortWorkflow("PortWorkflow2", cluster)
+    launcher2 = MainLauncher(portAllocator=allocator)
+    with pytest.raises(RuntimeError):
+        launcher2.generateOutputFiles(workflow=workflow2)
+
+    # The ports handed out to the workflow which failed are given back
+    assert allocator.getAssignments() == {"machine1": {50000: "PortWorkflow1.comm1", 50001: "PortWorkflow1.gate", 50002: "PortWorkflow1.comm2"}}
+
+    # The assignments can be saved and reloaded for a workflow generated later
+    allocator.releasePort("machine1", 50000)
+    allocator.saveToFile(Path("ports.json"))
+    reloaded = ZMQPortAllocator()
+    reloaded.loadFromFile(Path("ports.json"))
+    Path("ports.json").unlink()
+    assert reloaded.getAssignments() == {"machine1": {50001: "PortWorkflow1.gate", 50002: "PortWorkflow1.comm2"}}
+    assert not reloaded.isAvailable("machine1", 50001)
+    assert reloaded.allocatePort("machine1", "other") == 50000
+
+    # Pinning a port already in use is an error
+    with pytest.raises(ValueError):
+        reloaded.reservePort("machine1", 50002, "other")
+
+    launcher1.removeFiles()
+    launcher2.removeFiles()
+
+def test_ZMQCommunicatorIPC():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+    (core1, core2, _) = node1.splitNodesByCoreRange([1, 1, 2])
+
+    workflow = Workflow("IPCWorkflow")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=core1, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2 = MPITask(name="local", cmdline="bin/local", resources=core2, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task3 = MPITask(name="remote", cmdline="bin/remote", resources=node2.splitNodesByCoreRange([1, 3])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    for port in ["toLocal", "toLocalTCP", "toRemote"]:
+        task1.addOutputPort(port)
+    task2.addInputPort("in1")
+    task2.addInputPort("in2")
+    task3.addInputPort("in")
+
+    # Same host: ipc unless disabled, different hosts: tcp
+    toLocal = ZMQPairedCommunicator(id="toLocal", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    toLocal.connectToOutputPort(task1.getOutputPort("toLocal"))
+    toLocal.connectToInputPort(task2.getInputPort("in1"))
+    toLocalTCP = ZMQPairedCommunicator(id="toLocalTCP", protocol=ZMQCommunicatorProtocol.PUSH_PULL, useIPC=False)
+    toLocalTCP.connectToOutputPort(task1.getOutputPort("toLocalTCP"))
+    toLocalTCP.connectToInputPort(task2.getInputPort("in2"))
+    toRemote = ZMQPairedCommunicator(id="toRemote", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    toRemote.connectToOutputPort(task1.getOutputPort("toRemote"))
+    toRemote.connectToInputPort(task3.getInputPort("in"))
+
+    for task in [task1, task2, task3]:
+        workflow.declareTask(task)
+    for comm in [toLocal, toLocalTCP, toRemote]:
+        workflow.declareCommunicator(comm)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        endpoints = {comm["name"]: comm["protocolSettings"]["endpoint"] for comm in data["communicators"]}
+        assert endpoints["toLocal"] == "ipc:///tmp/godrick.IPCWorkflow.toLocal.ipc"
+        assert endpoints["toLocalTCP"] == "tcp://machine1:50001"
+        assert endpoints["toRemote"] == "tcp://machine1:50002"
+
+    launcher.removeFiles()
+
+def test_ZMQCommunicatorMultiProcess():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+
+    workflow = Workflow("MultiZMQWorkflow")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=node1, placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=node2.splitNodesByCoreRange([2, 2])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    for port in ["block", "roundRobin", "bindReceiver"]:
+        task1.addOutputPort(port)
+        task2.addInputPort(port)
+
+    # 4 senders binding on machine1 and 2 receivers on machine2
+    block = ZMQPairedCommunicator(id="block", protocol=ZMQCommunicatorProtocol.PUSH_PULL)
+    roundRobin = ZMQPairedCommunicator(id="roundRobin", protocol=ZMQCommunicatorProtocol.PUSH_PULL, mapping=ZMQRankMapping.ROUND_ROBIN)
+    bindReceiver = ZMQPairedCommunicator(id="bindReceiver", protocol=ZMQCommunicatorProtocol.PUB_SUB, bindingSide=ZMQBindingSide.ZMQ_BIND_RECEIVER)
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    for comm in [block, roundRobin, bindReceiver]:
+        comm.connectToOutputPort(task1.getOutputPort(comm.getName()))
+        comm.connectToInputPort(task2.getInputPort(comm.getName()))
+        workflow.declareCommunicator(comm)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        settings = {comm["name"]: comm["protocolSettings"] for comm in data["communicators"]}
+        assert settings["block"]["mapping"] == ZMQRankMapping.BLOCK.name
+        assert settings["block"]["endpoints"] == [f"tcp://machine1:{port}" for port in range(50000, 50004)]
+        assert settings["block"]["peers"] == [[0, 1], [2, 3]]
+        assert settings["roundRobin"]["endpoints"] == [f"tcp://machine1:{port}" for port in range(50004, 50008)]
+        assert settings["roundRobin"]["peers"] == [[0, 2], [1, 3]]
+        assert settings["bindReceiver"]["endpoints"] == ["tcp://machine2:50000", "tcp://machine2:50001"]
+        assert settings["bindReceiver"]["peers"] == [[0], [0], [1], [1]]
+
+    assignments = launcher.getPortAllocator().getAssignments()
+    assert assignments["machine1"][50000] == "MultiZMQWorkflow.block.0"
+    assert assignments["machine2"][50001] == "MultiZMQWorkflow.bindReceiver.1"
+    launcher.removeFiles()
+
+    assert getZMQRankPeers(3, 1, ZMQRankMapping.BLOCK) == [[0, 1, 2]]
+    assert getZMQRankPeers(2, 5, ZMQRankMapping.BLOCK) == [[0], [0], [0], [1], [1]]
+    assert getZMQRankPeers(2, 5, ZMQRankMapping.ROUND_ROBIN) == [[0], [1], [0], [1], [0]]
+
+def createSchemaModeWorkflow(name:str, protocol:ZMQCommunicatorProtocol, nbSenders:int, nbReceivers:int) -> Workflow:
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+
+    workflow = Workflow(name)
+    task1 = MPITask(name="send", cmdline="bin/send", resources=node1.splitNodesByCoreRange([nbSenders, 4 - nbSenders])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=node2.splitNodesByCoreRange([nbReceivers, 4 - nbReceivers])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+
+    comm = ZMQPairedCommunicator(id="stream", protocol=protocol, schemaMode=CommunicatorSchemaMode.ON_CHANGE)
+    comm.connectToOutputPort(task1.getOutputPort("out"))
+    comm.connectToInputPort(task2.getInputPort("in"))
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(comm)
+    return workflow
+
+def test_ZMQCommunicatorSchemaMode():
+    # Several senders sharing a receiver is fine, the schemas are identified on the receiver
+    workflow = createSchemaModeWorkflow("SchemaModeWorkflow", ZMQCommunicatorProtocol.PUSH_PULL, 2, 1)
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+    with open(Path(workflow.getConfigurationFile())) as f:
+        comm = json.load(f)["communicators"][0]
+        assert comm["schemaMode"] == CommunicatorSchemaMode.ON_CHANGE.name
+        assert CommunicatorFactory().jsonToCommunicator(comm).getSchemaMode() == CommunicatorSchemaMode.ON_CHANGE
+    launcher.removeFiles()
+
+    # Receivers could miss the message holding the schema
+    for (name, protocol, nbSenders, nbReceivers) in [("SchemaModePubSub", ZMQCommunicatorProtocol.PUB_SUB, 1, 1), ("SchemaModeFanOut", ZMQCommunicatorProtocol.PUSH_PULL, 1, 2)]:
+        workflow = createSchemaModeWorkflow(name, protocol, nbSenders, nbReceivers)
+        launcher = MainLauncher()
+        with pytest.raises(RuntimeError):
+            launcher.generateOutputFiles(workflow=workflow)
+        launcher.removeFiles()
+
+    # Configurations written before the schema mode existed keep sending the schema with every message
+    data = MPIPairedCommunicator(id="legacy").toDict()
+    del data["schemaMode"]
+    assert CommunicatorFactory().jsonToCommunicator(data).getSchemaMode() == CommunicatorSchemaMode.ALWAYS
@@ -2,11 +2,12 @@ from godrick.workflow import Workflow
 from godrick.task import MPITask, MPIPlacementPolicy
 from godrick.launcher import MainLauncher
 from godrick.computeResources import ComputeCollection
-from godrick.communicator import ZMQGateCommunicator, CommunicatorGateSideFlag, ZMQBindingSide, CommunicatorTransportType, ZMQCommunicatorProtocol
+from godrick.communicator import ZMQGateCommunicator, CommunicatorGateSideFlag, ZMQBindingSide, CommunicatorTransportType, ZMQCommunicatorProtocol, ZMQRankMapping
 
 import os
 from pathlib import Path
 import json
+import pytest
 
 def test_ZMQGateCommunicator():
     exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/singlehost.txt")
@@ -85,4 +86,45 @@ def test_ZMQGateCommunicator():
                 assert commDict["nonblocking"] == False
             else:
                 assert commDict["nonblocking"] == True
-    launcher.removeFiles()
\ No newline at end of file
+    launcher.removeFiles()
+
+def test_ZMQGateCommunicatorMultiProcess():
+    exampleFile = os.path.join(Path(__file__).resolve().parent, "../../data/tests/triplehost.txt")
+    cluster = ComputeCollection(name="myCluster")
+    cluster.initFromHostFile(exampleFile, True)
+    (node1, node2, _) = cluster.selectNodesByRange([1, 1, 1])
+
+    workflow = Workflow("MultiZMQGateWorkflow")
+    task1 = MPITask(name="send", cmdline="bin/send", resources=node1.splitNodesByCoreRange([2, 2])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task1.addOutputPort("out")
+    task2 = MPITask(name="receive", cmdline="bin/receive", resources=node2.splitNodesByCoreRange([3, 1])[0], placementPolicy=MPIPlacementPolicy.ONETASKPERCORE)
+    task2.addInputPort("in")
+
+    gateSender = ZMQGateCommunicator(name="senderSide", side=CommunicatorGateSideFlag.OPEN_SENDER, protocol=ZMQCommunicatorProtocol.PUSH_PULL, mapping=ZMQRankMapping.ROUND_ROBIN)
+    gateSender.connectToOutputPort(task1.getOutputPort("out"))
+    gateReceiver = ZMQGateCommunicator(name="receiverSide", side=CommunicatorGateSideFlag.OPEN_RECEIVER, protocol=ZMQCommunicatorProtocol.PUSH_PULL, mapping=ZMQRankMapping.ROUND_ROBIN)
+    gateReceiver.connectToInputPort(task2.getInputPort("in"))
+    gateSender.connectToGate(gateReceiver)
+
+    workflow.declareTask(task1)
+    workflow.declareTask(task2)
+    workflow.declareCommunicator(gateSender)
+    workflow.declareCommunicator(gateReceiver)
+
+    launcher = MainLauncher()
+    launcher.generateOutputFiles(workflow=workflow)
+
+    with open(Path(workflow.getConfigurationFile())) as f:
+        data = json.load(f)
+        settings = {comm["name"]: comm["protocolSettings"] for comm in data["communicators"]}
+
+        # Both sender ranks bind, the 3 receiver ranks are dealt to them in turn
+        assert settings["senderSide"]["endpoints"] == ["tcp://machine1:50000", "tcp://machine1:50001"]
+        assert "peers" not in settings["senderSide"]
+        assert settings["receiverSide"]["endpoints"] == settings["senderSide"]["endpoints"]
+        assert settings["receiverSide"]["peers"] == [[0], [1], [0]]
+
+    launcher.removeFiles()
+
+    with pytest.raises(ValueError):
+        ZMQGateCommunicator(name="blockSide", side=CommunicatorGateSideFlag.OPEN_SENDER, mapping=ZMQRankMapping.BLOCK).connectToGate(ZMQGateCommunicator(name="rrSide", side=CommunicatorGateSideFlag.OPEN_RECEIVER, mapping=ZMQRankMapping.ROUND_ROBIN))